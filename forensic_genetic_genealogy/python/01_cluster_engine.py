@@ -1,10 +1,33 @@
+import argparse
 import pandas as pd
-import networkx as nx
-from community import community_louvain
+from clustering import BACKENDS, DEFAULT_SEED, cluster_edges
 from db_connect import get_connection
+from incremental_clustering import get_watermark, recluster_incremental, record_full_run
+
+parser = argparse.ArgumentParser(description="Louvain clustering of the shared-match network")
+parser.add_argument("--backend", choices=BACKENDS, default="networkx",
+                    help="networkx = python-louvain on a Graph, sparse = Louvain on a CSR adjacency")
+parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+parser.add_argument("--incremental", action="store_true",
+                    help="only re-cluster communities touched by new/changed shared_matches rows")
+args = parser.parse_args()
 
 conn = get_connection()
 
+# Incremental mode: needs a watermark from a previous full run
+if args.incremental and get_watermark(conn) is not None:
+    print(f"Incremental re-cluster (backend={args.backend}, seed={args.seed})...")
+    summary = recluster_incremental(conn, backend=args.backend, seed=args.seed)
+    conn.close()
+    print("\nIncremental summary:")
+    for k, v in summary.items():
+        print(f"  {k}: {v:,}")
+    print("\nDONE. match_clusters updated in place.")
+    raise SystemExit(0)
+
+if args.incremental:
+    print("No previous cluster_state found; running a full re-cluster instead.")
+
 # Load shared match edges
 print("Loading shared match network...")
 edges = pd.read_sql_query("""
@@ -14,23 +37,9 @@ FROM shared_matches
 
 print(f"Edges loaded: {len(edges)}")
 
-# Build graph
-print("Building graph...")
-G = nx.Graph()
-
-for _, row in edges.iterrows():
-    weight = float(row["shared_strength"])
-    G.add_edge(row["match_id_a"], row["match_id_b"], weight=weight)
-
-
-print("Nodes:", G.number_of_nodes())
-print("Edges:", G.number_of_edges())
-
-# Run Louvain clustering
-print("Running Louvain community detection...")
-partition = community_louvain.best_partition(G, weight='weight')
-
-cluster_df = pd.DataFrame(list(partition.items()), columns=["match_id", "cluster_id"])
+# Build graph + run Louvain clustering (bulk load: interned IDs -> edge arrays)
+print(f"Running Louvain community detection (backend={args.backend}, seed={args.seed})...")
+cluster_df = cluster_edges(edges, backend=args.backend, seed=args.seed)
 
 # Calculate cluster sizes
 sizes = cluster_df.groupby("cluster_id").size().reset_index(name="cluster_size")
@@ -43,5 +52,9 @@ print(cluster_df["cluster_id"].value_counts().head())
 print("\nWriting clusters to database...")
 cluster_df.to_sql("match_clusters", conn, if_exists="replace", index=False)
 
+# Remember what has been clustered so --incremental can pick up from here
+watermark = record_full_run(conn, args.backend, args.seed)
+print(f"Edge watermark recorded: rowid {watermark:,}")
+
 conn.close()
 print("\nDONE. Clusters saved to SQLite as: match_clusters")
@@ -1,74 +1,128 @@
+import argparse
 import pandas as pd
 import networkx as nx
+import numpy as np
 import matplotlib.pyplot as plt
 import os
-from db_connect import get_connection
-
-conn = get_connection()
-
-# Load edges
-edges = pd.read_sql_query("""
-SELECT match_id_a, match_id_b, shared_strength
-FROM shared_matches
-""", conn)
-
-# Load clusters
-clusters = pd.read_sql_query("""
-SELECT match_id, cluster_id
-FROM match_clusters
-""", conn)
-
-# Load match strength (cM)
-matches = pd.read_sql_query("""
-SELECT match_id, cm_total
-FROM matches
-""", conn)
-
-conn.close()
-
-print("Building graph...")
-G = nx.Graph()
+from matplotlib.collections import LineCollection
+from scipy import sparse
+from db_connect import connect
+from graph_loader import build_graph, edges_to_csr
+from network_layout import cached_layout, graph_hash, hierarchical_layout
+
+parser = argparse.ArgumentParser(description="Render the FGG shared-match network")
+parser.add_argument("--mode", choices=["full", "large"], default="full",
+                    help="full = spring layout of every node, large = cluster super-nodes then local layouts")
+parser.add_argument("--local-max", type=int, default=500,
+                    help="large mode: clusters bigger than this get a spectral instead of spring layout")
+parser.add_argument("--max-edges", type=int, default=200_000, help="large mode: edges drawn (random sample)")
+parser.add_argument("--no-cache", action="store_true", help="large mode: always recompute the layout")
+args = parser.parse_args()
+
+# Read-only connection: this script never writes to the database
+with connect(read_only=True) as conn:
+    # Load edges
+    edges = pd.read_sql_query("""
+    SELECT match_id_a, match_id_b, shared_strength
+    FROM shared_matches
+    """, conn)
+
+    # Load clusters
+    clusters = pd.read_sql_query("""
+    SELECT match_id, cluster_id
+    FROM match_clusters
+    """, conn)
+
+    # Load match strength (cM)
+    matches = pd.read_sql_query("""
+    SELECT match_id, cm_total
+    FROM matches
+    """, conn)
 
 # Filter weak edges to reduce visual chaos
 EDGE_MIN = 0.50   # increase to 0.60 if still messy
 
-for _, row in edges.iterrows():
-    weight = float(row["shared_strength"])
-    if weight >= EDGE_MIN:
-        G.add_edge(row["match_id_a"], row["match_id_b"], weight=weight)
-
-print("Nodes:", G.number_of_nodes())
-print("Edges:", G.number_of_edges())
-
 # Maps
 cluster_map = dict(zip(clusters.match_id, clusters.cluster_id))
 cm_map = dict(zip(matches.match_id, matches.cm_total))
 
-# Node colors by cluster
-node_colors = [cluster_map.get(node, -1) for node in G.nodes()]
-
-# Node sizes by DNA strength
-node_sizes = []
-for node in G.nodes():
-    cm = cm_map.get(node, 10)
-    node_sizes.append(max(30, min(300, cm * 2.2)))
-
-print("Drawing network...")
-plt.figure(figsize=(18, 12))
-
-# Layout (increase k for more spacing)
-pos = nx.spring_layout(G, k=0.38, seed=870)
-
-nx.draw_networkx_nodes(
-    G,
-    pos,
-    node_size=node_sizes,
-    node_color=node_colors,
-    cmap=plt.cm.tab10,
-    alpha=0.90
-)
+print("Building graph...")
 
-nx.draw_networkx_edges(G, pos, alpha=0.10)
+if args.mode == "full":
+    G = build_graph(edges, min_weight=EDGE_MIN)
+
+    print("Nodes:", G.number_of_nodes())
+    print("Edges:", G.number_of_edges())
+
+    # Node colors by cluster
+    node_colors = [cluster_map.get(node, -1) for node in G.nodes()]
+
+    # Node sizes by DNA strength
+    node_sizes = []
+    for node in G.nodes():
+        cm = cm_map.get(node, 10)
+        node_sizes.append(max(30, min(300, cm * 2.2)))
+
+    print("Drawing network...")
+    plt.figure(figsize=(18, 12))
+
+    # Layout (increase k for more spacing)
+    pos = nx.spring_layout(G, k=0.38, seed=870)
+
+    nx.draw_networkx_nodes(
+        G,
+        pos,
+        node_size=node_sizes,
+        node_color=node_colors,
+        cmap=plt.cm.tab10,
+        alpha=0.90
+    )
+
+    nx.draw_networkx_edges(G, pos, alpha=0.10)
+
+else:
+    # Large-graph mode: CSR adjacency, cluster-then-local layout, cached
+    labels, adj = edges_to_csr(edges, min_weight=EDGE_MIN)
+    keep = np.flatnonzero(adj.getnnz(axis=1) > 0)
+    labels, adj = labels[keep], adj[keep][:, keep]
+
+    cluster_ids = pd.Series(labels).map(cluster_map).fillna(-1).astype(int).to_numpy()
+    communities, _ = pd.factorize(cluster_ids, sort=False)
+
+    print("Nodes:", adj.shape[0])
+    print("Edges:", adj.nnz // 2)
+    print("Clusters:", communities.max() + 1)
+
+    params = {"edge_min": EDGE_MIN, "local_max": args.local_max, "seed": 870}
+    key = graph_hash(labels, adj, communities, **params)
+
+    def compute():
+        print("Computing layout (cluster graph, then local)...")
+        return hierarchical_layout(adj, communities, seed=870, local_max=args.local_max)
+
+    if args.no_cache:
+        xy = compute()
+    else:
+        cache_dir = os.path.join(os.path.dirname(__file__), "..", "visuals", ".layout_cache")
+        xy = cached_layout(cache_dir, key, compute)
+        print(f"Layout key: {key[:12]}")
+
+    cm = pd.Series(labels).map(cm_map).fillna(10).to_numpy(dtype=float)
+    node_sizes = np.clip(cm * 2.2, 30, 300) * min(1.0, 3000 / len(labels))
+
+    print("Drawing network...")
+    plt.figure(figsize=(18, 12))
+    ax = plt.gca()
+
+    # Draw a bounded random sample of edges as one LineCollection
+    upper = sparse.triu(adj, k=1).tocoo()
+    rng = np.random.default_rng(870)
+    pick = rng.permutation(upper.nnz)[:args.max_edges]
+    segs = np.stack([xy[upper.row[pick]], xy[upper.col[pick]]], axis=1)
+    ax.add_collection(LineCollection(segs, colors="k", linewidths=0.3, alpha=0.10))
+
+    ax.scatter(xy[:, 0], xy[:, 1], s=node_sizes, c=cluster_ids, cmap=plt.cm.tab10, alpha=0.90, linewidths=0)
+    ax.autoscale_view()
 
 plt.title("Forensic Genetic Genealogy Network Clusters (Synthetic Case)", fontsize=18)
 plt.axis("off")
@@ -1,28 +1,31 @@
+import argparse
 import os
-import pandas as pd
-from db_connect import get_connection
+from export_runner import DEFAULT_CHUNKSIZE, ExportJob, run_exports
+from extract_io import FORMATS
 
-# Output folder for Tableau-ready CSVs
+parser = argparse.ArgumentParser(description="Export Tableau-ready extracts from the FGG database")
+parser.add_argument("--workers", type=int, default=4, help="concurrent read-only connections")
+parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per streamed chunk")
+parser.add_argument("--format", choices=FORMATS, default="csv", help="csv, or parquet with typed/dictionary-encoded columns")
+args = parser.parse_args()
+
+# Output folder for Tableau-ready extracts
 OUT_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
 os.makedirs(OUT_DIR, exist_ok=True)
 
-conn = get_connection()
-ss
-
-
-# 1) Cluster summary
-cluster_summary = pd.read_sql_query("""
+EXPORTS = [
+    # 1) Cluster summary
+    ExportJob("cluster_summary", """
 SELECT
   cluster_id,
   COUNT(*) AS cluster_size
 FROM match_clusters
 GROUP BY cluster_id
 ORDER BY cluster_size DESC;
-""", conn)
-cluster_summary.to_csv(os.path.join(OUT_DIR, "cluster_summary.csv"), index=False)
+"""),
 
-# 2) Match strength by cluster
-match_strength = pd.read_sql_query("""
+    # 2) Match strength by cluster
+    ExportJob("match_strength_by_cluster", """
 SELECT
   mc.cluster_id,
   m.match_id,
@@ -32,11 +35,10 @@ SELECT
   m.tree_confidence
 FROM match_clusters mc
 JOIN matches m ON m.match_id = mc.match_id;
-""", conn)
-match_strength.to_csv(os.path.join(OUT_DIR, "match_strength_by_cluster.csv"), index=False)
+"""),
 
-# 3) Top surnames per cluster (top 25)
-top_surnames = pd.read_sql_query("""
+    # 3) Top surnames per cluster (top 25)
+    ExportJob("top_surnames_by_cluster", """
 SELECT
   cluster_id,
   last_name,
@@ -64,11 +66,10 @@ FROM (
 )
 WHERE rn <= 25
 ORDER BY cluster_id, surname_count DESC;
-""", conn)
-top_surnames.to_csv(os.path.join(OUT_DIR, "top_surnames_by_cluster.csv"), index=False)
+"""),
 
-# 4) Louisiana geo hotspots by cluster
-la_geo = pd.read_sql_query("""
+    # 4) Louisiana geo hotspots by cluster
+    ExportJob("la_geo_by_cluster", """
 SELECT
   mc.cluster_id,
   pl.state,
@@ -84,28 +85,22 @@ JOIN places pl ON pl.place_id = p.place_id_birth
 WHERE pl.state = 'LA'
 GROUP BY mc.cluster_id, pl.state, pl.parish_or_county, pl.place_name, pl.lat, pl.lon
 ORDER BY mc.cluster_id, people_count DESC;
-""", conn)
-la_geo.to_csv(os.path.join(OUT_DIR, "la_geo_by_cluster.csv"), index=False)
+"""),
 
-# 5) Candidate rankings (from your scoring model)
-candidate_rankings = pd.read_sql_query("""
+    # 5) Candidate rankings (from your scoring model)
+    ExportJob("candidate_rankings", """
 SELECT *
 FROM candidate_rankings
 ORDER BY candidate_score DESC;
-""", conn)
-candidate_rankings.to_csv(os.path.join(OUT_DIR, "candidate_rankings.csv"), index=False)
+"""),
+]
 
-conn.close()
+# Independent exports run concurrently on read-only connections,
+# streamed in chunks and swapped into place atomically
+summary = run_exports(EXPORTS, OUT_DIR, workers=args.workers, chunksize=args.chunksize, fmt=args.format)
 
 print("\n✅ Tableau exports written to:")
 print(os.path.abspath(OUT_DIR))
 print("\nFiles created:")
-for f in [
-    "cluster_summary.csv",
-    "match_strength_by_cluster.csv",
-    "top_surnames_by_cluster.csv",
-    "la_geo_by_cluster.csv",
-    "candidate_rankings.csv",
-]:
-    print(" -", f)
-
+for _, row in summary.iterrows():
+    print(f" - {row['file']} ({row['rows']:,} rows, {row['seconds']}s)")
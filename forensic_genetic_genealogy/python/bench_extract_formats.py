@@ -0,0 +1,91 @@
+"""
+Benchmark: CSV vs Parquet extracts (file size and load time).
+
+Reads match_strength_by_cluster and top_surnames_by_cluster from the
+database, tiles them up to --rows rows (the bundled case is tiny), writes
+each as CSV and as typed, dictionary-encoded Parquet, then times loading
+them back through read_extract().
+
+Usage:
+    python bench_extract_formats.py --rows 2000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from db_connect import connect
+from extract_io import read_extract, write_frame
+
+QUERIES = {
+    "match_strength_by_cluster": """
+SELECT mc.cluster_id, m.match_id, m.cm_total, m.segments, m.longest_segment, m.tree_confidence
+FROM match_clusters mc
+JOIN matches m ON m.match_id = mc.match_id
+""",
+    "top_surnames_by_cluster": """
+SELECT mc.cluster_id, p.last_name, COUNT(*) AS surname_count, AVG(l.confidence_level) AS avg_link_conf
+FROM match_clusters mc
+JOIN match_tree_links l ON l.match_id = mc.match_id
+JOIN persons p ON p.person_id = l.person_id
+WHERE p.last_name IS NOT NULL AND TRIM(p.last_name) <> ''
+GROUP BY mc.cluster_id, p.last_name
+""",
+}
+
+
+def tile(df: pd.DataFrame, rows: int) -> pd.DataFrame:
+    """Repeat df up to `rows` rows; IDs get a copy suffix so they stay distinct."""
+    reps = max(1, int(np.ceil(rows / len(df))))
+    out = pd.concat([df] * reps, ignore_index=True).iloc[:rows].copy()
+    copy_no = np.arange(len(out)) // len(df)
+    if "match_id" in out.columns:
+        out["match_id"] = out["match_id"] + "_" + copy_no.astype(str)
+    out["cluster_id"] = out["cluster_id"] + 10 * (copy_no % 100)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with connect(read_only=True) as conn:
+        base = {stem: pd.read_sql_query(sql, conn) for stem, sql in QUERIES.items()}
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for stem, df in base.items():
+            df = tile(df, args.rows)
+            for fmt in ["csv", "parquet"]:
+                t0 = time.perf_counter()
+                path = write_frame(df, tmp, stem, fmt)
+                write_s = time.perf_counter() - t0
+
+                loads = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    read_extract(stem, tmp, fmt)
+                    loads.append(time.perf_counter() - t0)
+
+                results.append({
+                    "extract": stem,
+                    "format": fmt,
+                    "rows": len(df),
+                    "size_mb": round(os.path.getsize(path) / 1e6, 2),
+                    "write_s": round(write_s, 3),
+                    "load_s": round(min(loads), 3),
+                })
+
+    print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: FGG pipeline scripts with default vs tuned SQLite connections.
+
+Each round copies the database to a temp directory (so the tracked
+bayou_doe.db is never touched). It then runs 01_cluster_engine.py and
+02_candidate_scoring.py as subprocesses with FGG_DB_PATH pointing at the
+copy and FGG_DB_PRAGMAS=default (before) or bulk (after: the tuned
+PRAGMAs plus WAL, which is fine on a throwaway copy). Finally it
+times the read queries of the analysis scripts, once on the old
+per-script connections ("default") and once through a read-only
+ConnectionPool ("tuned").
+
+Usage:
+    python bench_pipeline.py
+    python bench_pipeline.py --db /path/to/large_case.db --rounds 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from db_connect import DEFAULT_DB_PATH, ConnectionPool, TUNED_PRAGMAS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCRIPTS = [
+    ["01_cluster_engine.py"],
+    ["02_candidate_scoring.py"],
+    ["02_candidate_scoring.py", "--engine", "sql"],
+]
+
+READ_QUERIES = [
+    "SELECT match_id_a, match_id_b, shared_strength FROM shared_matches",
+    "SELECT match_id, cluster_id FROM match_clusters",
+    "SELECT match_id, cm_total FROM matches",
+    "SELECT cluster_id, last_name, surname_count FROM v_surnames_by_cluster",
+    "SELECT cluster_id, state, parish_or_county, people_count FROM v_geo_by_cluster WHERE state = 'LA'",
+]
+
+
+def run_scripts(db_copy: str, workdir: str, mode: str) -> dict:
+    env = dict(os.environ, FGG_DB_PATH=db_copy, FGG_DB_PRAGMAS="bulk" if mode == "tuned" else mode,
+               MPLBACKEND="Agg")
+    timings = {}
+    for script in SCRIPTS:
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(HERE, script[0]), *script[1:]],
+                       cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL)
+        timings[" ".join(script)] = time.perf_counter() - t0
+    return timings
+
+
+def read_queries_serial_default(db_copy: str) -> float:
+    t0 = time.perf_counter()
+    for sql in READ_QUERIES:
+        conn = sqlite3.connect(db_copy)
+        pd.read_sql_query(sql, conn)
+        conn.close()
+    return time.perf_counter() - t0
+
+
+def read_queries_pooled(db_copy: str, workers: int) -> float:
+    t0 = time.perf_counter()
+    with ConnectionPool(max_size=workers, read_only=True, pragmas=TUNED_PRAGMAS, db_path=db_copy) as pool:
+        def run(sql):
+            with pool.acquire() as conn:
+                return len(pd.read_sql_query(sql, conn))
+
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            list(ex.map(run, READ_QUERIES))
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--db", default=DEFAULT_DB_PATH)
+    ap.add_argument("--rounds", type=int, default=1)
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # 02 writes its CSV relative to the working directory
+        os.makedirs(os.path.join(tmp, "forensic_genetic_genealogy", "data", "processed"))
+        for r in range(args.rounds):
+            for mode in ["default", "tuned"]:
+                db_copy = os.path.join(tmp, f"bench_{mode}.db")
+                shutil.copyfile(args.db, db_copy)
+                for script, dt in run_scripts(db_copy, tmp, mode).items():
+                    results.append({"round": r, "mode": mode, "step": script, "seconds": dt})
+                if mode == "default":
+                    dt = read_queries_serial_default(db_copy)
+                else:
+                    dt = read_queries_pooled(db_copy, args.workers)
+                results.append({"round": r, "mode": mode, "step": "analysis reads", "seconds": dt})
+
+    df = pd.DataFrame(results)
+    summary = df.groupby(["step", "mode"], sort=False)["seconds"].median().unstack("mode")
+    print(f"\nDatabase: {os.path.abspath(args.db)}  rounds: {args.rounds}\n")
+    print(summary.round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: synthetic shared-match generation, loop vs numpy engine.
+
+Generates one matches table, then builds the shared-match edges with both
+engines of generate_shared_matches(). Prints timings and the summary
+statistics that should agree between the two (edge count, same-cluster
+share, strength / cM / segment distributions, degree spread). The numpy
+engine draws its random numbers in a different order, so the edges are
+not identical; the statistics should agree to within sampling noise.
+
+Usage:
+    python bench_synthetic_edges.py --matches 1000
+    python bench_synthetic_edges.py --matches 1000000 --skip-loop
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+import generate_synthetic_data as gen
+
+
+def edge_stats(edges: pd.DataFrame, matches_df: pd.DataFrame) -> dict:
+    cluster = dict(zip(matches_df["match_id"], gen.match_clusters_from_notes(matches_df)))
+    same = edges["match_id_a"].map(cluster) == edges["match_id_b"].map(cluster)
+    degree = pd.concat([edges["match_id_a"], edges["match_id_b"]]).value_counts()
+    return {
+        "edges": len(edges),
+        "same_cluster_share": same.mean(),
+        "strength_mean": edges["shared_strength"].mean(),
+        "strength_same_mean": edges.loc[same, "shared_strength"].mean(),
+        "strength_cross_mean": edges.loc[~same, "shared_strength"].mean(),
+        "cm_est_mean": edges["shared_cm_est"].mean(),
+        "segments_est_mean": edges["shared_segments_est"].mean(),
+        "degree_mean": degree.mean(),
+        "degree_p90": degree.quantile(0.9),
+        "a_lt_b": (edges["match_id_a"] < edges["match_id_b"]).mean(),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--matches", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=gen.SEED)
+    ap.add_argument("--skip-loop", action="store_true", help="skip the slow per-pair baseline")
+    args = ap.parse_args()
+
+    random.seed(args.seed)
+    matches_df = gen.generate_matches(n_matches=args.matches)
+    print(f"Matches: {len(matches_df):,}\n")
+
+    stats = {}
+    engines = ["numpy"] if args.skip_loop else ["loop", "numpy"]
+    for engine in engines:
+        random.seed(args.seed)
+        t0 = time.perf_counter()
+        edges = gen.generate_shared_matches(matches_df, engine=engine, rng=np.random.default_rng(args.seed))
+        dt = time.perf_counter() - t0
+        print(f"{engine:<8} {dt:9.3f}s  {len(edges):,} edges")
+        stats[engine] = edge_stats(edges, matches_df)
+
+    print()
+    print(pd.DataFrame(stats).round(4).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Bulk loader for the raw FGG CSVs (replaces the sqlite3-shell .import in
+sql/01_load.sql).
+
+- applies sql/00_schema.sql, so columns keep their declared types.
+  .import into the pre-created tables stored the CSV header as a data row
+  and every value as text.
+- skips each CSV's header row, maps empty numeric fields to NULL and
+  streams rows through executemany in large batches, all inside one
+  transaction with journaling and fsync off
+- builds the lookup indexes after the data is in (one sort per index
+  instead of per-row index maintenance), then ANALYZE
+- loads into a temp file next to the target and os.replace()s it into place,
+  so a failed load never leaves a half-built database behind. An existing
+  target is checkpointed and taken out of WAL mode first (SQLite refuses
+  while another connection has it open, and the load stops with "database
+  is locked"), so no -wal / -shm is left to be applied to the new file,
+  and it is held under an exclusive lock during the swap. Stop writers
+  before --replace.
+
+Usage:
+    python bulk_load.py --db /tmp/case.db
+    python bulk_load.py --raw-dir /tmp/fgg_10m --db /tmp/fgg_10m.db --views
+    python bulk_load.py --replace --views      # rebuild bayou_doe.db from data/raw
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+import pandas as pd
+
+from db_connect import BULK_PRAGMAS, DEFAULT_DB_PATH, TUNED_PRAGMAS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SQL_DIR = os.path.join(HERE, "..", "sql")
+RAW_DIR = os.path.join(HERE, "..", "data", "raw")
+SCHEMA_SQL = os.path.join(SQL_DIR, "00_schema.sql")
+VIEW_SCRIPTS = [os.path.join(SQL_DIR, "03_analysis_views.sql"), os.path.join(SQL_DIR, "04_cluster_profiles.sql")]
+
+# load order follows sql/01_load.sql
+RAW_TABLES = ["places", "matches", "shared_matches", "persons", "relationships", "match_tree_links"]
+BATCH_ROWS = 100_000
+
+# Same index names as incremental_clustering.py / scoring.py, so later
+# CREATE INDEX IF NOT EXISTS calls find them already built.
+LOAD_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_shared_matches_a ON shared_matches(match_id_a);
+CREATE INDEX IF NOT EXISTS idx_shared_matches_b ON shared_matches(match_id_b);
+CREATE INDEX IF NOT EXISTS idx_match_tree_links_match ON match_tree_links(match_id);
+CREATE INDEX IF NOT EXISTS idx_persons_place_birth ON persons(place_id_birth);
+"""
+
+
+def apply_schema(conn: sqlite3.Connection) -> None:
+    with open(SCHEMA_SQL, encoding="utf-8") as fh:
+        conn.executescript(fh.read())
+
+
+def create_indexes(conn: sqlite3.Connection) -> None:
+    conn.executescript(LOAD_INDEX_SQL)
+    conn.execute("ANALYZE")
+
+
+def relax_journal(conn: sqlite3.Connection) -> None:
+    """
+    No rollback journal and no fsync for a bulk load. Only safe on a file
+    nobody else has open; undo with restore_journal().
+    """
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA locking_mode = EXCLUSIVE")
+    conn.execute(f"PRAGMA cache_size = {TUNED_PRAGMAS.cache_size}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+
+def restore_journal(conn: sqlite3.Connection) -> None:
+    """Switch the file to the bulk journal settings (WAL) from db_connect."""
+    conn.execute("PRAGMA locking_mode = NORMAL")
+    conn.execute(f"PRAGMA synchronous = {BULK_PRAGMAS.synchronous}")
+    conn.execute(f"PRAGMA journal_mode = {BULK_PRAGMAS.journal_mode}")
+
+
+@contextmanager
+def relaxed_journal(conn: sqlite3.Connection):
+    relax_journal(conn)
+    try:
+        yield conn
+    finally:
+        restore_journal(conn)
+
+
+def lock_for_swap(db_path: str):
+    """
+    Connection holding an EXCLUSIVE lock on the database about to be
+    replaced, or None if there is none. A WAL database is checkpointed and
+    switched to journal_mode=DELETE first, which SQLite refuses
+    (sqlite3.OperationalError: database is locked) while another connection
+    has it open, and which removes its -wal / -shm files.
+    """
+    if not os.path.exists(db_path):
+        return None
+    conn = sqlite3.connect(db_path, timeout=TUNED_PRAGMAS.busy_timeout / 1000, isolation_level=None)
+    try:
+        if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("BEGIN EXCLUSIVE")
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+def _column_types(conn: sqlite3.Connection, table: str):
+    return [(row[1], (row[2] or "").upper()) for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def load_csv(conn: sqlite3.Connection, table: str, path: str, batch_rows: int = BATCH_ROWS) -> int:
+    """
+    Insert one CSV into table, matching columns by header name. Values are
+    bound as text and converted by the column's declared type (REAL /
+    INTEGER affinity); empty fields in numeric columns become NULL.
+    Returns rows inserted.
+    """
+    types = dict(_column_types(conn, table))
+    with open(path, newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        header = next(reader, None)
+        if header is None:
+            return 0
+        unknown = [c for c in header if c not in types]
+        if unknown:
+            raise ValueError(f"{os.path.basename(path)}: columns {unknown} are not in table {table}")
+        numeric = [i for i, c in enumerate(header) if types[c] in ("REAL", "INTEGER")]
+        sql = f"INSERT INTO {table} ({','.join(header)}) VALUES ({','.join('?' * len(header))})"
+
+        def rows():
+            for rec in reader:
+                for i in numeric:
+                    if rec[i] == "":
+                        rec[i] = None
+                yield rec
+
+        it = rows()
+        total = 0
+        while True:
+            batch = list(islice(it, batch_rows))
+            if not batch:
+                break
+            conn.executemany(sql, batch)
+            total += len(batch)
+    return total
+
+
+def load_raw(db_path: str, raw_dir: str = RAW_DIR, replace: bool = False, views: bool = False,
+             batch_rows: int = BATCH_ROWS) -> pd.DataFrame:
+    """
+    Build db_path from the raw CSVs. Returns one row per step with rows,
+    seconds and rows/sec.
+    """
+    db_path = os.path.abspath(db_path)
+    if os.path.exists(db_path) and not replace:
+        raise FileExistsError(f"{db_path} exists; pass replace=True (--replace) to rebuild it")
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(db_path)}.", suffix=".tmp",
+                                    dir=os.path.dirname(db_path))
+    os.close(fd)
+    os.chmod(tmp_path, 0o644)
+    report = []
+    try:
+        conn = sqlite3.connect(tmp_path, isolation_level=None)
+        try:
+            with relaxed_journal(conn):
+                apply_schema(conn)
+                conn.execute("BEGIN")
+                for table in RAW_TABLES:
+                    t0 = time.perf_counter()
+                    n = load_csv(conn, table, os.path.join(raw_dir, f"{table}.csv"), batch_rows)
+                    report.append({"step": table, "rows": n, "seconds": time.perf_counter() - t0})
+                conn.execute("COMMIT")
+
+                t0 = time.perf_counter()
+                create_indexes(conn)
+                if views:
+                    for script in VIEW_SCRIPTS:
+                        with open(script, encoding="utf-8") as fh:
+                            conn.executescript(fh.read())
+                report.append({"step": "indexes + analyze", "rows": None, "seconds": time.perf_counter() - t0})
+        finally:
+            conn.close()
+
+        old = lock_for_swap(db_path)
+        try:
+            os.replace(tmp_path, db_path)
+        finally:
+            if old is not None:
+                old.close()  # rolls back the empty exclusive transaction
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    df = pd.DataFrame(report)
+    df["rows"] = df["rows"].astype("Int64")
+    df["rows_per_sec"] = (df["rows"] / df["seconds"]).round(0).astype("Int64")
+    return df
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Bulk-load the raw FGG CSVs into a typed, indexed SQLite database")
+    ap.add_argument("--raw-dir", default=RAW_DIR, help="folder with the six raw CSVs")
+    ap.add_argument("--db", default=DEFAULT_DB_PATH, help="database to build")
+    ap.add_argument("--replace", action="store_true", help="rebuild --db if it already exists")
+    ap.add_argument("--views", action="store_true", help="also create the views from sql/03 and sql/04")
+    ap.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="rows per executemany call")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    report = load_raw(args.db, args.raw_dir, replace=args.replace, views=args.views, batch_rows=args.batch_rows)
+    total = time.perf_counter() - t0
+    rows = int(report["rows"].sum())
+
+    print(f"\n✅ Loaded {os.path.abspath(args.db)}\n")
+    print(report.assign(seconds=report["seconds"].round(3)).to_string(index=False))
+    print(f"\n{rows:,} rows in {total:.2f}s ({rows / total:,.0f} rows/sec overall)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Pluggable community-detection backends for the cluster engine.
+
+Backends
+- "networkx": python-louvain's best_partition on a networkx Graph
+- "sparse":   Louvain modularity optimization run directly on a
+              scipy.sparse CSR adjacency (see graph_loader.edges_to_csr)
+
+Both take a fixed seed and return one cluster_id per node, renumbered in
+order of first appearance so the labels are stable between runs and
+between backends.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from graph_loader import build_graph, edges_to_csr
+
+DEFAULT_SEED = 870
+BACKENDS = ("networkx", "sparse")
+
+_MIN_GAIN = 0.0000001  # same stopping threshold as python-louvain
+
+
+def canonical_labels(communities: np.ndarray) -> np.ndarray:
+    """Renumber community labels 0..k-1 by first appearance."""
+    codes, _ = pd.factorize(np.asarray(communities), sort=False)
+    return codes
+
+
+# -----------------------------
+# Sparse Louvain
+# -----------------------------
+def _one_level(indptr, indices, data, loops, gdeg, total, node2com, degrees, internals, order, resolution):
+    """Local-moving phase: move nodes to the neighbouring community with the best gain."""
+    two_m = 2.0 * total
+
+    def modularity():
+        q = 0.0
+        for c in set(node2com):
+            q += internals[c] * resolution / total - (degrees[c] / two_m) ** 2
+        return q
+
+    new_mod = modularity()
+    while True:
+        cur_mod = new_mod
+        modified = False
+
+        for node in order:
+            com_node = node2com[node]
+            k_i = gdeg[node]
+            degc_totw = k_i / two_m
+
+            neigh = {}
+            for k in range(indptr[node], indptr[node + 1]):
+                j = indices[k]
+                if j != node:
+                    c = node2com[j]
+                    neigh[c] = neigh.get(c, 0.0) + data[k]
+
+            w_own = neigh.get(com_node, 0.0)
+            remove_cost = -w_own + resolution * (degrees[com_node] - k_i) * degc_totw
+            degrees[com_node] -= k_i
+            internals[com_node] -= w_own + loops[node]
+
+            best_com = com_node
+            best_increase = 0.0
+            for com in sorted(neigh):
+                incr = remove_cost + neigh[com] - resolution * degrees[com] * degc_totw
+                if incr > best_increase:
+                    best_increase = incr
+                    best_com = com
+
+            node2com[node] = best_com
+            degrees[best_com] += k_i
+            internals[best_com] += neigh.get(best_com, 0.0) + loops[node]
+            if best_com != com_node:
+                modified = True
+
+        new_mod = modularity()
+        if not modified or new_mod - cur_mod < _MIN_GAIN:
+            return new_mod
+
+
+def _level(adj: sparse.csr_matrix, rng: np.random.RandomState, resolution: float):
+    """Run one Louvain level on adj; returns (communities, modularity)."""
+    n = adj.shape[0]
+    loops = adj.diagonal()
+    gdeg = np.asarray(adj.sum(axis=1)).ravel() + loops
+    total = gdeg.sum() / 2.0
+
+    # every node starts alone in its own community
+    node2com = list(range(n))
+    degrees = gdeg.tolist()
+    internals = loops.tolist()
+    order = rng.permutation(n).tolist()
+
+    mod = _one_level(
+        adj.indptr.tolist(), adj.indices.tolist(), adj.data.tolist(),
+        loops.tolist(), gdeg.tolist(), total,
+        node2com, degrees, internals, order, resolution,
+    )
+    return canonical_labels(node2com), mod
+
+
+def _induced(adj: sparse.csr_matrix, communities: np.ndarray) -> sparse.csr_matrix:
+    """Collapse each community to one node: A' = P^T A P, self-loops stored once."""
+    n, k = adj.shape[0], communities.max() + 1
+    P = sparse.csr_matrix((np.ones(n), (np.arange(n), communities)), shape=(n, k))
+    out = (P.T @ adj @ P).tolil()
+    # diag(P^T A P) counts internal edges twice but member self-loops once
+    member_loops = P.T @ adj.diagonal()
+    out.setdiag((out.diagonal() + member_loops) / 2.0)
+    return out.tocsr()
+
+
+def louvain_sparse(adj: sparse.csr_matrix, seed: int = DEFAULT_SEED, resolution: float = 1.0) -> np.ndarray:
+    """
+    Louvain on a symmetric CSR adjacency (self-loops on the diagonal once).
+
+    Returns an int array: community of each row of adj.
+    """
+    n = adj.shape[0]
+    if adj.nnz == 0:
+        return np.arange(n)
+
+    rng = np.random.RandomState(seed)
+    adj = sparse.csr_matrix(adj, dtype=float)
+    membership = np.arange(n)
+
+    communities, mod = _level(adj, rng, resolution)
+    membership = communities[membership]
+    adj = _induced(adj, communities)
+
+    while True:
+        communities, new_mod = _level(adj, rng, resolution)
+        if new_mod - mod < _MIN_GAIN:
+            break
+        membership = communities[membership]
+        mod = new_mod
+        adj = _induced(adj, communities)
+
+    return canonical_labels(membership)
+
+
+# -----------------------------
+# Entry point used by 01_cluster_engine.py
+# -----------------------------
+def cluster_edges(edges: pd.DataFrame, backend: str = "networkx", seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """
+    Cluster the shared-match edge list.
+
+    Returns a DataFrame with match_id and cluster_id, one row per node,
+    in first-appearance order.
+    """
+    if backend == "networkx":
+        from community import community_louvain
+
+        G = build_graph(edges)
+        print("Nodes:", G.number_of_nodes())
+        print("Edges:", G.number_of_edges())
+        partition = community_louvain.best_partition(G, weight="weight", random_state=seed)
+        match_ids = list(partition.keys())
+        communities = np.fromiter(partition.values(), dtype=int, count=len(partition))
+    elif backend == "sparse":
+        labels, adj = edges_to_csr(edges)
+        print("Nodes:", adj.shape[0])
+        print("Edges:", (adj.nnz + adj.diagonal().astype(bool).sum()) // 2)
+        match_ids = labels
+        communities = louvain_sparse(adj, seed=seed)
+    else:
+        raise ValueError(f"Unknown clustering backend {backend!r}; expected one of {BACKENDS}")
+
+    return pd.DataFrame({"match_id": match_ids, "cluster_id": canonical_labels(communities)})
@@ -1,11 +1,193 @@
 import os
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Optional
 
-def get_connection():
+DEFAULT_DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bayou_doe.db"))
+
+
+@dataclass(frozen=True)
+class PragmaConfig:
+    """
+    Connection PRAGMAs. None leaves SQLite's default in place.
+
+    journal_mode is persistent in the file, so it is left alone (None) by
+    default: an ordinary connection must not rewrite the header of the
+    tracked bayou_doe.db or leave -wal/-shm files next to it. Bulk/ETL
+    callers that own their file opt in with BULK_PRAGMAS. It is only applied
+    on read-write connections; read-only ones inherit the file's mode.
+    """
+    journal_mode: Optional[str] = None
+    synchronous: Optional[str] = "NORMAL"
+    cache_size: Optional[int] = -65536      # negative = KiB, i.e. 64 MiB page cache
+    mmap_size: Optional[int] = 268435456    # 256 MiB memory-mapped I/O
+    busy_timeout: Optional[int] = 5000      # ms to wait on a locked database
+    temp_store: Optional[str] = "MEMORY"
+
+
+TUNED_PRAGMAS = PragmaConfig()
+BULK_PRAGMAS = replace(TUNED_PRAGMAS, journal_mode="WAL")
+SQLITE_DEFAULTS = PragmaConfig(None, None, None, None, None, None)
+
+_announced = set()
+
+
+def _db_path(db_path: Optional[str] = None) -> str:
+    return os.path.abspath(db_path or os.environ.get("FGG_DB_PATH") or DEFAULT_DB_PATH)
+
+
+def _default_pragmas() -> PragmaConfig:
+    # FGG_DB_PRAGMAS=default turns tuning off, =bulk adds WAL (used by bench_pipeline.py on copies)
+    mode = os.environ.get("FGG_DB_PRAGMAS")
+    if mode == "default":
+        return SQLITE_DEFAULTS
+    return BULK_PRAGMAS if mode == "bulk" else TUNED_PRAGMAS
+
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: PragmaConfig, read_only: bool = False) -> None:
+    if pragmas.busy_timeout is not None:
+        conn.execute(f"PRAGMA busy_timeout = {int(pragmas.busy_timeout)}")
+    if pragmas.journal_mode is not None and not read_only:
+        conn.execute(f"PRAGMA journal_mode = {pragmas.journal_mode}")
+    if pragmas.synchronous is not None and not read_only:
+        conn.execute(f"PRAGMA synchronous = {pragmas.synchronous}")
+    if pragmas.cache_size is not None:
+        conn.execute(f"PRAGMA cache_size = {int(pragmas.cache_size)}")
+    if pragmas.mmap_size is not None:
+        conn.execute(f"PRAGMA mmap_size = {int(pragmas.mmap_size)}")
+    if pragmas.temp_store is not None:
+        conn.execute(f"PRAGMA temp_store = {pragmas.temp_store}")
+
+
+def get_connection(read_only: bool = False, pragmas: Optional[PragmaConfig] = None,
+                   db_path: Optional[str] = None, check_same_thread: bool = True) -> sqlite3.Connection:
     """
     Returns a consistent SQLite connection for the FGG project.
-    Ensures all scripts point to the same database location.
+    Ensures all scripts point to the same database location
+    (override with FGG_DB_PATH).
+
+    read_only=True opens a mode=ro URI connection for the analysis scripts.
     """
-    db_path = os.path.join(os.path.dirname(__file__), "..", "bayou_doe.db")
-    print(f"Connecting to DB: {os.path.abspath(db_path)}")
-    return sqlite3.connect(db_path)
+    path = _db_path(db_path)
+    if path not in _announced:
+        print(f"Connecting to DB: {path}")
+        _announced.add(path)
+
+    if read_only:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=check_same_thread)
+    else:
+        conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+    apply_pragmas(conn, pragmas or _default_pragmas(), read_only)
+    return conn
+
+
+@contextmanager
+def connect(read_only: bool = False, pragmas: Optional[PragmaConfig] = None, db_path: Optional[str] = None):
+    """
+    Context-managed connection: commits on success, rolls back on error,
+    always closes.
+    """
+    conn = get_connection(read_only=read_only, pragmas=pragmas, db_path=db_path)
+    try:
+        yield conn
+        if not read_only:
+            conn.commit()
+    except Exception:
+        if not read_only:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# put on the idle queue by close() to wake acquire() calls still waiting
+_POOL_CLOSED = object()
+
+
+class ConnectionPool:
+    """
+    Small thread-safe pool. Connections are opened lazily up to max_size;
+    acquire() blocks until one is free, so concurrent workers never hold more
+    than max_size handles on the database file. close() closes the idle
+    connections; ones still in use are closed when they are returned.
+    """
+
+    def __init__(self, max_size: int = 4, read_only: bool = True,
+                 pragmas: Optional[PragmaConfig] = None, db_path: Optional[str] = None):
+        self.max_size = max_size
+        self.read_only = read_only
+        self.pragmas = pragmas
+        self.db_path = db_path
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        return get_connection(read_only=self.read_only, pragmas=self.pragmas,
+                              db_path=self.db_path, check_same_thread=False)
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        conn = None
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ConnectionPool is closed")
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                if self._opened < self.max_size:
+                    self._opened += 1
+                    try:
+                        conn = self._open()
+                    except Exception:
+                        self._opened -= 1
+                        raise
+        if conn is None:
+            conn = self._idle.get(timeout=timeout)
+            if conn is _POOL_CLOSED:
+                self._idle.put(conn)  # for the next waiter
+                raise RuntimeError("ConnectionPool is closed")
+        try:
+            yield conn
+            if not self.read_only:
+                conn.commit()
+        except Exception:
+            if not self.read_only:
+                conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle.put(conn)
+                return
+            self._opened -= 1
+        conn.close()  # returned after close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            idle = []
+            while True:
+                try:
+                    idle.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+            self._opened -= len(idle)
+            self._idle.put(_POOL_CLOSED)
+        for conn in idle:
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
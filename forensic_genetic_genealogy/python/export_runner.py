@@ -0,0 +1,114 @@
+"""
+Concurrent, bounded-memory export runner for the Tableau extracts.
+
+Each export is an independent SQL query. The runner:
+- runs exports concurrently on read-only connections from a ConnectionPool
+- streams each result to disk in chunks (pd.read_sql_query chunksize),
+  so no export is ever held in memory whole
+- writes to a temp file in the output folder and os.replace()s it into
+  place, so Tableau never picks up a half-written extract
+
+Output is CSV or Parquet (see extract_io.py for the Parquet schemas).
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import pandas as pd
+
+from db_connect import ConnectionPool
+from extract_io import FORMATS, extract_path, extract_schemas, pq, require_pyarrow, to_arrow
+
+DEFAULT_CHUNKSIZE = 50_000
+
+
+@dataclass(frozen=True)
+class ExportJob:
+    stem: str  # file name without extension
+    sql: str
+
+
+def atomic_path(final_path: str) -> str:
+    """Temp file next to final_path (same filesystem, so os.replace is atomic)."""
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(final_path)}.", suffix=".tmp", dir=os.path.dirname(final_path)
+    )
+    os.close(fd)
+    os.chmod(tmp_path, 0o644)  # mkstemp creates 0600; extracts must stay readable
+    return tmp_path
+
+
+def stream_query_to_csv(conn, sql: str, final_path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> int:
+    """Write a query result to CSV chunk by chunk, atomically. Returns rows written."""
+    tmp_path = atomic_path(final_path)
+    rows = 0
+    try:
+        with open(tmp_path, "w", newline="", encoding="utf-8") as fh:
+            wrote_header = False
+            for chunk in pd.read_sql_query(sql, conn, chunksize=chunksize):
+                chunk.to_csv(fh, index=False, header=not wrote_header)
+                wrote_header = True
+                rows += len(chunk)
+            if not wrote_header:
+                # empty result: still emit the header row
+                cur = conn.execute(f"SELECT * FROM ({sql.strip().rstrip(';')}) LIMIT 0")
+                fh.write(",".join(d[0] for d in cur.description) + "\n")
+        os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return rows
+
+
+def stream_query_to_parquet(conn, sql: str, final_path: str, schema, chunksize: int = DEFAULT_CHUNKSIZE) -> int:
+    """Write a query result to Parquet, one row group per chunk, atomically. Returns rows written."""
+    require_pyarrow()
+    tmp_path = atomic_path(final_path)
+    rows = 0
+    try:
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for chunk in pd.read_sql_query(sql, conn, chunksize=chunksize):
+                writer.write_table(to_arrow(chunk, schema))
+                rows += len(chunk)
+        os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return rows
+
+
+def run_exports(jobs, out_dir: str, workers: int = 4, chunksize: int = DEFAULT_CHUNKSIZE,
+                db_path: str | None = None, fmt: str = "csv") -> pd.DataFrame:
+    """
+    Run every ExportJob concurrently. Returns one row per file with the
+    row count and seconds taken. Raises the first export error after all
+    workers finish.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {FORMATS}")
+    os.makedirs(out_dir, exist_ok=True)
+    schemas = extract_schemas() if fmt == "parquet" else {}
+
+    with ConnectionPool(max_size=workers, read_only=True, db_path=db_path) as pool:
+        def run(job: ExportJob):
+            t0 = time.perf_counter()
+            path = extract_path(out_dir, job.stem, fmt)
+            with pool.acquire() as conn:
+                if fmt == "parquet":
+                    rows = stream_query_to_parquet(conn, job.sql, path, schemas[job.stem], chunksize)
+                else:
+                    rows = stream_query_to_csv(conn, job.sql, path, chunksize)
+            return {"file": os.path.basename(path), "rows": rows, "seconds": round(time.perf_counter() - t0, 3)}
+
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(run, job) for job in jobs]
+            results = [f.result() for f in futures]
+
+    return pd.DataFrame(results)
@@ -0,0 +1,145 @@
+"""
+Columnar (Parquet) extracts alongside the CSVs, plus a matching reader.
+
+Every extract has an explicit Arrow schema. Low-cardinality text columns
+(last_name, state, parish_or_county, place_name) are dictionary-encoded.
+The list of categorical columns (including cluster_id) is stored in the
+schema metadata, so read_extract() hands them back as pandas categoricals
+whichever format is on disk.
+
+pyarrow is optional: CSV output works without it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+FORMATS = ("csv", "parquet")
+CATEGORICAL_COLUMNS = {"cluster_id", "last_name", "state", "parish_or_county", "place_name"}
+_META_KEY = b"fgg.categoricals"
+
+
+def require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("Parquet extracts need pyarrow: pip install pyarrow")
+
+
+def _schema(columns):
+    """Build an Arrow schema from (name, type) pairs; text categoricals become dictionary<int32, string>."""
+    fields = []
+    for name, typ in columns:
+        if name in CATEGORICAL_COLUMNS and pa.types.is_string(typ):
+            typ = pa.dictionary(pa.int32(), pa.string())
+        fields.append(pa.field(name, typ))
+    cats = sorted(n for n, _ in columns if n in CATEGORICAL_COLUMNS)
+    return pa.schema(fields, metadata={_META_KEY: json.dumps(cats).encode()})
+
+
+def extract_schemas() -> dict:
+    """Explicit schemas for every Tableau extract, keyed by file stem."""
+    require_pyarrow()
+    return {
+        "cluster_summary": _schema([
+            ("cluster_id", pa.int64()),
+            ("cluster_size", pa.int64()),
+        ]),
+        "match_strength_by_cluster": _schema([
+            ("cluster_id", pa.int64()),
+            ("match_id", pa.string()),
+            ("cm_total", pa.float64()),
+            ("segments", pa.int32()),
+            ("longest_segment", pa.float64()),
+            ("tree_confidence", pa.float64()),
+        ]),
+        "top_surnames_by_cluster": _schema([
+            ("cluster_id", pa.int64()),
+            ("last_name", pa.string()),
+            ("surname_count", pa.int64()),
+            ("avg_link_conf", pa.float64()),
+        ]),
+        "la_geo_by_cluster": _schema([
+            ("cluster_id", pa.int64()),
+            ("state", pa.string()),
+            ("parish_or_county", pa.string()),
+            ("place_name", pa.string()),
+            ("lat", pa.float64()),
+            ("lon", pa.float64()),
+            ("people_count", pa.int64()),
+        ]),
+        "candidate_rankings": _schema([
+            ("cluster_id", pa.int64()),
+            ("avg_cm", pa.float64()),
+            ("tree_conf_avg", pa.float64()),
+            ("cluster_size", pa.int64()),
+            ("surname_signal", pa.int64()),
+            ("geo_signal", pa.int64()),
+            ("candidate_score", pa.float64()),
+        ]),
+    }
+
+
+def to_arrow(df: pd.DataFrame, schema) -> "pa.Table":
+    """Convert a DataFrame chunk to a Table with exactly this schema."""
+    arrays = []
+    for field in schema:
+        col = df[field.name]
+        if pa.types.is_dictionary(field.type):
+            arr = pa.array(col, type=field.type.value_type, from_pandas=True).dictionary_encode()
+        else:
+            arr = pa.array(col, type=field.type, from_pandas=True)
+        arrays.append(arr)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def extract_path(out_dir: str, stem: str, fmt: str) -> str:
+    return os.path.join(out_dir, f"{stem}.{fmt}")
+
+
+def write_frame(df: pd.DataFrame, out_dir: str, stem: str, fmt: str = "csv") -> str:
+    """Write a whole DataFrame as one extract; returns the path written."""
+    path = extract_path(out_dir, stem, fmt)
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        require_pyarrow()
+        pq.write_table(to_arrow(df, extract_schemas()[stem]), path)
+    else:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {FORMATS}")
+    return path
+
+
+def read_extract(stem: str, out_dir: str, fmt: str | None = None) -> pd.DataFrame:
+    """
+    Load an extract for downstream scripts. With fmt=None, prefers the
+    Parquet file when it exists and falls back to the CSV.
+    """
+    if fmt is None:
+        fmt = "parquet" if pa is not None and os.path.exists(extract_path(out_dir, stem, "parquet")) else "csv"
+    path = extract_path(out_dir, stem, fmt)
+
+    if fmt == "parquet":
+        require_pyarrow()
+        table = pq.read_table(path)
+        meta = table.schema.metadata or {}
+        cats = json.loads(meta.get(_META_KEY, b"[]"))
+        df = table.to_pandas()
+    elif fmt == "csv":
+        df = pd.read_csv(path)
+        cats = [c for c in df.columns if c in CATEGORICAL_COLUMNS]
+    else:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {FORMATS}")
+
+    for c in cats:
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+    return df
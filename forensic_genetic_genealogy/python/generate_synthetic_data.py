@@ -8,12 +8,22 @@ Creates CSVs in forensic_genetic_genealogy/data/raw:
 - persons.csv
 - relationships.csv
 - match_tree_links.csv
+
+The default run rebuilds the Bayou Doe case exactly. --stream switches to a
+vectorized generator that appends fixed-size chunks to the CSVs (or to a new
+SQLite database), so memory stays flat at any scale:
+
+    python generate_synthetic_data.py
+    python generate_synthetic_data.py --stream --edges 10000000 --clusters 12 --out-dir /tmp/fgg_10m
+    python generate_synthetic_data.py --stream --matches 200000 --format sqlite --db /tmp/fgg_200k.db
 """
 
 from __future__ import annotations
-import os, random
+import argparse, os, random, sqlite3
 import pandas as pd
 
+import bulk_load
+
 try:
     import numpy as np
 except ImportError:
@@ -55,6 +65,13 @@ LAST_NAMES = [
 FIRST_NAMES_F = ["Marie","Ella","Rose","Clara","Louise","Josephine","Ruby","Pearl","Hazel","Evelyn"]
 FIRST_NAMES_M = ["Joseph","Henry","Walter","James","John","Pierre","Louis","Arthur","George","Thomas"]
 
+CLUSTER_SURNAMES = {
+    "C1": ["Landry","Hebert","Guidry","Thibodeaux","Boudreaux"],
+    "C2": ["Fontenot","Broussard","Doucet","Trahan","Comeaux"],
+    "C3": ["LeBlanc","Richard","Gautreaux","Babin","Broussard"],
+    "C4": ["Bell","Johnson","Williams","Brown","Miller"],
+}
+
 def clamp(x: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, x))
 
@@ -87,12 +104,17 @@ def ensure_dir(p: str) -> None:
 def make_places():
     return pd.DataFrame(PLACE_POOL, columns=["place_id","place_name","parish_or_county","state","country","lat","lon"])
 
+def cluster_weights(n_clusters: int):
+    # 1.0, 0.9, 0.8, 0.7 for the original four clusters, then 0.6, 0.5, 0.4 and flat at 0.3 from the 8th on
+    return [max(round(1.0 - 0.1 * i, 2), 0.3) for i in range(n_clusters)]
+
 def generate_matches(n_matches=260, n_clusters=4):
     clusters = [{"cluster_id": f"C{i+1}", "cluster_strength": random.uniform(0.55, 0.95)} for i in range(n_clusters)]
+    weights = cluster_weights(n_clusters)
     rows = []
     for i in range(n_matches):
         match_id = f"M{i+1:04d}"
-        c = random.choices(clusters, weights=[1.0, 0.9, 0.8, 0.7][:n_clusters], k=1)[0]
+        c = random.choices(clusters, weights=weights, k=1)[0]
         cm = sample_cm(c["cluster_strength"])
         lo, hi = relationship_range_from_cm(cm)
         tree_size = int(clamp(round(random.gauss(120, 90)), 0, 600))
@@ -115,7 +137,22 @@ def generate_matches(n_matches=260, n_clusters=4):
     df.loc[df["cm_total"].nlargest(3).index, "notes"] += " | anchor"
     return df
 
-def generate_shared_matches(matches_df: pd.DataFrame):
+SHARED_ENGINES = ("loop", "numpy")
+
+def match_clusters_from_notes(matches_df: pd.DataFrame) -> pd.Series:
+    return matches_df["notes"].str.split("cluster=").str[-1].str.split("|").str[0].str.strip()
+
+def generate_shared_matches(matches_df: pd.DataFrame, engine: str = "loop", rng=None):
+    """
+    engine="loop" is the original one-pair-at-a-time sampler (reproduces the
+    committed Bayou Doe CSVs). engine="numpy" draws from the same model in
+    batches and is what large synthetic cases should use.
+    """
+    if engine == "numpy":
+        return generate_shared_matches_np(matches_df, rng=rng)
+    if engine != "loop":
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {SHARED_ENGINES}")
+
     match_ids = matches_df["match_id"].tolist()
     cluster_map = {r["match_id"]: r["notes"].split("cluster=")[-1].split("|")[0].strip() for _, r in matches_df.iterrows()}
 
@@ -152,6 +189,118 @@ def generate_shared_matches(matches_df: pd.DataFrame):
 
     return pd.DataFrame(list(edges.values()))
 
+SHARED_COLUMNS = ["match_id_a", "match_id_b", "shared_strength", "shared_cm_est", "shared_segments_est"]
+
+def _pairs_before(i, n: int):
+    # number of unordered pairs (lo, hi) with lo < i, for lo < hi < n
+    return i * (n - 1) - i * (i - 1) // 2
+
+def _pair_from_index(u, n: int):
+    """Invert the pair numbering: pair index u -> (lo, hi)."""
+    b = 2 * n - 1
+    lo = np.floor((b - np.sqrt(b * b - 8.0 * u)) / 2).astype(np.int64)
+    lo = np.clip(lo, 0, n - 2)
+    # float sqrt can land one off near a boundary
+    lo += _pairs_before(lo + 1, n) <= u
+    lo -= _pairs_before(lo, n) > u
+    return lo, lo + 1 + (u - _pairs_before(lo, n))
+
+def _quota(weights, total: int):
+    # split total across chunks in proportion to weights, summing exactly
+    cum = np.round(np.cumsum(weights, dtype=float) / np.sum(weights, dtype=float) * total).astype(np.int64)
+    return np.diff(cum, prepend=0)
+
+def _accept_prob(cm_a, cm_b, same):
+    boost = np.clip((cm_a + cm_b) / 600.0, 0.0, 0.55)
+    return np.clip(np.where(same, 0.16, 0.02) + boost * np.where(same, 0.12, 0.04), 0, 0.45)
+
+def iter_shared_matches(cm, cluster, rng, n_chunks: int = 1, order=None):
+    """
+    Vectorized version of the rejection sampler in generate_shared_matches:
+    target = 7.5 edges per match, at most 12 candidate draws per target edge,
+    duplicate pairs skipped, first accepted draw of a pair wins.
+
+    Every unordered pair has an index in [0, n(n-1)/2), numbered by its lower
+    rank. The index range is cut into n_chunks slices of equal pair mass, and
+    each slice gets its share of the draws and of the edge target. Drawing a
+    uniform pair index is exactly random.sample(ids, 2). Pairs in different
+    slices never collide, so duplicates are dropped per slice on the pair
+    index (pandas hash table) and memory stays bounded by one slice.
+
+    cm and cluster are per-match arrays (cluster as integer codes). order
+    maps rank -> row position; None means rows are already in ID order.
+    Yields (a, b, strength, cm_est, segments_est) arrays, with a before b in
+    ID order.
+    """
+    n = len(cm)
+    target_edges = int(n * 7.5)
+    attempts = target_edges * 12
+    if n < 2 or target_edges == 0:
+        return
+
+    total = _pairs_before(n - 1, n)
+    cuts = np.linspace(0, total, n_chunks + 1).round().astype(np.int64)
+    lo_cut = np.unique(np.append(_pair_from_index(cuts[:-1], n)[0], n - 1))
+    starts = _pairs_before(lo_cut, n)
+    mass = np.diff(starts)
+    draws, quotas = _quota(mass, attempts), _quota(mass, target_edges)
+
+    for start, stop, size, quota in zip(starts[:-1], starts[1:], draws, quotas):
+        if size == 0:
+            continue
+        u = rng.integers(start, stop, size)
+        a, b = _pair_from_index(u, n)
+        if order is not None:
+            a, b = order[a], order[b]
+
+        same = cluster[a] == cluster[b]
+        hit = rng.random(size) <= _accept_prob(cm[a], cm[b], same)
+
+        first = np.flatnonzero(~pd.Index(u[hit]).duplicated(keep="first"))[:quota]
+        a, b, same = a[hit][first], b[hit][first], same[hit][first]
+        m = len(a)
+
+        base = np.where(same, rng.uniform(0.35, 0.95, m), rng.uniform(0.20, 0.55, m))
+        sim = 1.0 - np.abs(cm[a] - cm[b]) / np.maximum(np.maximum(cm[a], cm[b]), 1.0)
+        strength = np.clip(base * (0.75 + 0.25 * sim), 0, 1)
+        cm_est = np.clip(rng.uniform(10, 80, m) * strength, 0, 120)
+        seg_est = np.clip(np.rint(rng.uniform(1, 10, m) * strength), 0, 20).astype(np.int64)
+        yield a, b, strength, cm_est, seg_est
+
+def shared_frame(ids_a, ids_b, strength, cm_est, seg_est) -> pd.DataFrame:
+    return pd.DataFrame({
+        "match_id_a": ids_a,
+        "match_id_b": ids_b,
+        "shared_strength": strength.round(3),
+        "shared_cm_est": cm_est.round(1),
+        "shared_segments_est": seg_est,
+    }, columns=SHARED_COLUMNS)
+
+def generate_shared_matches_np(matches_df: pd.DataFrame, rng=None, batch_size: int = 1 << 21):
+    """
+    Same model as the loop, built with iter_shared_matches() in slices of
+    about batch_size candidate draws. Match IDs are interned to row
+    positions, so cM and cluster lookups are array indexing.
+    """
+    if np is None:
+        raise ImportError("The numpy engine needs numpy: pip install numpy")
+    if rng is None:
+        rng = np.random.default_rng(SEED)
+
+    ids = matches_df["match_id"].to_numpy(dtype=object)
+    cm = matches_df["cm_total"].to_numpy(dtype=float)
+    cluster, _ = pd.factorize(match_clusters_from_notes(matches_df))
+    # rank -> position in match_id string order, so a < b like the loop
+    order = np.argsort(ids, kind="stable")
+
+    attempts = int(len(ids) * 7.5) * 12
+    n_chunks = max(1, -(-attempts // batch_size))
+    frames = [shared_frame(ids[a], ids[b], s, c, g)
+              for a, b, s, c, g in iter_shared_matches(cm, cluster, rng, n_chunks, order)]
+    if not frames:
+        return pd.DataFrame(columns=SHARED_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
 def generate_persons_relationships_links(matches_df: pd.DataFrame):
     persons, rels, links = [], [], []
     person_counter = 1
@@ -159,20 +308,13 @@ def generate_persons_relationships_links(matches_df: pd.DataFrame):
     la_ids = [p[0] for p in LA_PLACES]
     near_ids = [p[0] for p in NEARBY_PLACES]
 
-    cluster_surnames = {
-        "C1": ["Landry","Hebert","Guidry","Thibodeaux","Boudreaux"],
-        "C2": ["Fontenot","Broussard","Doucet","Trahan","Comeaux"],
-        "C3": ["LeBlanc","Richard","Gautreaux","Babin","Broussard"],
-        "C4": ["Bell","Johnson","Williams","Brown","Miller"],
-    }
-
     for _, m in matches_df.iterrows():
         if random.random() < 0.12 or int(m["tree_size"]) == 0:
             continue
 
         match_id = m["match_id"]
         cluster = m["notes"].split("cluster=")[-1].split("|")[0].strip()
-        surname_pool = cluster_surnames.get(cluster, LAST_NAMES)
+        surname_pool = CLUSTER_SURNAMES.get(cluster, LAST_NAMES)
 
         n_people = random.randint(2, 8)
         created = []
@@ -223,29 +365,265 @@ def generate_persons_relationships_links(matches_df: pd.DataFrame):
         pd.DataFrame(links),
     )
 
-def main():
+# ---------------------------------------------------------------------------
+# Streaming mode: vectorized, fixed-size chunks appended straight to the output
+# ---------------------------------------------------------------------------
+
+TABLE_COLUMNS = {
+    "places": ["place_id","place_name","parish_or_county","state","country","lat","lon"],
+    "matches": ["match_id","kit_id","cm_total","segments","longest_segment","predicted_range_low",
+                "predicted_range_high","maternal_paternal_hint","tree_size","tree_confidence","notes"],
+    "shared_matches": SHARED_COLUMNS,
+    "persons": ["person_id","first_name","last_name","birth_year","death_year","sex",
+                "birth_place","death_place","place_id_birth","place_id_death"],
+    "relationships": ["child_person_id","parent_person_id","relationship_type"],
+    "match_tree_links": ["match_id","person_id","confidence_level"],
+}
+
+class CsvSink:
+    """Appends chunks to <out_dir>/<table>.csv; the first chunk truncates and writes the header."""
+    def __init__(self, out_dir: str):
+        ensure_dir(out_dir)
+        self.out_dir = out_dir
+        self.rows = {}
+
+    def write(self, table: str, df: pd.DataFrame) -> None:
+        first = table not in self.rows
+        df.reindex(columns=TABLE_COLUMNS[table]).to_csv(
+            os.path.join(self.out_dir, f"{table}.csv"), mode="w" if first else "a", header=first, index=False)
+        self.rows[table] = self.rows.get(table, 0) + len(df)
+
+    def close(self) -> None:
+        for table, cols in TABLE_COLUMNS.items():
+            if table not in self.rows:
+                self.write(table, pd.DataFrame(columns=cols))
+
+class SqliteSink:
+    """
+    Inserts chunks into a new SQLite file created from sql/00_schema.sql,
+    with bulk_load.py's relaxed journaling during the run and its indexes
+    built at close().
+    """
+    def __init__(self, db_path: str):
+        if os.path.exists(db_path):
+            raise FileExistsError(f"{db_path} already exists; pick a new path")
+        ensure_dir(os.path.dirname(os.path.abspath(db_path)))
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+        bulk_load.relax_journal(self.conn)
+        bulk_load.apply_schema(self.conn)
+        self.rows = {}
+
+    def write(self, table: str, df: pd.DataFrame) -> None:
+        cols = TABLE_COLUMNS[table]
+        sql = f"INSERT INTO {table} ({','.join(cols)}) VALUES ({','.join('?' * len(cols))})"
+        self.conn.execute("BEGIN")
+        self.conn.executemany(sql, df.reindex(columns=cols).itertuples(index=False, name=None))
+        self.conn.execute("COMMIT")
+        self.rows[table] = self.rows.get(table, 0) + len(df)
+
+    def close(self) -> None:
+        for table in TABLE_COLUMNS:
+            self.rows.setdefault(table, 0)
+        bulk_load.create_indexes(self.conn)
+        bulk_load.restore_journal(self.conn)
+        self.conn.close()
+
+def match_ids(pos, width: int):
+    return ("M" + pd.Series(pos + 1).astype(str).str.zfill(width)).to_numpy(dtype=object)
+
+def _sample_cm_np(rng, cluster_strength):
+    n = len(cluster_strength)
+    r = rng.random(n)
+    base = np.where(r < 0.08, rng.uniform(120, 260, n), np.where(r < 0.30, rng.uniform(45, 120, n), rng.uniform(8, 55, n)))
+    return (base * (1.0 + cluster_strength * 0.15)).round(1)
+
+def _matches_chunk(rng, start: int, stop: int, cluster, cm, anchors, width: int) -> pd.DataFrame:
+    m = stop - start
+    c = cm[start:stop]
+    tree_size = np.clip(np.rint(rng.normal(120, 90, m)), 0, 600).astype(np.int64)
+    bands = [c >= 200, c >= 100, c >= 60, c >= 30, c >= 15]
+    notes = "synthetic cluster=C" + pd.Series(cluster[start:stop] + 1).astype(str)
+    notes[np.isin(np.arange(start, stop), anchors)] += " | anchor"
+    return pd.DataFrame({
+        "match_id": match_ids(np.arange(start, stop), width),
+        "kit_id": KIT_ID,
+        "cm_total": c,
+        "segments": np.clip(np.rint(c / 12 + rng.uniform(0, 4, m)), 1, 40).astype(np.int64),
+        "longest_segment": np.clip(c * rng.uniform(0.20, 0.55, m), 5, 120).round(1),
+        "predicted_range_low": np.select(bands, [2, 3, 3, 4, 5], 6),
+        "predicted_range_high": np.select(bands, [3, 4, 5, 6, 7], 8),
+        "maternal_paternal_hint": np.array(["maternal","paternal","unknown"], dtype=object)[rng.choice(3, m, p=[0.12, 0.12, 0.76])],
+        "tree_size": tree_size,
+        "tree_confidence": np.clip(rng.uniform(0.35, 0.95, m) * (0.7 + tree_size / 1200), 0.25, 0.98).round(2),
+        "notes": notes.to_numpy(dtype=object),
+    })
+
+def _surname_table(n_clusters: int):
+    # padded (cluster, slot) lookup table of surname pools plus each pool's length
+    pools = [CLUSTER_SURNAMES.get(f"C{i+1}", LAST_NAMES) for i in range(n_clusters)]
+    lens = np.array([len(p) for p in pools])
+    table = np.empty((n_clusters, lens.max()), dtype=object)
+    for i, p in enumerate(pools):
+        table[i, :len(p)] = p
+    return table, lens
+
+def _people_chunk(rng, matches: pd.DataFrame, cluster, surnames, next_person: int):
+    """Persons, relationships and tree links for one chunk of matches (same model as the loop)."""
+    keep = np.flatnonzero((rng.random(len(matches)) >= 0.12) & (matches["tree_size"].to_numpy() > 0))
+    k = rng.integers(2, 9, len(keep))
+    owner = np.repeat(keep, k)
+    p = len(owner)
+    pid = ("P" + pd.Series(np.arange(next_person, next_person + p)).astype(str).str.zfill(6)).to_numpy(dtype=object)
+
+    table, lens = surnames
+    pc = cluster[owner]
+    pooled = table[pc, (rng.random(p) * lens[pc]).astype(np.int64)]
+    last = np.where(rng.random(p) < 0.70, pooled, np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), p)])
+    female = rng.random(p) < 0.5
+    first = np.where(female, np.array(FIRST_NAMES_F, dtype=object)[rng.integers(0, len(FIRST_NAMES_F), p)],
+                     np.array(FIRST_NAMES_M, dtype=object)[rng.integers(0, len(FIRST_NAMES_M), p)])
+    birth = np.clip(np.rint(rng.normal(1910, 25, p)), 1860, 1965).astype(np.int64)
+    death = np.clip(birth + rng.integers(30, 91, p), birth + 1, 2025)
+
+    la = np.array([x[0] for x in LA_PLACES], dtype=object)
+    near = np.array([x[0] for x in NEARBY_PLACES], dtype=object)
+    place_birth = np.where(rng.random(p) < 0.78, la[rng.integers(0, len(la), p)], near[rng.integers(0, len(near), p)])
+    r = rng.random(p)
+    place_death = np.where(r < 0.55, place_birth,
+                           np.where(r < 0.85, la[rng.integers(0, len(la), p)], near[rng.integers(0, len(near), p)]))
+
+    persons = pd.DataFrame({
+        "person_id": pid, "first_name": first, "last_name": last,
+        "birth_year": birth, "death_year": death, "sex": np.where(female, "F", "M"),
+        "birth_place": "", "death_place": "",
+        "place_id_birth": place_birth, "place_id_death": place_death,
+    })
+    links = pd.DataFrame({
+        "match_id": matches["match_id"].to_numpy()[owner],
+        "person_id": pid,
+        "confidence_level": np.clip(rng.uniform(0.45, 0.95, p) * matches["tree_confidence"].to_numpy()[owner], 0.2, 0.98).round(2),
+    })
+
+    # first person is child of the second; with 4+ people, 65% also get third -> fourth
+    start = np.cumsum(k) - k
+    one = start[k >= 3]
+    two = start[(k >= 4) & (rng.random(len(k)) < 0.65)]
+    child = np.concatenate([one, two + 2])
+    parent = child + 1
+    order = np.argsort(np.concatenate([one * 2, two * 2 + 1]), kind="stable")
+    rels = pd.DataFrame({
+        "child_person_id": pid[child[order]],
+        "parent_person_id": pid[parent[order]],
+        "relationship_type": "biological",
+    })
+    return persons, rels, links, next_person + p
+
+def _match_core(rng, n_matches: int, n_clusters: int):
+    # per-match cluster code and cM: the only arrays kept for a whole streamed run
+    strength = rng.uniform(0.55, 0.95, n_clusters)
+    weights = np.array(cluster_weights(n_clusters))
+    cluster = rng.choice(n_clusters, n_matches, p=weights / weights.sum()).astype(np.int32)
+    return cluster, _sample_cm_np(rng, strength[cluster])
+
+def edges_per_match(n_clusters: int, seed: int = SEED, pilot: int = 200_000) -> float:
+    """
+    Monte Carlo estimate of shared-match edges the sampler yields per match.
+    The 12-draws-per-target cap usually binds, so this is below the 7.5 target.
+    """
+    rng = np.random.default_rng(seed)
+    cluster, cm = _match_core(rng, pilot, n_clusters)
+    a = rng.integers(0, pilot, pilot)
+    b = rng.integers(0, pilot, pilot)
+    p = _accept_prob(cm[a], cm[b], cluster[a] == cluster[b])
+    return min(7.5, 7.5 * 12 * float(p.mean()))
+
+def stream_case(sink, n_matches: int, n_clusters: int = 4, chunk_size: int = 100_000, seed: int = SEED) -> dict:
+    """
+    Generate a whole case chunk by chunk into sink (CsvSink or SqliteSink).
+
+    Only per-match numeric arrays (cluster code, cM) live for the whole run;
+    every table is emitted in chunks of about chunk_size rows, so memory does
+    not grow with the number of edges. Output is reproducible for a given
+    (seed, chunk_size). Returns rows written per table.
+    """
+    if np is None:
+        raise ImportError("Streaming mode needs numpy: pip install numpy")
+    rng = np.random.default_rng(seed)
+    width = max(4, len(str(n_matches)))
+
+    cluster, cm = _match_core(rng, n_matches, n_clusters)
+    anchors = np.argsort(-cm, kind="stable")[:3]
+    surnames = _surname_table(n_clusters)
+
+    sink.write("places", make_places())
+    next_person = 1
+    for start in range(0, n_matches, chunk_size):
+        stop = min(start + chunk_size, n_matches)
+        matches = _matches_chunk(rng, start, stop, cluster, cm, anchors, width)
+        persons, rels, links, next_person = _people_chunk(rng, matches, cluster[start:stop], surnames, next_person)
+        sink.write("matches", matches)
+        sink.write("persons", persons)
+        sink.write("relationships", rels)
+        sink.write("match_tree_links", links)
+
+    n_chunks = max(1, -(-int(n_matches * 7.5) // chunk_size))
+    for a, b, s, c, g in iter_shared_matches(cm, cluster, rng, n_chunks):
+        sink.write("shared_matches", shared_frame(match_ids(a, width), match_ids(b, width), s, c, g))
+    sink.close()
+    return sink.rows
+
+def main(argv=None):
     root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     raw_dir = os.path.join(root, "data", "raw")
-    ensure_dir(raw_dir)
-
-    places_df = make_places()
-    matches_df = generate_matches()
-    shared_df = generate_shared_matches(matches_df)
-    persons_df, rels_df, links_df = generate_persons_relationships_links(matches_df)
-
-    places_df.to_csv(os.path.join(raw_dir, "places.csv"), index=False)
-    matches_df.to_csv(os.path.join(raw_dir, "matches.csv"), index=False)
-    shared_df.to_csv(os.path.join(raw_dir, "shared_matches.csv"), index=False)
-    persons_df.to_csv(os.path.join(raw_dir, "persons.csv"), index=False)
-    rels_df.to_csv(os.path.join(raw_dir, "relationships.csv"), index=False)
-    links_df.to_csv(os.path.join(raw_dir, "match_tree_links.csv"), index=False)
-
-    print("✅ Generated CSVs in forensic_genetic_genealogy/data/raw/")
-    print("matches:", len(matches_df))
-    print("shared edges:", len(shared_df))
-    print("persons:", len(persons_df))
-    print("relationships:", len(rels_df))
-    print("match_tree_links:", len(links_df))
+
+    ap = argparse.ArgumentParser(description="Generate a synthetic FGG case (Bayou Doe by default)")
+    ap.add_argument("--matches", type=int, default=260)
+    ap.add_argument("--clusters", type=int, default=4)
+    ap.add_argument("--edges", type=int, help="approximate shared-match edges wanted; sets --matches to fit")
+    ap.add_argument("--stream", action="store_true", help="vectorized generator writing fixed-size chunks (bounded memory)")
+    ap.add_argument("--chunk-size", type=int, default=100_000, help="rows per chunk in --stream mode")
+    ap.add_argument("--engine", choices=SHARED_ENGINES, default="loop", help="shared-match sampler when not streaming")
+    ap.add_argument("--format", choices=("csv", "sqlite"), default="csv")
+    ap.add_argument("--out-dir", default=raw_dir, help="CSV output folder")
+    ap.add_argument("--db", help="new SQLite file for --format sqlite")
+    ap.add_argument("--seed", type=int, default=SEED)
+    args = ap.parse_args(argv)
+
+    if args.edges:
+        if np is None:
+            ap.error("--edges needs numpy")
+        args.matches = int(np.ceil(args.edges / edges_per_match(args.clusters, args.seed)))
+    if args.format == "sqlite" and not args.db:
+        ap.error("--format sqlite needs --db")
+    sink = SqliteSink(args.db) if args.format == "sqlite" else CsvSink(args.out_dir)
+    target = args.db if args.format == "sqlite" else args.out_dir
+
+    if args.stream:
+        rows = stream_case(sink, args.matches, args.clusters, args.chunk_size, args.seed)
+    else:
+        random.seed(args.seed)
+        if np is not None:
+            np.random.seed(args.seed)
+        matches_df = generate_matches(args.matches, args.clusters)
+        shared_df = generate_shared_matches(matches_df, engine=args.engine,
+                                            rng=np.random.default_rng(args.seed) if np is not None else None)
+        persons_df, rels_df, links_df = generate_persons_relationships_links(matches_df)
+
+        sink.write("places", make_places())
+        sink.write("matches", matches_df)
+        sink.write("shared_matches", shared_df)
+        sink.write("persons", persons_df)
+        sink.write("relationships", rels_df)
+        sink.write("match_tree_links", links_df)
+        sink.close()
+        rows = sink.rows
+
+    print(f"✅ Generated synthetic case in {os.path.abspath(target)}")
+    print("matches:", rows["matches"])
+    print("shared edges:", rows["shared_matches"])
+    print("persons:", rows["persons"])
+    print("relationships:", rows["relationships"])
+    print("match_tree_links:", rows["match_tree_links"])
 
 if __name__ == "__main__":
     main()
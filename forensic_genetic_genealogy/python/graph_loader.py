@@ -0,0 +1,83 @@
+"""
+Bulk loaders for the shared-match network.
+
+Turns the match_id_a / match_id_b / shared_strength edge list into either a
+scipy.sparse CSR adjacency or a networkx Graph in one step, instead of
+calling G.add_edge once per DataFrame row.
+"""
+
+from __future__ import annotations
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def intern_ids(edges: pd.DataFrame):
+    """
+    Map match IDs to integer codes.
+
+    Returns (labels, codes_a, codes_b) where labels[code] is the original
+    match_id. Codes follow first appearance in the edge list, which is the
+    same node order the old row-by-row loop produced.
+    """
+    pairs = np.column_stack([
+        edges["match_id_a"].to_numpy(),
+        edges["match_id_b"].to_numpy(),
+    ]).ravel()
+    codes, labels = pd.factorize(pairs, sort=False)
+    codes = codes.reshape(-1, 2)
+    return np.asarray(labels, dtype=object), codes[:, 0], codes[:, 1]
+
+
+def edge_arrays(edges: pd.DataFrame, min_weight: float | None = None):
+    """
+    Deduplicated, undirected edge arrays.
+
+    Returns (labels, rows, cols, weights) with rows <= cols. A pair listed
+    more than once (in either direction) keeps its last weight, matching
+    what repeated add_edge calls did.
+    """
+    labels, a, b = intern_ids(edges)
+    w = edges["shared_strength"].to_numpy(dtype=float)
+
+    if min_weight is not None:
+        keep = w >= min_weight
+        a, b, w = a[keep], b[keep], w[keep]
+
+    lo = np.minimum(a, b)
+    hi = np.maximum(a, b)
+    key = pd.Series(lo.astype(np.int64) * len(labels) + hi)
+    last = ~key.duplicated(keep="last").to_numpy()
+    return labels, lo[last], hi[last], w[last]
+
+
+def edges_to_csr(edges: pd.DataFrame, min_weight: float | None = None):
+    """
+    Symmetric CSR adjacency for the edge list.
+
+    Returns (labels, adj) where adj[i, j] is the shared_strength between
+    labels[i] and labels[j]. Self-loops sit on the diagonal once.
+    """
+    labels, rows, cols, w = edge_arrays(edges, min_weight)
+    n = len(labels)
+    off = rows != cols
+    r = np.concatenate([rows, cols[off]])
+    c = np.concatenate([cols, rows[off]])
+    v = np.concatenate([w, w[off]])
+    adj = sparse.csr_matrix((v, (r, c)), shape=(n, n))
+    return labels, adj
+
+
+def build_graph(edges: pd.DataFrame, min_weight: float | None = None) -> nx.Graph:
+    """
+    networkx Graph with a "weight" attribute, built from the edge arrays
+    in a single add_weighted_edges_from call.
+    """
+    labels, rows, cols, w = edge_arrays(edges, min_weight)
+    G = nx.Graph()
+    if min_weight is None:
+        G.add_nodes_from(labels)
+    G.add_weighted_edges_from(zip(labels[rows], labels[cols], w.tolist()))
+    return G
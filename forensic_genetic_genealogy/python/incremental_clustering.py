@@ -0,0 +1,341 @@
+"""
+Incremental re-clustering for match_clusters.
+
+A full run of 01_cluster_engine.py records a watermark (the highest
+shared_matches rowid it clustered) in cluster_state, and installs triggers
+that log the endpoints of any UPDATE/DELETE on shared_matches into
+shared_matches_changes. shared_matches has no INTEGER PRIMARY KEY, so
+SQLite reuses the rowid of a deleted top row (and VACUUM renumbers rows);
+an INSERT that lands at or below the watermark is logged too, since the
+rowid range alone would miss it.
+
+An incremental run then:
+1. collects the match IDs touched by edges above the watermark or in the
+   change log
+2. expands them to every member of the clusters they currently sit in
+3. re-runs Louvain on just the edges inside that affected node set
+4. maps the new communities back onto the old cluster_ids by overlap and
+   upserts only the affected match_clusters rows
+
+An affected node left with no edge inside the affected set (say its only
+remaining edges go to untouched clusters) is not in the Louvain result;
+it joins the untouched cluster it shares the most strength with. A node
+with no edges left at all drops out of match_clusters, as it would in a
+full run.
+
+Communities that no new or changed edge touches are left as they are.
+Run a full re-cluster now and then to re-optimize globally.
+
+python incremental_clustering.py checks the change tracking and the
+handling of such stranded nodes on in-memory tables.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+import pandas as pd
+
+from clustering import DEFAULT_SEED, cluster_edges
+
+TRACKING_SQL = """
+CREATE TABLE IF NOT EXISTS cluster_state (
+  key TEXT PRIMARY KEY,
+  value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS shared_matches_changes (
+  match_id_a TEXT,
+  match_id_b TEXT
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_shared_matches_update
+AFTER UPDATE ON shared_matches
+BEGIN
+  INSERT INTO shared_matches_changes (match_id_a, match_id_b) VALUES (OLD.match_id_a, OLD.match_id_b);
+  INSERT INTO shared_matches_changes (match_id_a, match_id_b) VALUES (NEW.match_id_a, NEW.match_id_b);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_shared_matches_insert
+AFTER INSERT ON shared_matches
+WHEN NEW.rowid <= (SELECT CAST(value AS INTEGER) FROM cluster_state WHERE key = 'edge_watermark')
+BEGIN
+  INSERT INTO shared_matches_changes (match_id_a, match_id_b) VALUES (NEW.match_id_a, NEW.match_id_b);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_shared_matches_delete
+AFTER DELETE ON shared_matches
+BEGIN
+  INSERT INTO shared_matches_changes (match_id_a, match_id_b) VALUES (OLD.match_id_a, OLD.match_id_b);
+END;
+
+CREATE INDEX IF NOT EXISTS idx_shared_matches_a ON shared_matches(match_id_a);
+CREATE INDEX IF NOT EXISTS idx_shared_matches_b ON shared_matches(match_id_b);
+"""
+
+# match_clusters is recreated by to_sql on every full run, so its index is
+# (re)built separately.
+CLUSTER_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_match_clusters_cluster ON match_clusters(cluster_id, match_id);"
+
+
+def ensure_tracking(conn: sqlite3.Connection) -> None:
+    """Create the state table, change log, triggers and lookup indexes."""
+    conn.executescript(TRACKING_SQL)
+    conn.execute(CLUSTER_INDEX_SQL)
+    conn.commit()
+
+
+def get_watermark(conn: sqlite3.Connection):
+    """Highest shared_matches rowid already clustered, or None if never recorded."""
+    try:
+        row = conn.execute("SELECT value FROM cluster_state WHERE key = 'edge_watermark'").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return int(row[0]) if row else None
+
+
+def record_full_run(conn: sqlite3.Connection, backend: str, seed: int) -> int:
+    """After a full re-cluster: set the watermark to the current max rowid and clear the change log."""
+    ensure_tracking(conn)
+    watermark = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM shared_matches").fetchone()[0]
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO cluster_state (key, value) VALUES (?, ?)",
+            [("edge_watermark", str(watermark)), ("backend", backend), ("seed", str(seed))],
+        )
+        conn.execute("DELETE FROM shared_matches_changes")
+    return watermark
+
+
+def _assign_cluster_ids(new_df: pd.DataFrame, old_df: pd.DataFrame, next_id: int) -> pd.Series:
+    """
+    Give each re-optimized community an existing cluster_id where possible:
+    largest overlap first, each old id used at most once; the rest get fresh ids.
+    """
+    overlap = (
+        new_df.merge(old_df, on="match_id", suffixes=("_new", "_old"))
+        .groupby(["cluster_id_new", "cluster_id_old"]).size()
+        .sort_values(ascending=False)
+    )
+    mapping, used = {}, set()
+    for (c_new, c_old), _n in overlap.items():
+        if c_new not in mapping and c_old not in used:
+            mapping[c_new] = int(c_old)
+            used.add(c_old)
+    for c_new in new_df["cluster_id"].unique():
+        if c_new not in mapping:
+            mapping[c_new] = next_id
+            next_id += 1
+    return new_df["cluster_id"].map(mapping)
+
+
+def _collect_touched(conn: sqlite3.Connection, lo: int, hi: int) -> int:
+    """Fill temp.touched_nodes with the endpoints of edges in (lo, hi] and in the change log; returns the count."""
+    conn.executescript("""
+    DROP TABLE IF EXISTS temp.touched_nodes;
+    DROP TABLE IF EXISTS temp.affected_nodes;
+    CREATE TEMP TABLE touched_nodes (match_id TEXT PRIMARY KEY);
+    CREATE TEMP TABLE affected_nodes (match_id TEXT PRIMARY KEY);
+    """)
+    conn.execute("""
+    INSERT OR IGNORE INTO temp.touched_nodes
+    SELECT match_id_a FROM shared_matches WHERE rowid > :lo AND rowid <= :hi
+    UNION SELECT match_id_b FROM shared_matches WHERE rowid > :lo AND rowid <= :hi
+    UNION SELECT match_id_a FROM shared_matches_changes
+    UNION SELECT match_id_b FROM shared_matches_changes
+    """, {"lo": lo, "hi": hi})
+    return conn.execute("SELECT COUNT(*) FROM temp.touched_nodes").fetchone()[0]
+
+
+def _attach_stranded(conn: sqlite3.Connection, match_ids) -> pd.DataFrame:
+    """
+    match_id / cluster_id for affected nodes the sub-graph left out: each
+    joins the unaffected cluster it has the most shared_strength with.
+    Nodes with no edges into unaffected clusters are not returned.
+    """
+    conn.executescript("""
+    DROP TABLE IF EXISTS temp.stranded_nodes;
+    CREATE TEMP TABLE stranded_nodes (match_id TEXT PRIMARY KEY);
+    """)
+    conn.executemany("INSERT INTO temp.stranded_nodes VALUES (?)", [(m,) for m in match_ids])
+    links = pd.read_sql_query("""
+    WITH nbr AS (
+      SELECT n.match_id, s.match_id_b AS other, s.shared_strength
+      FROM temp.stranded_nodes n JOIN shared_matches s ON s.match_id_a = n.match_id
+      UNION ALL
+      SELECT n.match_id, s.match_id_a AS other, s.shared_strength
+      FROM temp.stranded_nodes n JOIN shared_matches s ON s.match_id_b = n.match_id
+    )
+    SELECT nbr.match_id, mc.cluster_id, SUM(nbr.shared_strength) AS strength
+    FROM nbr
+    JOIN match_clusters mc ON mc.match_id = nbr.other
+    WHERE nbr.other NOT IN (SELECT match_id FROM temp.affected_nodes)
+    GROUP BY nbr.match_id, mc.cluster_id
+    """, conn)
+    conn.execute("DROP TABLE temp.stranded_nodes")
+    best = links.sort_values(["match_id", "strength", "cluster_id"], ascending=[True, False, True])
+    return best.drop_duplicates("match_id")[["match_id", "cluster_id"]].reset_index(drop=True)
+
+
+def recluster_incremental(conn: sqlite3.Connection, backend: str = "networkx", seed: int = DEFAULT_SEED) -> dict:
+    """
+    Re-optimize only the communities touched by new or changed edges.
+
+    Returns a summary dict (watermark, touched/affected node counts, rows written).
+    Raises RuntimeError if no full run has been recorded yet.
+    """
+    watermark = get_watermark(conn)
+    if watermark is None:
+        raise RuntimeError("No cluster_state watermark found; run a full re-cluster first.")
+    ensure_tracking(conn)
+
+    new_watermark = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM shared_matches").fetchone()[0]
+
+    n_touched = _collect_touched(conn, watermark, new_watermark)
+    if n_touched == 0:
+        return {"watermark": watermark, "touched_nodes": 0, "affected_nodes": 0, "rows_written": 0}
+
+    conn.execute("""
+    INSERT OR IGNORE INTO temp.affected_nodes
+    SELECT match_id FROM temp.touched_nodes
+    UNION
+    SELECT mc.match_id
+    FROM match_clusters mc
+    WHERE mc.cluster_id IN (
+      SELECT cluster_id FROM match_clusters
+      WHERE match_id IN (SELECT match_id FROM temp.touched_nodes)
+    )
+    """)
+
+    n_affected = conn.execute("SELECT COUNT(*) FROM temp.affected_nodes").fetchone()[0]
+
+    old_df = pd.read_sql_query("""
+    SELECT mc.match_id, mc.cluster_id
+    FROM match_clusters mc
+    JOIN temp.affected_nodes n ON n.match_id = mc.match_id
+    """, conn)
+
+    sub_edges = pd.read_sql_query("""
+    SELECT s.match_id_a, s.match_id_b, s.shared_strength
+    FROM temp.affected_nodes n
+    JOIN shared_matches s ON s.match_id_a = n.match_id
+    WHERE s.match_id_b IN (SELECT match_id FROM temp.affected_nodes)
+    """, conn)
+
+    if sub_edges.empty:
+        new_df = pd.DataFrame({"match_id": pd.Series(dtype=object), "cluster_id": pd.Series(dtype=int)})
+    else:
+        new_df = cluster_edges(sub_edges, backend=backend, seed=seed)
+        next_id = conn.execute("SELECT COALESCE(MAX(cluster_id), -1) + 1 FROM match_clusters").fetchone()[0]
+        new_df["cluster_id"] = _assign_cluster_ids(new_df, old_df, next_id)
+
+    affected = pd.read_sql_query("SELECT match_id FROM temp.affected_nodes", conn)["match_id"]
+    stranded = affected[~affected.isin(new_df["match_id"])]
+    if len(stranded):
+        new_df = pd.concat([new_df, _attach_stranded(conn, stranded)], ignore_index=True)
+
+    touched_ids = set(old_df["cluster_id"]).union(new_df["cluster_id"])
+    rows = list(zip(new_df["match_id"], new_df["cluster_id"].astype(int).tolist()))
+
+    with conn:
+        conn.execute("DELETE FROM match_clusters WHERE match_id IN (SELECT match_id FROM temp.affected_nodes)")
+        conn.executemany("INSERT INTO match_clusters (match_id, cluster_id, cluster_size) VALUES (?, ?, 0)", rows)
+        conn.executemany("""
+        UPDATE match_clusters
+        SET cluster_size = (SELECT COUNT(*) FROM match_clusters c WHERE c.cluster_id = ?)
+        WHERE cluster_id = ?
+        """, [(int(c), int(c)) for c in touched_ids])
+        conn.execute("INSERT OR REPLACE INTO cluster_state (key, value) VALUES ('edge_watermark', ?)", (str(new_watermark),))
+        conn.execute("DELETE FROM shared_matches_changes")
+
+    return {
+        "watermark": new_watermark,
+        "touched_nodes": n_touched,
+        "affected_nodes": n_affected,
+        "rows_written": len(rows),
+    }
+
+
+def check_change_tracking() -> bool:
+    """
+    On an in-memory shared_matches: appends, updates, deletes and a
+    delete-then-insert that reuses the top rowid must all mark their
+    endpoints as touched. Prints each case; returns True if all pass.
+    """
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+    CREATE TABLE shared_matches (
+      match_id_a TEXT, match_id_b TEXT, shared_strength REAL, shared_cm_est REAL, shared_segments_est INTEGER
+    )""")
+    conn.execute("CREATE TABLE match_clusters (match_id TEXT, cluster_id INTEGER, cluster_size INTEGER)")
+    conn.executemany("INSERT INTO shared_matches (match_id_a, match_id_b, shared_strength) VALUES (?, ?, 1.0)",
+                     [("A", "B"), ("B", "C"), ("C", "D")])
+
+    cases = [
+        ("append", "INSERT INTO shared_matches (match_id_a, match_id_b, shared_strength) VALUES ('E', 'F', 1.0)",
+         {"E", "F"}),
+        ("update", "UPDATE shared_matches SET shared_strength = 2.0 WHERE match_id_a = 'A'", {"A", "B"}),
+        ("delete", "DELETE FROM shared_matches WHERE match_id_a = 'B'", {"B", "C"}),
+        ("delete top row + insert", "DELETE FROM shared_matches WHERE match_id_a = 'E'; "
+         "INSERT INTO shared_matches (match_id_a, match_id_b, shared_strength) VALUES ('NEWX', 'NEWY', 1.0)",
+         {"E", "F", "NEWX", "NEWY"}),
+    ]
+    ok = True
+    for name, sql, expected in cases:
+        watermark = record_full_run(conn, "networkx", DEFAULT_SEED)
+        conn.executescript(sql)
+        hi = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM shared_matches").fetchone()[0]
+        _collect_touched(conn, watermark, hi)
+        touched = {r[0] for r in conn.execute("SELECT match_id FROM temp.touched_nodes")}
+        passed = touched == expected
+        ok &= passed
+        print(f"  {name}: touched {sorted(touched)} {'ok' if passed else f'expected {sorted(expected)}'}")
+    conn.close()
+    return ok
+
+
+def check_stranded_nodes() -> bool:
+    """
+    X sits in cluster 0 with edges X-A and X-P, P in cluster 1. After
+    deleting X-A (and then A-B, which empties the affected sub-graph), an
+    incremental run must keep every node that still has an edge in
+    match_clusters, put X with P and keep cluster_size consistent.
+    Prints each case; returns True if all pass.
+    """
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+    CREATE TABLE shared_matches (
+      match_id_a TEXT, match_id_b TEXT, shared_strength REAL, shared_cm_est REAL, shared_segments_est INTEGER
+    )""")
+    conn.executemany("INSERT INTO shared_matches (match_id_a, match_id_b, shared_strength) VALUES (?, ?, 1.0)",
+                     [("X", "A"), ("A", "B"), ("P", "Q"), ("Q", "R"), ("R", "P"), ("X", "P")])
+    conn.execute("CREATE TABLE match_clusters (match_id TEXT, cluster_id INTEGER, cluster_size INTEGER)")
+    conn.executemany("INSERT INTO match_clusters VALUES (?, ?, 3)",
+                     [("X", 0), ("A", 0), ("B", 0), ("P", 1), ("Q", 1), ("R", 1)])
+
+    ok = True
+    for name, sql in [("delete X-A", "DELETE FROM shared_matches WHERE match_id_a = 'X' AND match_id_b = 'A'"),
+                      ("then delete A-B", "DELETE FROM shared_matches WHERE match_id_a = 'A' AND match_id_b = 'B'")]:
+        record_full_run(conn, "networkx", DEFAULT_SEED)
+        conn.execute(sql)
+        conn.commit()
+        recluster_incremental(conn)
+        linked = {r[0] for r in conn.execute(
+            "SELECT match_id_a FROM shared_matches UNION SELECT match_id_b FROM shared_matches")}
+        clusters = dict(conn.execute("SELECT match_id, cluster_id FROM match_clusters"))
+        sizes_ok = conn.execute("""
+        SELECT COUNT(*) FROM match_clusters mc
+        WHERE cluster_size != (SELECT COUNT(*) FROM match_clusters c WHERE c.cluster_id = mc.cluster_id)
+        """).fetchone()[0] == 0
+        passed = linked <= set(clusters) and clusters.get("X") == clusters.get("P") and sizes_ok
+        ok &= passed
+        missing = sorted(linked - set(clusters))
+        print(f"  {name}: X in {clusters.get('X')}, P in {clusters.get('P')}, missing {missing}, "
+              f"sizes {'ok' if sizes_ok else 'wrong'} {'ok' if passed else 'FAILED'}")
+    conn.close()
+    return ok
+
+
+if __name__ == "__main__":
+    results = [check_change_tracking(), check_stranded_nodes()]
+    raise SystemExit(0 if all(results) else 1)
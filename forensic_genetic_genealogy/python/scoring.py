@@ -0,0 +1,183 @@
+"""
+Candidate scoring engine for the FGG clusters.
+
+Per-cluster features are computed in one grouped pass over the clustered
+matches, surname and geo tables. Scoring is then a weighted sum over that
+feature matrix, so many weight sets can be evaluated without recomputing
+features.
+"""
+
+from __future__ import annotations
+
+from dataclasses import astuple, dataclass, fields
+
+import numpy as np
+import pandas as pd
+
+FEATURE_COLUMNS = ["avg_cm", "tree_conf_avg", "cluster_size", "surname_signal", "geo_signal"]
+
+
+@dataclass(frozen=True)
+class ScoringWeights:
+    """Weights for each feature (tree confidence is scaled x100 before weighting)."""
+    avg_cm: float = 0.35
+    tree_conf: float = 0.20
+    cluster_size: float = 0.15
+    surname: float = 0.15
+    geo: float = 0.15
+
+
+DEFAULT_WEIGHTS = ScoringWeights()
+
+
+def _group_means(values: np.ndarray, order: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """
+    NaN-skipping mean of each contiguous group of values[order].
+
+    Each group is summed with np.sum over a contiguous slice, the same
+    pairwise summation Series.mean() uses, so results match the old
+    per-cluster filter-and-mean to the last bit.
+    """
+    v = values[order].astype(float)
+    valid = ~np.isnan(v)
+    v[~valid] = 0.0
+    counts = np.add.reduceat(valid.astype(np.int64), bounds[:-1]) if len(v) else np.zeros(0)
+    sums = np.array([v[lo:hi].sum() for lo, hi in zip(bounds[:-1], bounds[1:])])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def cluster_features(matches: pd.DataFrame, surnames: pd.DataFrame, geo: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per cluster_id (in order of first appearance in matches) with
+    unrounded avg_cm, tree_conf_avg, cluster_size, surname_signal, geo_signal.
+    """
+    codes, cluster_ids = pd.factorize(matches["cluster_id"], sort=False)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(cluster_ids) + 1))
+
+    features = pd.DataFrame(
+        {
+            "avg_cm": _group_means(matches["cm_total"].to_numpy(), order, bounds),
+            "tree_conf_avg": _group_means(matches["tree_confidence"].to_numpy(), order, bounds),
+            "cluster_size": matches["cluster_size"].to_numpy()[order[bounds[:-1]]],
+        },
+        index=pd.Index(cluster_ids, name="cluster_id"),
+    )
+    features["surname_signal"] = (
+        surnames.groupby("cluster_id")["surname_count"].sum().reindex(features.index, fill_value=0)
+    )
+    features["geo_signal"] = (
+        geo.groupby("cluster_id")["people_count"].sum().reindex(features.index, fill_value=0)
+    )
+    return features
+
+
+def _feature_matrix(features: pd.DataFrame) -> np.ndarray:
+    """Feature columns in ScoringWeights field order, tree confidence scaled to 0-100."""
+    return np.column_stack([
+        features["avg_cm"].to_numpy(dtype=float),
+        features["tree_conf_avg"].to_numpy(dtype=float) * 100,
+        features["cluster_size"].to_numpy(dtype=float),
+        features["surname_signal"].to_numpy(dtype=float),
+        features["geo_signal"].to_numpy(dtype=float),
+    ])
+
+
+def score_features(features: pd.DataFrame, weights: ScoringWeights = DEFAULT_WEIGHTS) -> pd.Series:
+    """Unrounded candidate_score per cluster for one weight set."""
+    X = _feature_matrix(features)
+    score = np.zeros(len(features))
+    # summed term by term, in the same order as the original formula
+    for j, w in enumerate(astuple(weights)):
+        score = score + X[:, j] * w
+    return pd.Series(score, index=features.index, name="candidate_score")
+
+
+def score_many(features: pd.DataFrame, weight_sets) -> pd.DataFrame:
+    """
+    Score every cluster under many weight sets in one matrix product.
+
+    Returns a clusters x weight-sets DataFrame (columns numbered in input order).
+    """
+    W = np.array([astuple(w) for w in weight_sets], dtype=float)
+    if W.ndim != 2 or W.shape[1] != len(fields(ScoringWeights)):
+        raise ValueError("weight_sets must be a sequence of ScoringWeights")
+    return pd.DataFrame(_feature_matrix(features) @ W.T, index=features.index)
+
+
+def rank_candidates(features: pd.DataFrame, weights: ScoringWeights = DEFAULT_WEIGHTS) -> pd.DataFrame:
+    """The candidate_rankings table: rounded features + score, best first."""
+    candidates_df = pd.DataFrame({
+        "cluster_id": features.index,
+        "avg_cm": features["avg_cm"].round(2).to_numpy(),
+        "tree_conf_avg": features["tree_conf_avg"].round(3).to_numpy(),
+        "cluster_size": features["cluster_size"].to_numpy(),
+        "surname_signal": features["surname_signal"].to_numpy(),
+        "geo_signal": features["geo_signal"].to_numpy(),
+        "candidate_score": score_features(features, weights).round(2).to_numpy(),
+    })
+    return candidates_df.sort_values(by="candidate_score", ascending=False)
+
+
+# -----------------------------
+# SQL-side features
+# -----------------------------
+SCORING_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_match_clusters_cluster ON match_clusters(cluster_id, match_id);
+CREATE INDEX IF NOT EXISTS idx_match_tree_links_match ON match_tree_links(match_id);
+"""
+
+# Same definitions as the pandas path: surname_signal = SUM(surname_count) over
+# v_surnames_by_cluster, geo_signal = SUM(people_count) over v_geo_by_cluster
+# for state = 'LA'. Both come out of a single pass over the tree links.
+FEATURES_SQL = """
+WITH cluster_matches AS (
+  SELECT
+    mc.cluster_id,
+    MIN(mc.rowid) AS first_row,
+    AVG(m.cm_total) AS avg_cm,
+    AVG(m.tree_confidence) AS tree_conf_avg,
+    MAX(mc.cluster_size) AS cluster_size
+  FROM match_clusters mc
+  JOIN matches m ON m.match_id = mc.match_id
+  GROUP BY mc.cluster_id
+),
+cluster_people AS (
+  SELECT
+    mc.cluster_id,
+    SUM(CASE WHEN p.last_name IS NOT NULL AND TRIM(p.last_name) <> '' THEN 1 ELSE 0 END) AS surname_signal,
+    SUM(CASE WHEN pl.state = 'LA' THEN 1 ELSE 0 END) AS geo_signal
+  FROM match_clusters mc
+  JOIN match_tree_links l ON l.match_id = mc.match_id
+  JOIN persons p ON p.person_id = l.person_id
+  LEFT JOIN places pl ON pl.place_id = p.place_id_birth
+  GROUP BY mc.cluster_id
+)
+SELECT
+  cm.cluster_id,
+  cm.avg_cm,
+  cm.tree_conf_avg,
+  cm.cluster_size,
+  COALESCE(cp.surname_signal, 0) AS surname_signal,
+  COALESCE(cp.geo_signal, 0) AS geo_signal
+FROM cluster_matches cm
+LEFT JOIN cluster_people cp ON cp.cluster_id = cm.cluster_id
+ORDER BY cm.first_row;
+"""
+
+
+def ensure_scoring_indexes(conn) -> None:
+    """Indexes the feature query joins on (match_clusters is rebuilt by each full re-cluster)."""
+    conn.executescript(SCORING_INDEX_SQL)
+    conn.commit()
+
+
+def cluster_features_sql(conn) -> pd.DataFrame:
+    """
+    Same frame as cluster_features(), aggregated inside SQLite so only one
+    row per cluster is transferred. SQLite's AVG sums in a different order
+    than pandas, so a score can differ from the pandas path in the last
+    rounded digit.
+    """
+    return pd.read_sql_query(FEATURES_SQL, conn, index_col="cluster_id")
@@ -1,3 +1,9 @@
+-- Legacy sqlite3-shell load. .import into the tables from 00_schema.sql
+-- stores each CSV header as a data row and creates no indexes.
+-- Prefer the Python bulk loader, which skips headers, keeps column types
+-- and indexes the join keys:
+--   python forensic_genetic_genealogy/python/bulk_load.py --db <path> --views
+
 .mode csv
 .separator ,
 
@@ -0,0 +1,151 @@
+"""
+A/B comparison (Control vs Variant) from per-player pre-aggregates.
+
+Query 5 in sql/02_core_metrics.sql used to LEFT JOIN sessions and purchases
+to feature_flags on player_id in one step, giving n_sessions x n_purchases
+rows per player: revenue was multiplied by the session count and sessions
+by the purchase count. Here each fact table is reduced to one row per
+player on its own (one pass each: player_id interned once, then
+np.bincount), and only those per-player totals are joined to the flags.
+
+Every flagged player counts, with zeros when they never played or paid,
+so group means are per assigned player (intent-to-treat). For each metric
+and test_group the summary gives the mean with a normal-approximation
+confidence interval; non-control groups also get the uplift over control,
+absolute (Welch interval) and relative (delta-method interval), plus a
+two-sided p-value.
+
+Usage:
+    python ab_metrics.py
+    python ab_metrics.py --data-dir /tmp/game_1m --confidence 0.99
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+from statistics import NormalDist
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+CONTROL = "Control"
+METRICS = ("sessions", "total_minutes", "revenue", "payer")
+
+
+def intern_players(flag_ids, *fact_ids) -> Tuple:
+    """
+    Integer player codes shared by feature_flags and fact tables, from one
+    factorize over all of them. Flagged players get codes 0..n-1 (in flag
+    order); fact rows of unflagged players get codes >= n.
+    Returns (flag codes, *fact codes, n).
+    """
+    parts = [np.asarray(flag_ids, dtype=object)] + [np.asarray(ids, dtype=object) for ids in fact_ids]
+    codes, _ = pd.factorize(np.concatenate(parts))
+    bounds = np.cumsum([len(p) for p in parts])[:-1]
+    split = np.split(codes, bounds)
+    n = int(split[0].max()) + 1 if len(split[0]) else 0
+    return (*split, n)
+
+
+def player_metrics(flags: pd.DataFrame, sessions: pd.DataFrame, purchases: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per flagged player: test_group, sessions, total_minutes,
+    purchases, revenue and payer (1 if revenue > 0). Fact rows of players
+    without a flag are ignored, as in the query's join.
+    """
+    flags = flags[flags["player_id"] != "player_id"]  # feature_flags_clean
+    f_code, s_code, p_code, n = intern_players(flags["player_id"], sessions["player_id"], purchases["player_id"])
+    s_ok, p_ok = s_code < n, p_code < n
+
+    def per_player(codes, ok, weights=None):
+        w = None if weights is None else np.asarray(weights, dtype=float)[ok]
+        return np.bincount(codes[ok], weights=w, minlength=n)[f_code]
+
+    revenue = per_player(p_code, p_ok, purchases["revenue"])
+    return pd.DataFrame({
+        "player_id": np.asarray(flags["player_id"], dtype=object),
+        "test_group": np.asarray(flags["test_group"], dtype=object),
+        "sessions": per_player(s_code, s_ok),
+        "total_minutes": per_player(s_code, s_ok, sessions["session_length_min"]),
+        "purchases": per_player(p_code, p_ok),
+        "revenue": revenue,
+        "payer": (revenue > 0).astype(np.int64),
+    })
+
+
+def group_summary(pm: pd.DataFrame, control: str = CONTROL, confidence: float = 0.95,
+                  metrics=METRICS) -> pd.DataFrame:
+    """
+    One row per (metric, test_group): players, mean, std, mean CI and, for
+    groups other than control, uplift vs control with its CIs and p-value.
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    g = pm.groupby("test_group")
+    n = g.size()
+    rows = []
+    for metric in metrics:
+        mean = g[metric].mean()
+        var = g[metric].var(ddof=1).fillna(0.0)
+        se2 = var / n
+        for group in n.index:
+            row = {
+                "metric": metric,
+                "test_group": group,
+                "players": int(n[group]),
+                "mean": mean[group],
+                "std": math.sqrt(var[group]),
+                "ci_low": mean[group] - z * math.sqrt(se2[group]),
+                "ci_high": mean[group] + z * math.sqrt(se2[group]),
+            }
+            if group != control and control in n.index:
+                mc, mt = mean[control], mean[group]
+                diff = mt - mc
+                se_diff = math.sqrt(se2[group] + se2[control])
+                row.update({
+                    "uplift": diff,
+                    "uplift_ci_low": diff - z * se_diff,
+                    "uplift_ci_high": diff + z * se_diff,
+                    "p_value": 2 * (1 - NormalDist().cdf(abs(diff) / se_diff)) if se_diff > 0 else np.nan,
+                })
+                if mc:
+                    # delta method for mt / mc - 1
+                    se_rel = math.sqrt(se2[group] / mc ** 2 + mt ** 2 * se2[control] / mc ** 4)
+                    rel = mt / mc - 1
+                    row.update({"uplift_pct": 100 * rel, "uplift_pct_ci_low": 100 * (rel - z * se_rel),
+                                "uplift_pct_ci_high": 100 * (rel + z * se_rel)})
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def ab_comparison(flags: pd.DataFrame, sessions: pd.DataFrame, purchases: pd.DataFrame) -> pd.DataFrame:
+    """The columns of query 5 (per-player averages by test_group, rounded to cents)."""
+    pm = player_metrics(flags, sessions, purchases)
+    out = pm.groupby("test_group").agg(
+        players=("player_id", "nunique"),
+        avg_sessions_per_player=("sessions", "mean"),
+        avg_minutes_per_player=("total_minutes", "mean"),
+        avg_revenue_per_player=("revenue", "mean"),
+    ).round(2)
+    return out.reset_index()
+
+
+def main() -> None:
+    from core_metrics import RAW_DIR, load_tables
+
+    ap = argparse.ArgumentParser(description="Control vs Variant with confidence intervals and uplift")
+    ap.add_argument("--data-dir", default=RAW_DIR, help="generated CSVs, or a parquet_sink output folder")
+    ap.add_argument("--control", default=CONTROL)
+    ap.add_argument("--confidence", type=float, default=0.95)
+    args = ap.parse_args()
+
+    tables = load_tables(args.data_dir)
+    pm = player_metrics(tables["feature_flags"], tables["sessions"], tables["purchases"])
+    summary = group_summary(pm, args.control, args.confidence)
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(summary.round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
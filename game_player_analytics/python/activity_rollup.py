@@ -0,0 +1,288 @@
+"""
+Incremental daily-activity rollup for DAU, WAU and retention.
+
+Queries 1-3 of sql/02_core_metrics.sql rescan every session since the
+first day. This store keeps, in one .npz file:
+
+- player_ids     player_id per integer player code
+- bits           per-player activity bitmap, one bit per day since day0
+                 (uint64 words: 16 bytes per player covers 128 days)
+- first_play     first session day per player (day number, -1 if none)
+- dau / wau      distinct players per day / per Sunday-start week
+- cohort         players per (first play day, days since first play);
+                 column 0 holds each cohort's size
+
+Days are integer day numbers (days since 1970-01-01). ingest() takes any
+batch of sessions (typically one new day): (player, day) pairs whose bit
+is already set are dropped, the rest set their bit and add to DAU, to WAU
+when the player had no earlier bit in that week, and to the cohort
+counts. Only the rows of players in the batch are touched. A player whose
+first play moves earlier (late-arriving data) has their old cohort
+offsets taken back and re-added from their own bitmap row. Re-ingesting
+rows already in the store changes nothing.
+
+DAU / WAU / retention then come straight from the small count arrays, in
+the same shape as core_metrics.py returns them.
+
+Usage:
+    python activity_rollup.py --store /tmp/rollup.npz --rebuild --daily
+    python activity_rollup.py --store /tmp/rollup_1m.npz --data-dir /tmp/game_1m --rebuild
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import core_metrics as cm
+
+DEFAULT_STORE = os.path.join(cm.HERE, "..", "data", "activity_rollup.npz")
+WORD_BITS = 64
+
+
+def _bit(words: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """Bit for each day (relative to day0) in the matching row of words."""
+    return ((words >> (day % WORD_BITS).astype(np.uint64)) & np.uint64(1)).astype(bool)
+
+
+class ActivityRollup:
+    def __init__(self):
+        self.player_ids = np.empty(0, dtype=object)
+        self.day0: Optional[int] = None
+        self.bits = np.zeros((0, 0), dtype=np.uint64)
+        self.first_play = np.empty(0, dtype=np.int64)
+        self.dau_counts = np.zeros(0, dtype=np.int64)  # index: day - day0
+        self.wau_counts = np.zeros(0, dtype=np.int64)  # index: (week_start - week0) // 7
+        self.cohort = np.zeros((0, 0), dtype=np.int64)  # [first_play - day0, days since first play]
+        self._index: Optional[pd.Index] = None
+
+    @property
+    def week0(self) -> int:
+        return int(cm.week_start(np.array([self.day0]))[0])
+
+    @property
+    def n_days(self) -> int:
+        return len(self.dau_counts)
+
+    # --- persistence -----------------------------------------------------------
+
+    @classmethod
+    def load(cls, path: str) -> "ActivityRollup":
+        ro = cls()
+        if not os.path.exists(path):
+            return ro
+        with np.load(path) as z:
+            ro.player_ids = z["player_ids"].astype(object)
+            ro.day0 = int(z["day0"][0]) if z["day0"].size else None
+            ro.bits = z["bits"]
+            ro.first_play = z["first_play"]
+            ro.dau_counts = z["dau"]
+            ro.wau_counts = z["wau"]
+            ro.cohort = z["cohort"]
+        return ro
+
+    def save(self, path: str) -> None:
+        """Write to a temp file next to path, then os.replace() it in."""
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(
+                fh,
+                player_ids=self.player_ids.astype(str),
+                day0=np.array([] if self.day0 is None else [self.day0], dtype=np.int64),
+                bits=self.bits,
+                first_play=self.first_play,
+                dau=self.dau_counts,
+                wau=self.wau_counts,
+                cohort=self.cohort,
+            )
+        os.replace(tmp, path)
+
+    # --- ingest ----------------------------------------------------------------
+
+    def _codes(self, ids: np.ndarray) -> np.ndarray:
+        """Player codes for ids, appending players not seen before."""
+        if self._index is None:
+            self._index = pd.Index(self.player_ids)
+        codes = self._index.get_indexer(ids)
+        missing = codes < 0
+        if missing.any():
+            new = pd.unique(ids[missing])
+            self.player_ids = np.concatenate([self.player_ids, new.astype(object)])
+            self._index = pd.Index(self.player_ids)
+            codes[missing] = self._index.get_indexer(ids[missing])
+            self.first_play = np.concatenate([self.first_play, np.full(len(new), -1, dtype=np.int64)])
+            self.bits = np.vstack([self.bits, np.zeros((len(new), self.bits.shape[1]), dtype=np.uint64)])
+        return codes
+
+    def _cover(self, lo: int, hi: int) -> None:
+        """Grow the day-indexed arrays so days lo..hi fit."""
+        if self.day0 is None:
+            self.day0 = lo
+        if lo < self.day0:
+            # prepend whole words, so existing bits keep their positions within a word
+            shift = -(-(self.day0 - lo) // WORD_BITS) * WORD_BITS
+            old_week0 = self.week0
+            self.day0 -= shift
+            self.bits = np.hstack([np.zeros((len(self.bits), shift // WORD_BITS), np.uint64), self.bits])
+            self.dau_counts = np.concatenate([np.zeros(shift, np.int64), self.dau_counts])
+            self.wau_counts = np.concatenate([np.zeros((old_week0 - self.week0) // 7, np.int64), self.wau_counts])
+            self.cohort = np.vstack([np.zeros((shift, self.cohort.shape[1]), np.int64), self.cohort])
+        n_days = max(hi - self.day0 + 1, self.n_days)
+        n_words = -(-n_days // WORD_BITS)
+        n_weeks = (int(cm.week_start(np.array([self.day0 + n_days - 1]))[0]) - self.week0) // 7 + 1
+        if n_words > self.bits.shape[1]:
+            self.bits = np.hstack([self.bits, np.zeros((len(self.bits), n_words - self.bits.shape[1]), np.uint64)])
+        self.dau_counts = np.pad(self.dau_counts, (0, n_days - len(self.dau_counts)))
+        self.wau_counts = np.pad(self.wau_counts, (0, n_weeks - len(self.wau_counts)))
+        self.cohort = np.pad(self.cohort, ((0, n_days - self.cohort.shape[0]), (0, n_days - self.cohort.shape[1])))
+
+    def _player_days(self, codes: np.ndarray) -> tuple:
+        """All (row in codes, relative day) pairs set in those players' bitmaps."""
+        flags = np.unpackbits(self.bits[codes].view(np.uint8), axis=1, bitorder="little")
+        rows, days = np.nonzero(flags[:, :self.n_days])
+        return rows, days
+
+    def _add_cohort(self, first: np.ndarray, day: np.ndarray, sign: int = 1) -> None:
+        n_rows, n_cols = self.cohort.shape
+        flat = first * n_cols + (day - first)
+        self.cohort += sign * np.bincount(flat, minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+
+    def ingest(self, sessions: pd.DataFrame) -> int:
+        """Fold a batch of sessions (player_id, session_date) into the rollup. Returns new (player, day) pairs."""
+        if len(sessions) == 0:
+            return 0
+        days = cm.day_numbers(sessions["session_date"])
+        self._cover(int(days.min()), int(days.max()))
+        codes = self._codes(np.asarray(sessions["player_id"], dtype=object)).astype(np.int64)
+
+        # distinct pairs, sorted by player then day; keep those not already in the bitmap
+        span = self.n_days
+        key = cm.sorted_unique(codes * span + (days - self.day0))
+        c, d = key // span, key % span
+        fresh = ~_bit(self.bits[c, d // WORD_BITS], d)
+        c, d = c[fresh], d[fresh]
+        if len(c) == 0:
+            return 0
+
+        # WAU: (player, week) pairs with no earlier bit anywhere in that week
+        ws = cm.week_start(d + self.day0) - self.day0
+        seen = np.zeros(len(c), dtype=bool)
+        for k in range(7):
+            dd = ws + k
+            ok = (dd >= 0) & (dd < span) & (dd != d)
+            seen[ok] |= _bit(self.bits[c[ok], dd[ok] // WORD_BITS], dd[ok])
+        n_weeks = len(self.wau_counts)
+        week_idx = (ws + self.day0 - self.week0) // 7
+        new_weeks = cm.sorted_unique(c[~seen] * n_weeks + week_idx[~seen]) % n_weeks
+        self.wau_counts += np.bincount(new_weeks, minlength=n_weeks)
+        self.dau_counts += np.bincount(d, minlength=span)
+
+        # first play: segment starts of the sorted pairs are each player's earliest new day
+        starts = np.flatnonzero(np.r_[True, c[1:] != c[:-1]])
+        players, new_first = c[starts], d[starts] + self.day0
+        old_first = self.first_play[players]
+        moved = (old_first < 0) | (new_first < old_first)
+        late = players[moved & (old_first >= 0)]
+        if len(late):
+            rows, pdays = self._player_days(late)
+            self._add_cohort(self.first_play[late][rows] - self.day0, pdays, sign=-1)
+
+        np.bitwise_or.at(self.bits, (c, d // WORD_BITS), np.uint64(1) << (d % WORD_BITS).astype(np.uint64))
+        self.first_play[players[moved]] = new_first[moved]
+
+        # cohort offsets: every day of a late player, only the new pairs of everyone else
+        keep = ~np.isin(c, late) if len(late) else np.ones(len(c), dtype=bool)
+        self._add_cohort(self.first_play[c[keep]] - self.day0, d[keep])
+        if len(late):
+            rows, pdays = self._player_days(late)
+            self._add_cohort(self.first_play[late][rows] - self.day0, pdays)
+        return len(c)
+
+    # --- metrics ---------------------------------------------------------------
+
+    def _dates(self, rel: np.ndarray, base: int) -> np.ndarray:
+        return (rel + base).astype("datetime64[D]").astype("datetime64[s]")
+
+    def dau(self) -> pd.DataFrame:
+        idx = np.flatnonzero(self.dau_counts)
+        return pd.DataFrame({"session_date": self._dates(idx, self.day0 or 0), "dau": self.dau_counts[idx]})
+
+    def wau(self) -> pd.DataFrame:
+        idx = np.flatnonzero(self.wau_counts)
+        week0 = self.week0 if self.day0 is not None else 0
+        return pd.DataFrame({"week_start": self._dates(idx * 7, week0), "wau": self.wau_counts[idx]})
+
+    def retention_curve(self, max_day: Optional[int] = None) -> pd.DataFrame:
+        """Players active N days after their first play, for every N (day_n 0 = all players), and the share."""
+        players = self.cohort.sum(axis=0)
+        players = players[:np.flatnonzero(players).max() + 1] if players.any() else players[:0]
+        if max_day is not None:
+            players = players[:max_day + 1]
+        total = players[0] if len(players) else 0
+        return pd.DataFrame({"day_n": np.arange(len(players)), "players": players,
+                             "share": players / total if total else np.nan})
+
+    def retention(self, days=cm.RETENTION_DAYS) -> pd.DataFrame:
+        """Query 3's row (total_players, day_N_retained)."""
+        players = self.cohort.sum(axis=0)
+        row = {"total_players": int(players[0]) if len(players) else 0}
+        for d in days:
+            row[f"day_{d}_retained"] = int(players[d]) if d < len(players) else 0
+        return pd.DataFrame([row])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Build or update the DAU/WAU/retention rollup and compare it to a full rescan")
+    ap.add_argument("--store", default=DEFAULT_STORE, help=".npz file holding the rollup")
+    ap.add_argument("--data-dir", default=cm.RAW_DIR, help="generated CSVs, or a parquet_sink output folder")
+    ap.add_argument("--rebuild", action="store_true", help="start from an empty store")
+    ap.add_argument("--daily", action="store_true", help="ingest and save one session_date at a time, as a daily job would")
+    args = ap.parse_args()
+
+    if args.rebuild and os.path.exists(args.store):
+        os.remove(args.store)
+    sessions = cm.load_tables(args.data_dir)["sessions"]
+    rollup = ActivityRollup.load(args.store)
+
+    t0 = time.perf_counter()
+    if args.daily:
+        per_day = []
+        for _, day in sessions.groupby("session_date", sort=True):
+            t = time.perf_counter()
+            rollup.ingest(day)
+            rollup.save(args.store)
+            per_day.append(time.perf_counter() - t)
+        print(f"ingested {len(per_day)} days: mean {1000 * np.mean(per_day):.1f} ms/day, "
+              f"max {1000 * np.max(per_day):.1f} ms/day (including save)")
+    else:
+        n = rollup.ingest(sessions)
+        rollup.save(args.store)
+        print(f"ingested {len(sessions):,} sessions ({n:,} new player-days) in {time.perf_counter() - t0:.2f}s")
+
+    t0 = time.perf_counter()
+    rollup = ActivityRollup.load(args.store)
+    t_load = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    served = {"dau": rollup.dau(), "wau": rollup.wau(), "retention": rollup.retention()}
+    t_served = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    activity = cm.player_days(sessions)
+    full = {"dau": cm.dau(activity), "wau": cm.wau(activity), "retention": cm.retention(activity)}
+    t_full = time.perf_counter() - t0
+
+    for name, df in served.items():
+        same = df.reset_index(drop=True).equals(full[name].reset_index(drop=True))
+        print(f"{name:<10} {'matches' if same else 'DIFFERS FROM'} the full rescan")
+    print(f"\nstore load {1000 * t_load:.0f} ms ({os.path.getsize(args.store) / 2**20:.1f} MB), "
+          f"metrics from rollup {1000 * t_served:.1f} ms; full rescan of {len(sessions):,} sessions {1000 * t_full:.0f} ms")
+    print(rollup.retention().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: core metrics at scale, local engine vs the SQL run in DuckDB.
+
+Builds the tables once (a fresh in-memory vectorized run, or --data-dir),
+then times every query of sql/02_core_metrics.sql both ways: the
+translated SQL in DuckDB (local_sql.py) and core_metrics.py. The engine's
+player_days() step is shared by DAU, WAU and retention and is timed on its
+own line.
+
+Usage:
+    python bench_core_metrics.py --players 1000000
+    python bench_core_metrics.py --data-dir /tmp/game_1m
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import pandas as pd
+
+import core_metrics as cm
+import local_sql
+from check_metric_parity import synthetic_tables
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--players", type=int, default=1_000_000)
+    ap.add_argument("--data-dir", help="use generated files instead of an in-memory run")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--skip-sql", action="store_true", help="only time the local engine")
+    args = ap.parse_args()
+
+    tables, dt = timed(lambda: cm.load_tables(args.data_dir) if args.data_dir else synthetic_tables(args.players, args.seed))
+    print(f"{len(tables['players']):,} players, {len(tables['sessions']):,} sessions, "
+          f"{len(tables['purchases']):,} purchases ({'loaded' if args.data_dir else 'generated'} in {dt:.1f}s)\n")
+
+    activity, t_pd = timed(cm.player_days, tables["sessions"])
+    engine = {
+        "1) Daily Active Users (DAU)": lambda: cm.dau(activity),
+        "2) Weekly Active Users (WAU)": lambda: cm.wau(activity),
+        "3) Retention: Day 1 / Day 7 / Day 30": lambda: cm.retention(activity),
+        "4) Average Revenue Per User (ARPU)": lambda: cm.arpu(tables["purchases"]),
+        "5) A/B Test: Control vs Variant (Engagement & Revenue)":
+            lambda: cm.ab_comparison(tables["feature_flags"], tables["sessions"], tables["purchases"]),
+    }
+    rows = [{"query": "player_days (shared)", "engine_s": t_pd}]
+    con = None if args.skip_sql else local_sql.connect(tables)
+    for title, sql in local_sql.split_queries():
+        row = {"query": title, "engine_s": timed(engine[title])[1]}
+        if con is not None:
+            row["duckdb_s"] = timed(lambda: con.execute(local_sql.to_duckdb(sql)).df())[1]
+        rows.append(row)
+    if con is not None:
+        con.close()
+
+    df = pd.DataFrame(rows)
+    total = df.drop(columns="query").sum().to_dict()
+    df = pd.concat([df, pd.DataFrame([{"query": "total", **total}])], ignore_index=True)
+    print(df.round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
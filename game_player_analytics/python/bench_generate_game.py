@@ -0,0 +1,63 @@
+"""
+Benchmark: end-to-end generate_game_data.py run time by player count and engine.
+
+Times the full pipeline per (players, engine): players, feature flags,
+sessions and purchases, written to a scratch directory in the chosen format.
+The per-player loop is skipped above --loop-max players (it runs at roughly
+2k players/sec).
+
+Usage:
+    python bench_generate_game.py
+    python bench_generate_game.py --players 1000 100000 1000000 --loop-max 100000 --format parquet
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+import generate_game_data as gd
+
+
+def run_once(n_players: int, engine: str, out_format: str, out_dir: str) -> dict:
+    argv = ["--players", str(n_players), "--engine", engine, "--format", out_format, "--out-dir", out_dir]
+    t0 = time.perf_counter()
+    gd.main(argv)
+    dt = time.perf_counter() - t0
+    size = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))
+    return {"players": n_players, "engine": engine, "seconds": round(dt, 3),
+            "players_per_sec": round(n_players / dt), "output_mb": round(size / 2**20, 1)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--players", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    ap.add_argument("--engines", nargs="+", choices=gd.ENGINES, default=list(gd.ENGINES))
+    ap.add_argument("--loop-max", type=int, default=100_000, help="largest player count to run the loop engine on")
+    ap.add_argument("--format", choices=gd.OUT_FORMATS, default="csv")
+    args = ap.parse_args()
+
+    defaults = gd.CFG
+    rows = []
+    for n in args.players:
+        for engine in args.engines:
+            if engine == "loop" and n > args.loop_max:
+                continue
+            out_dir = tempfile.mkdtemp(prefix="game_bench_")
+            try:
+                rows.append(run_once(n, engine, args.format, out_dir))
+            finally:
+                shutil.rmtree(out_dir, ignore_errors=True)
+                gd.CFG = defaults
+
+    print()
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
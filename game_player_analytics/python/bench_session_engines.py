@@ -0,0 +1,81 @@
+"""
+Benchmark: session/purchase simulation, per-player loop vs vectorized engine.
+
+Both engines get the same players and feature flags (same seed). The
+vectorized engine draws its random numbers in a different order, so rows
+differ; the summary statistics below should agree to within sampling noise.
+
+Usage:
+    python bench_session_engines.py --players 2000
+    python bench_session_engines.py --players 1000000 --skip-loop
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import generate_game_data as gd
+
+
+def summary(players: pd.DataFrame, flags: pd.DataFrame, sessions: pd.DataFrame, purchases: pd.DataFrame) -> dict:
+    signup = pd.to_datetime(players.set_index("player_id")["signup_date"])
+    day_n = (pd.to_datetime(sessions["session_date"]) - sessions["player_id"].map(signup)).dt.days
+    active_days = sessions.assign(day_n=day_n).drop_duplicates(["player_id", "day_n"])
+
+    def retention(d: int) -> float:
+        return active_days.loc[active_days["day_n"] == d, "player_id"].nunique() / len(players)
+
+    group = flags.set_index("player_id")["test_group"]
+    revenue = purchases.groupby("player_id")["revenue"].sum().reindex(players["player_id"], fill_value=0.0)
+    arpu = revenue.groupby(group.reindex(revenue.index).to_numpy()).mean()
+    return {
+        "sessions_per_player": len(sessions) / len(players),
+        "active_days_per_player": len(active_days) / len(players),
+        "session_length_mean": sessions["session_length_min"].mean(),
+        "levels_mean": sessions["levels_completed"].mean(),
+        "d1_retention": retention(1),
+        "d7_retention": retention(7),
+        "d30_retention": retention(30),
+        "purchases_per_1k_sessions": 1000 * len(purchases) / max(len(sessions), 1),
+        "revenue_mean": purchases["revenue"].mean(),
+        "cosmetic_share": (purchases["item_type"] == "Cosmetic").mean(),
+        "arpu": revenue.mean(),
+        "arpu_variant_vs_control": arpu.get("Variant", np.nan) / arpu.get("Control", np.nan),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--players", type=int, default=2000)
+    ap.add_argument("--batch-size", type=int, default=50_000)
+    ap.add_argument("--skip-loop", action="store_true", help="skip the slow per-player baseline")
+    args = ap.parse_args()
+
+    gd.CFG.n_players = args.players
+    engines = {
+        "vectorized": lambda rng, p, f: gd.generate_sessions_and_purchases_vectorized(rng, p, f, args.batch_size),
+    }
+    if not args.skip_loop:
+        engines = {"loop": gd.generate_sessions_and_purchases, **engines}
+
+    stats = {}
+    for name, engine in engines.items():
+        rng = np.random.default_rng(gd.CFG.seed)
+        players = gd.generate_players(rng)
+        flags = gd.generate_feature_flags(rng, players)
+        t0 = time.perf_counter()
+        sessions, purchases = engine(rng, players, flags)
+        dt = time.perf_counter() - t0
+        print(f"{name:<11} {dt:9.3f}s  {len(sessions):,} sessions  {len(purchases):,} purchases")
+        stats[name] = summary(players, flags, sessions, purchases)
+
+    print()
+    print(pd.DataFrame(stats).round(4).to_string())
+
+
+if __name__ == "__main__":
+    main()
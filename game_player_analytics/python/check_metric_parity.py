@@ -0,0 +1,90 @@
+"""
+Parity check: core_metrics.py against the SQL definitions in sql/02_core_metrics.sql.
+
+Runs every query of the .sql file through DuckDB (local_sql.py) and the
+same metric through the local engine, on the same tables, and compares
+them: counts exactly, rounded averages to within one unit of the last
+decimal (ROUND in SQL is half away from zero, numpy's is half to even).
+Exits 1 if any query differs.
+
+Usage:
+    python check_metric_parity.py
+    python check_metric_parity.py --data-dir /tmp/game_1m
+    python check_metric_parity.py --players 200000      # fresh vectorized run, in memory
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import core_metrics
+import local_sql
+
+
+def synthetic_tables(n_players: int, seed: int) -> dict:
+    import generate_game_data as gd
+
+    gd.CFG.n_players = n_players
+    rng = np.random.default_rng(seed)
+    players = gd.generate_players(rng)
+    flags = gd.generate_feature_flags(rng, players)
+    sessions, purchases = gd.generate_sessions_and_purchases_vectorized(rng, players, flags)
+    return {"players": players, "feature_flags": flags, "sessions": sessions, "purchases": purchases}
+
+
+def _normalise(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.reset_index(drop=True).copy()
+    for col in df.columns:
+        if col.endswith("_date") or col == "week_start":
+            df[col] = pd.to_datetime(df[col]).astype("datetime64[s]")
+        elif pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype(float)
+        else:
+            df[col] = df[col].astype(str)
+    return df.sort_values(list(df.columns[:1])).reset_index(drop=True)
+
+
+def compare(engine: pd.DataFrame, sql: pd.DataFrame) -> str:
+    """'' if they agree, else a short description of the first difference."""
+    a, b = _normalise(engine), _normalise(sql)
+    if list(a.columns) != list(b.columns):
+        return f"columns {list(a.columns)} vs {list(b.columns)}"
+    if len(a) != len(b):
+        return f"{len(a)} rows vs {len(b)}"
+    try:
+        pd.testing.assert_frame_equal(a, b, check_exact=False, atol=0.0101, rtol=0)
+    except AssertionError as exc:
+        return str(exc).splitlines()[0]
+    return ""
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--data-dir", default=core_metrics.RAW_DIR)
+    ap.add_argument("--players", type=int, help="check a fresh in-memory vectorized run instead of --data-dir")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    tables = synthetic_tables(args.players, args.seed) if args.players else core_metrics.load_tables(args.data_dir)
+    t0 = time.perf_counter()
+    sql_results = local_sql.run_file(tables)
+    t1 = time.perf_counter()
+    engine_results = core_metrics.core_metrics(tables)
+    t2 = time.perf_counter()
+
+    failed = 0
+    for title, expected in sql_results.items():
+        diff = compare(engine_results[title], expected)
+        failed += bool(diff)
+        print(f"{'FAIL' if diff else 'ok  '}  {title}{'  ' + diff if diff else ''}")
+    print(f"\n{len(tables['sessions']):,} sessions; DuckDB SQL {t1 - t0:.2f}s, local engine {t2 - t1:.2f}s")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Local engine for the core metrics in sql/02_core_metrics.sql.
+
+Computes DAU, WAU, D1/D7/D30 retention, ARPU and the Control-vs-Variant
+comparison from the generated tables (data/raw CSVs or the Parquet layout
+from parquet_sink.py), with no warehouse. Each function follows its query's
+definition exactly, so results can be checked against the SQL itself
+(check_metric_parity.py):
+
+- DAU / WAU: distinct players per session_date / per Sunday-start week
+- retention: days since each player's first session (not signup); the
+  denominator is players with at least one session
+- ARPU: revenue / distinct *purchasing* players, as the query divides by
+  COUNT(DISTINCT player_id) of the purchases rollup
+- A/B: per-player session and purchase totals joined to feature_flags,
+  averaged over every flagged player (ab_metrics.py)
+
+Players are interned to integer codes once (pd.factorize) and dates to day
+numbers; the session-derived metrics all work off one de-duplicated
+(player, day) array pair, built by player_days(). Aggregations are
+np.unique / np.bincount over those arrays, so a 1M-player run takes seconds.
+
+approximate_active_users() is the --approx mode: DAU / WAU / MAU from
+mergeable HyperLogLog sketches per day and segment (hll.py) instead of
+exact distinct counts.
+
+Usage:
+    python core_metrics.py
+    python core_metrics.py --data-dir /tmp/game_1m
+    python core_metrics.py --approx --segment signup_week
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from ab_metrics import ab_comparison
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RAW_DIR = os.path.join(HERE, "..", "data", "raw")
+TABLES = ("players", "feature_flags", "sessions", "purchases")
+RETENTION_DAYS = (1, 7, 30)
+
+# 1970-01-01 (day 0) was a Thursday; BigQuery's WEEK starts on Sunday
+_SUNDAY_SHIFT = 4
+
+
+def load_tables(data_dir: str = RAW_DIR) -> Dict[str, pd.DataFrame]:
+    """The four tables as DataFrames with datetime64 date columns; reads the Parquet layout if data_dir has one."""
+    import parquet_sink
+
+    if os.path.exists(os.path.join(data_dir, parquet_sink.MANIFEST)):
+        return {t: parquet_sink.read_table(data_dir, t) for t in TABLES}
+    dates = {"players": ["signup_date"], "sessions": ["session_date"], "purchases": ["purchase_date"]}
+    return {t: pd.read_csv(os.path.join(data_dir, f"{t}.csv"), parse_dates=dates.get(t, False)) for t in TABLES}
+
+
+def day_numbers(values) -> np.ndarray:
+    """Dates as int64 days since 1970-01-01."""
+    return pd.to_datetime(pd.Series(values)).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def week_start(days: np.ndarray) -> np.ndarray:
+    return days - (days + _SUNDAY_SHIFT) % 7
+
+
+def _dates(days: np.ndarray) -> np.ndarray:
+    return days.astype("datetime64[D]").astype("datetime64[s]")
+
+
+@dataclass(frozen=True)
+class PlayerDays:
+    """
+    Distinct (player, day) pairs with at least one session, sorted by
+    player then day. player is a code into players (the player_id values).
+    """
+
+    player: np.ndarray
+    day: np.ndarray
+    players: pd.Index
+
+
+def player_days(sessions: pd.DataFrame) -> PlayerDays:
+    codes, uniques = pd.factorize(sessions["player_id"])
+    days = day_numbers(sessions["session_date"])
+    if len(days) == 0:
+        return PlayerDays(np.empty(0, np.int64), np.empty(0, np.int64), pd.Index(uniques))
+    day0 = days.min()
+    span = int(days.max() - day0) + 1
+    key = sorted_unique(codes.astype(np.int64) * span + (days - day0))
+    return PlayerDays(key // span, key % span + day0, pd.Index(uniques))
+
+
+def sorted_unique(a: np.ndarray) -> np.ndarray:
+    """np.unique for int arrays via sort + adjacent compare (sessions arrive nearly sorted, so this is cheap)."""
+    a = np.sort(a)
+    return a[np.r_[True, a[1:] != a[:-1]]] if len(a) else a
+
+
+def _distinct_per(bucket: np.ndarray, activity: PlayerDays) -> tuple:
+    """
+    (bucket values, distinct players per bucket), for a bucket per pair that
+    never decreases along a player's days (e.g. week_start): a player's
+    pairs in one bucket are then adjacent, so no sort is needed.
+    """
+    if len(bucket) == 0:
+        return bucket, bucket
+    p = activity.player
+    new = np.r_[True, (p[1:] != p[:-1]) | (bucket[1:] != bucket[:-1])]
+    lo = bucket.min()
+    counts = np.bincount(bucket[new] - lo)
+    nz = np.flatnonzero(counts)
+    return nz + lo, counts[nz]
+
+
+def dau(activity: PlayerDays) -> pd.DataFrame:
+    """Query 1: distinct players per session_date."""
+    if len(activity.day) == 0:
+        return pd.DataFrame({"session_date": _dates(activity.day), "dau": activity.day})
+    day0 = activity.day.min()
+    counts = np.bincount(activity.day - day0)  # pairs are already distinct
+    days = np.flatnonzero(counts)
+    n = counts[days]
+    days = days + day0
+    return pd.DataFrame({"session_date": _dates(days), "dau": n})
+
+
+def wau(activity: PlayerDays) -> pd.DataFrame:
+    """Query 2: distinct players per Sunday-start week."""
+    weeks, n = _distinct_per(week_start(activity.day), activity)
+    return pd.DataFrame({"week_start": _dates(weeks), "wau": n})
+
+
+def first_play_day(activity: PlayerDays) -> np.ndarray:
+    """First session day per player code (pairs are sorted by player, then day)."""
+    player = activity.player
+    starts = np.flatnonzero(np.r_[True, player[1:] != player[:-1]]) if len(player) else np.empty(0, int)
+    first = np.empty(len(activity.players), dtype=np.int64)
+    first[activity.player[starts]] = activity.day[starts]
+    return first
+
+
+def retention(activity: PlayerDays, days=RETENTION_DAYS) -> pd.DataFrame:
+    """Query 3: players active exactly N days after their first session."""
+    since_first = activity.day - first_play_day(activity)[activity.player]
+    row = {"total_players": int(np.count_nonzero(np.bincount(activity.player, minlength=len(activity.players))))}
+    for d in days:
+        row[f"day_{d}_retained"] = int((since_first == d).sum())
+    return pd.DataFrame([row])
+
+
+def arpu(purchases: pd.DataFrame) -> pd.DataFrame:
+    """Query 4: total revenue / distinct purchasing players."""
+    n = purchases["player_id"].nunique()
+    value = round(float(purchases["revenue"].sum()) / n, 2) if n else np.nan
+    return pd.DataFrame({"arpu": [value]})
+
+
+def core_metrics(tables: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """All five queries, keyed like local_sql.split_queries() titles."""
+    activity = player_days(tables["sessions"])
+    return {
+        "1) Daily Active Users (DAU)": dau(activity),
+        "2) Weekly Active Users (WAU)": wau(activity),
+        "3) Retention: Day 1 / Day 7 / Day 30": retention(activity),
+        "4) Average Revenue Per User (ARPU)": arpu(tables["purchases"]),
+        "5) A/B Test: Control vs Variant (Engagement & Revenue)": ab_comparison(
+            tables["feature_flags"], tables["sessions"], tables["purchases"]),
+    }
+
+
+def approximate_active_users(tables: Dict[str, pd.DataFrame], segment: Optional[str] = None,
+                             p: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """
+    DAU / WAU / MAU estimated from HyperLogLog sketches, plus per-segment
+    WAU when segment is given (a players column or 'signup_week').
+    """
+    import hll
+
+    sessions = tables["sessions"]
+    labels = hll.segment_labels(sessions, tables["players"], segment) if segment else None
+    sketches = hll.DailySketches.from_sessions(sessions, labels, p or hll.P)
+    out = {"DAU (approx)": sketches.dau(), "WAU (approx)": sketches.wau(), "MAU (approx)": sketches.mau()}
+    if segment:
+        out[f"WAU by {segment} (approx)"] = sketches.by_segment("week")
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compute the sql/02_core_metrics.sql metrics locally")
+    ap.add_argument("--data-dir", default=RAW_DIR, help="generated CSVs, or a parquet_sink output folder")
+    ap.add_argument("--approx", action="store_true", help="HyperLogLog DAU/WAU/MAU instead of the exact queries")
+    ap.add_argument("--segment", help="with --approx: also WAU per players column or 'signup_week'")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    tables = load_tables(args.data_dir)
+    t1 = time.perf_counter()
+    results = approximate_active_users(tables, args.segment) if args.approx else core_metrics(tables)
+    t2 = time.perf_counter()
+
+    for title, df in results.items():
+        print(f"\n-- {title}")
+        print(df.to_string(index=False) if len(df) <= 20 else df.to_string(index=False, max_rows=20))
+    print(f"\nload {t1 - t0:.2f}s, metrics {t2 - t1:.2f}s ({len(tables['sessions']):,} sessions)")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,12 @@ Outputs (created in ./data/raw):
 - purchases.csv
 - feature_flags.csv
 
+Every setting lives in Config; the CLI overrides any of them:
+    python generate_game_data.py
+    python generate_game_data.py --players 1000000 --engine vectorized --format parquet
+    python generate_game_data.py --players 10000000 --engine vectorized --shards 8 --out-dir /tmp/game_10m
+    python generate_game_data.py --start-date 2025-07-01 --end-date 2025-12-31 --seed 7
+
 Designed for portfolio use:
 - Player-level dimension table
 - Session telemetry table
@@ -16,10 +22,12 @@ Designed for portfolio use:
 
 from __future__ import annotations
 
+import argparse
 import os
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, replace
 from datetime import date, timedelta
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -39,11 +47,38 @@ class Config:
     feature_name: str = "New_UI"
     variant_share: float = 0.5  # 50/50 split
 
-    # Output path
+    # Generation: "loop" reproduces data/raw exactly; "vectorized" runs the
+    # same model in player batches (needed for 100k+ players)
+    engine: str = "loop"
+    batch_size: int = 50_000
+    shards: int = 1  # >1: split players across a process pool (shard_runner.py)
+    workers: Optional[int] = None
+
+    # Output
     out_dir: str = os.path.join("data", "raw")
+    out_format: str = "csv"
 
 
 CFG = Config()
+ENGINES = ("loop", "vectorized")
+OUT_FORMATS = ("csv", "parquet")
+
+# baseline tendencies by platform/channel
+PLATFORM_SESSION_MULT = {"PC": 1.0, "Console": 0.92}
+CHANNEL_RETENTION_MULT = {"Organic": 1.05, "Paid": 0.98, "Influencer": 1.02}
+
+# store catalogue: price points and how often each sells
+ITEM_TYPES = ["Cosmetic", "Boost"]
+ITEM_TYPE_P = [0.72, 0.28]
+COSMETIC_PRICES = [2.99, 4.99, 9.99, 14.99, 19.99]
+COSMETIC_P = [0.28, 0.32, 0.24, 0.12, 0.04]
+BOOST_PRICES = [0.99, 1.99, 3.99, 7.99, 12.99]
+BOOST_P = [0.25, 0.30, 0.25, 0.15, 0.05]
+MAX_ACTIVE_DAYS = 120
+
+# base daily play probability by days since signup (slower decay = better retention)
+DAY_OFFSETS = np.arange(MAX_ACTIVE_DAYS + 1)
+PLAY_DECAY = 0.42 * np.exp(-DAY_OFFSETS / 18.0)
 
 
 # -----------------------------
@@ -133,9 +168,8 @@ def generate_sessions_and_purchases(
     session_counter = 1
     purchase_counter = 1
 
-    # baseline tendencies by platform/channel
-    platform_session_mult = {"PC": 1.0, "Console": 0.92}
-    channel_retention_mult = {"Organic": 1.05, "Paid": 0.98, "Influencer": 1.02}
+    platform_session_mult = PLATFORM_SESSION_MULT
+    channel_retention_mult = CHANNEL_RETENTION_MULT
 
     for _, row in players.iterrows():
         pid = row["player_id"]
@@ -154,22 +188,19 @@ def generate_sessions_and_purchases(
         base_session_len = rng.normal(loc=32, scale=10) * group_engagement_mult
         base_session_len = max(8, base_session_len)
 
-        # how long they "stick around" (caps total active window)
-        max_active_days = clamp_int(rng.normal(loc=35, scale=18) * group_retention_mult, 5, 120)
-
-        # generate activity day by day
-        end_active = min(CFG.end_date, signup + timedelta(days=max_active_days))
+        # how long they "stick around" (caps total active window), in whole days
+        max_active_days = int(np.clip(rng.normal(loc=35, scale=18) * group_retention_mult, 5, MAX_ACTIVE_DAYS))
 
-        # we bias against sessions too close to end_date beyond active window
-        active_days = daterange(signup, end_active)
+        # generate activity day by day, as integer offsets from signup;
+        # no sessions past end_date or past the active window
+        last_offset = min(max_active_days, (CFG.end_date - signup).days)
 
-        for d in active_days:
-            days_since_signup = (d - signup).days
+        for offset in range(last_offset + 1):
+            d = signup + timedelta(days=offset)
 
             # retention probability decays over time (fast early drop-off)
             # This yields realistic D1/D7/D30 retention patterns.
-            decay = np.exp(-days_since_signup / 18.0)  # slower decay = better retention
-            play_prob = 0.42 * decay
+            play_prob = PLAY_DECAY[offset]
 
             # modifiers
             play_prob *= platform_session_mult[platform]
@@ -225,12 +256,12 @@ def generate_sessions_and_purchases(
                         purchase_id = f"PU{str(purchase_counter).zfill(7)}"
                         purchase_counter += 1
 
-                        item_type = rng.choice(["Cosmetic", "Boost"], p=[0.72, 0.28])
+                        item_type = rng.choice(ITEM_TYPES, p=ITEM_TYPE_P)
                         # revenue distribution: mostly small, sometimes medium, rarely high
                         if item_type == "Cosmetic":
-                            revenue = rng.choice([2.99, 4.99, 9.99, 14.99, 19.99], p=[0.28, 0.32, 0.24, 0.12, 0.04])
+                            revenue = rng.choice(COSMETIC_PRICES, p=COSMETIC_P)
                         else:
-                            revenue = rng.choice([0.99, 1.99, 3.99, 7.99, 12.99], p=[0.25, 0.30, 0.25, 0.15, 0.05])
+                            revenue = rng.choice(BOOST_PRICES, p=BOOST_P)
 
                         # whales can buy bigger items
                         if whale_factor > 1.0 and rng.random() < 0.25:
@@ -262,189 +293,272 @@ def generate_sessions_and_purchases(
     return sessions, purchases
 
 
-def main() -> None:
-    rng = np.random.default_rng(CFG.seed)
-    ensure_out_dir(CFG.out_dir)
-
-    players = generate_players(rng)
-    flags = generate_feature_flags(rng, players)
-    sessions, purchases = generate_sessions_and_purchases(rng, players, flags)
-
-    # Save CSVs
-    players.to_csv(os.path.join(CFG.out_dir, "players.csv"), index=False)
-    flags.to_csv(os.path.join(CFG.out_dir, "feature_flags.csv"), index=False)
-    sessions.to_csv(os.path.join(CFG.out_dir, "sessions.csv"), index=False)
-    purchases.to_csv(os.path.join(CFG.out_dir, "purchases.csv"), index=False)
-
-    # Tiny summary printout (so you know it worked)
-    print("✅ Data generated!")
-    print(f"players:        {len(players):,}")
-    print(f"feature_flags:  {len(flags):,}")
-    print(f"sessions:       {len(sessions):,}")
-    print(f"purchases:      {len(purchases):,}")
-    print(f"Saved to:       {CFG.out_dir}/")
-
-def main() -> None:
-    import os
-    import numpy as np
-    import pandas as pd
-    from datetime import date
-
-    print("Starting data generation...")
-
-    # ----- Settings -----
-    seed = 870
-    n_players = 1000
-    start_date = date(2025, 10, 1)
-    end_date = date(2026, 1, 31)
-    feature_name = "New_UI"
-    variant_share = 0.5
+SESSION_COLUMNS = ["session_id", "player_id", "session_date", "session_length_min", "levels_completed"]
+PURCHASE_COLUMNS = ["purchase_id", "player_id", "purchase_date", "revenue", "item_type"]
 
-    out_dir = os.path.join("data", "raw")
-    os.makedirs(out_dir, exist_ok=True)
 
-    rng = np.random.default_rng(seed)
+def _ids(prefix: str, start: int, count: int) -> np.ndarray:
+    # "S0000001"-style IDs for counters start .. start + count - 1
+    return (prefix + pd.Series(np.arange(start, start + count)).astype(str).str.zfill(7)).to_numpy(dtype=object)
 
-    # ----- Create players -----
-    player_ids = [f"P{str(i).zfill(5)}" for i in range(1, n_players + 1)]
-    all_days = pd.date_range(start_date, end_date, freq="D").date
 
-    # more signups early
-    weights = np.linspace(1.4, 0.8, num=len(all_days))
-    weights = weights / weights.sum()
-    signup_dates = rng.choice(all_days, size=n_players, p=weights)
+def _player_arrays(players: pd.DataFrame, flags: pd.DataFrame, end_date: date) -> dict:
+    """Per-player lookups the vectorized engine needs, as aligned arrays."""
+    group = pd.Series(flags["test_group"].to_numpy(), index=flags["player_id"]).reindex(players["player_id"]).to_numpy()
+    variant = group == "Variant"
+    ret_mult = np.where(variant, 1.06, 1.00)
+    signup = pd.to_datetime(players["signup_date"]).to_numpy().astype("datetime64[D]")
+    return {
+        "pids": players["player_id"].to_numpy(dtype=object),
+        "variant": variant,
+        "ret_mult": ret_mult,
+        "eng_mult": np.where(variant, 1.04, 1.00),
+        "base_mult": (
+            players["platform"].map(PLATFORM_SESSION_MULT).to_numpy(dtype=float)
+            * players["acquisition_channel"].map(CHANNEL_RETENTION_MULT).to_numpy(dtype=float)
+            * ret_mult
+        ),
+        "signup": signup,
+        "days_left": (np.datetime64(end_date, "D") - signup).astype(np.int64),
+    }
 
-    def wchoice(items, probs, size):
-        return rng.choice(items, size=size, p=np.array(probs) / np.sum(probs))
 
-    players = pd.DataFrame(
+def _simulate_batch(rng: np.random.Generator, pa: dict, sl: slice) -> dict:
+    """
+    One player batch of the session/purchase model, as arrays. s_player
+    indexes into the batch; b_idx indexes into the batch's sessions.
+    """
+    n = sl.stop - sl.start
+    eng_mult, variant = pa["eng_mult"][sl], pa["variant"][sl]
+
+    affinity = rng.lognormal(mean=0.0, sigma=0.35, size=n)
+    base_len = np.maximum(8, rng.normal(loc=32, scale=10, size=n) * eng_mult)
+    max_active = np.trunc(np.clip(rng.normal(loc=35, scale=18, size=n) * pa["ret_mult"][sl], 5, MAX_ACTIVE_DAYS))
+    last_day = np.minimum(max_active, pa["days_left"][sl])
+
+    # players x days-since-signup play probabilities, masked to each active window
+    play_prob = np.clip(PLAY_DECAY[None, :] * (pa["base_mult"][sl] * np.minimum(1.35, affinity))[:, None], 0.02, 0.75)
+    played = (rng.random(play_prob.shape) < play_prob) & (DAY_OFFSETS[None, :] <= last_day[:, None])
+    p_idx, day = np.nonzero(played)
+
+    per_day = (
+        1
+        + (rng.random(len(p_idx)) < 0.12 * eng_mult[p_idx] * np.minimum(1.2, affinity[p_idx]))
+        + (rng.random(len(p_idx)) < 0.03)
+    )
+    s_player = np.repeat(p_idx, per_day)
+    m = len(s_player)
+
+    s_len = np.rint(rng.normal(loc=base_len[s_player], scale=9) * np.minimum(1.4, affinity[s_player]))
+    s_len = np.clip(s_len, 5, 180).astype(np.int64)
+    levels = np.clip(np.rint(rng.normal(loc=s_len / 12, scale=1.2)), 0, 20).astype(np.int64)
+
+    base_p = (0.015 + s_len / 3000.0) * np.where(variant[s_player], 1.10, 1.0)
+    whale = rng.random(m) < 0.03
+    bought = rng.random(m) < np.clip(base_p * np.where(whale, 2.2, 1.0), 0.0, 0.12)
+    b_idx = np.flatnonzero(bought)
+    k = len(b_idx)
+
+    cosmetic = rng.random(k) < ITEM_TYPE_P[0]
+    revenue = np.where(
+        cosmetic,
+        np.array(COSMETIC_PRICES)[rng.choice(len(COSMETIC_PRICES), size=k, p=COSMETIC_P)],
+        np.array(BOOST_PRICES)[rng.choice(len(BOOST_PRICES), size=k, p=BOOST_P)],
+    )
+    upsized = whale[b_idx] & (rng.random(k) < 0.25)
+    revenue = np.where(upsized, revenue * rng.choice([2, 3], size=k, p=[0.7, 0.3]), revenue).round(2)
+
+    return {
+        "s_player": s_player,
+        "s_date": pa["signup"][sl][s_player] + np.repeat(day, per_day),
+        "s_len": s_len,
+        "levels": levels,
+        "b_idx": b_idx,
+        "revenue": revenue,
+        "cosmetic": cosmetic,
+    }
+
+
+def _batch_frames(sim: dict, pids: np.ndarray, first_session: int, first_purchase: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    s_player, b_idx = sim["s_player"], sim["b_idx"]
+    sessions = pd.DataFrame(
         {
-            "player_id": player_ids,
-            "signup_date": signup_dates,
-            "region": wchoice(["NA", "EU", "APAC"], [0.52, 0.30, 0.18], n_players),
-            "platform": wchoice(["PC", "Console"], [0.62, 0.38], n_players),
-            "acquisition_channel": wchoice(["Organic", "Paid", "Influencer"], [0.55, 0.30, 0.15], n_players),
-        }
+            "session_id": _ids("S", first_session, len(s_player)),
+            "player_id": pids[s_player],
+            "session_date": sim["s_date"],
+            "session_length_min": sim["s_len"],
+            "levels_completed": sim["levels"],
+        },
+        columns=SESSION_COLUMNS,
     )
-
-    # ----- Feature flags (A/B test) -----
-    flags = pd.DataFrame(
+    purchases = pd.DataFrame(
         {
-            "player_id": players["player_id"],
-            "test_group": rng.choice(["Control", "Variant"], size=n_players, p=[1 - variant_share, variant_share]),
-            "feature_name": feature_name,
-        }
+            "purchase_id": _ids("PU", first_purchase, len(b_idx)),
+            "player_id": pids[s_player[b_idx]],
+            "purchase_date": sim["s_date"][b_idx],
+            "revenue": sim["revenue"],
+            "item_type": np.where(sim["cosmetic"], ITEM_TYPES[0], ITEM_TYPES[1]),
+        },
+        columns=PURCHASE_COLUMNS,
     )
-    group_map = dict(zip(flags["player_id"], flags["test_group"]))
-
-    # ----- Sessions + purchases -----
-    sessions_rows = []
-    purchases_rows = []
-    session_counter = 1
-    purchase_counter = 1
-
-    platform_mult = {"PC": 1.0, "Console": 0.92}
-    channel_mult = {"Organic": 1.05, "Paid": 0.98, "Influencer": 1.02}
-
-    for _, pr in players.iterrows():
-        pid = pr["player_id"]
-        signup = pr["signup_date"]
-        platform = pr["platform"]
-        channel = pr["acquisition_channel"]
-        group = group_map[pid]
-
-        group_ret_mult = 1.06 if group == "Variant" else 1.00
-        group_eng_mult = 1.04 if group == "Variant" else 1.00
-
-        affinity = float(rng.lognormal(mean=0.0, sigma=0.35))
-        base_len = max(8, float(rng.normal(loc=32, scale=10)) * group_eng_mult)
-
-        max_active_days = int(np.clip(rng.normal(loc=35, scale=18) * group_ret_mult, 5, 120))
-        active_end = min(end_date, (pd.to_datetime(signup) + pd.Timedelta(days=max_active_days)).date())
-
-        active_days = pd.date_range(signup, active_end, freq="D").date
-
-        for d in active_days:
-            days_since = (pd.to_datetime(d) - pd.to_datetime(signup)).days
-            decay = float(np.exp(-days_since / 18.0))
-            play_prob = 0.42 * decay
-            play_prob *= platform_mult[platform]
-            play_prob *= channel_mult[channel]
-            play_prob *= group_ret_mult
-            play_prob *= min(1.35, affinity)
-            play_prob = float(np.clip(play_prob, 0.02, 0.75))
-
-            if rng.random() < play_prob:
-                sessions_today = 1
-                if rng.random() < (0.12 * group_eng_mult * min(1.2, affinity)):
-                    sessions_today += 1
-                if rng.random() < 0.03:
-                    sessions_today += 1
-
-                for _ in range(sessions_today):
-                    sid = f"S{str(session_counter).zfill(7)}"
-                    session_counter += 1
+    return sessions, purchases
 
-                    s_len = float(rng.normal(loc=base_len, scale=9)) * min(1.4, affinity)
-                    s_len = int(np.clip(round(s_len), 5, 180))
-                    levels = int(np.clip(round(rng.normal(loc=s_len / 12, scale=1.2)), 0, 20))
 
-                    sessions_rows.append(
-                        {
-                            "session_id": sid,
-                            "player_id": pid,
-                            "session_date": d,
-                            "session_length_min": s_len,
-                            "levels_completed": levels,
-                        }
-                    )
+def iter_sessions_and_purchases(
+    rng: np.random.Generator,
+    players: pd.DataFrame,
+    flags: pd.DataFrame,
+    batch_size: int = 50_000,
+    first_session: int = 1,
+    first_purchase: int = 1,
+    end_date: date | None = None,
+):
+    """
+    Vectorized version of generate_sessions_and_purchases (same model),
+    yielding (sessions, purchases) one player batch at a time.
+
+    Per batch: player parameters are drawn as arrays, daily play
+    probabilities form a players x days-since-signup matrix, and sessions
+    and purchases are expanded from it with np.nonzero / np.repeat. Rows
+    come out in the loop's order (player, then day, then session). IDs keep
+    counting across batches from first_session / first_purchase.
+    Dates are datetime64 columns, written to CSV as YYYY-MM-DD like the loop's.
+    """
+    pa = _player_arrays(players, flags, end_date or CFG.end_date)
+    next_session, next_purchase = first_session, first_purchase
+    for lo in range(0, len(players), batch_size):
+        sim = _simulate_batch(rng, pa, slice(lo, min(lo + batch_size, len(players))))
+        sessions, purchases = _batch_frames(sim, pa["pids"][lo:lo + batch_size], next_session, next_purchase)
+        next_session += len(sessions)
+        next_purchase += len(purchases)
+        yield sessions, purchases
 
-                    # purchase probability
-                    base_p = 0.015 + (s_len / 3000.0)
-                    if group == "Variant":
-                        base_p *= 1.10
 
-                    whale = 2.2 if rng.random() < 0.03 else 1.0
-                    p_prob = float(np.clip(base_p * whale, 0.0, 0.12))
+def count_sessions_and_purchases(
+    rng: np.random.Generator,
+    players: pd.DataFrame,
+    flags: pd.DataFrame,
+    batch_size: int = 50_000,
+    end_date: date | None = None,
+) -> Tuple[int, int]:
+    """Row counts iter_sessions_and_purchases() would produce for the same rng state, without building frames."""
+    pa = _player_arrays(players, flags, end_date or CFG.end_date)
+    n_sessions = n_purchases = 0
+    for lo in range(0, len(players), batch_size):
+        sim = _simulate_batch(rng, pa, slice(lo, min(lo + batch_size, len(players))))
+        n_sessions += len(sim["s_player"])
+        n_purchases += len(sim["b_idx"])
+    return n_sessions, n_purchases
+
+
+def generate_sessions_and_purchases_vectorized(
+    rng: np.random.Generator,
+    players: pd.DataFrame,
+    flags: pd.DataFrame,
+    batch_size: int = 50_000,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """All batches of iter_sessions_and_purchases() in one pair of DataFrames."""
+    batches = list(iter_sessions_and_purchases(rng, players, flags, batch_size))
+    if not batches:
+        return pd.DataFrame(columns=SESSION_COLUMNS), pd.DataFrame(columns=PURCHASE_COLUMNS)
+    sessions = pd.concat([b[0] for b in batches], ignore_index=True)
+    purchases = pd.concat([b[1] for b in batches], ignore_index=True)
+    return sessions, purchases
 
-                    if rng.random() < p_prob:
-                        puid = f"PU{str(purchase_counter).zfill(7)}"
-                        purchase_counter += 1
 
-                        item_type = rng.choice(["Cosmetic", "Boost"], p=[0.72, 0.28])
-                        if item_type == "Cosmetic":
-                            revenue = float(rng.choice([2.99, 4.99, 9.99, 14.99, 19.99], p=[0.28, 0.32, 0.24, 0.12, 0.04]))
-                        else:
-                            revenue = float(rng.choice([0.99, 1.99, 3.99, 7.99, 12.99], p=[0.25, 0.30, 0.25, 0.15, 0.05]))
+def write_parquet(rng: np.random.Generator, players: pd.DataFrame, flags: pd.DataFrame, cfg: Config) -> Tuple[int, int]:
+    """
+    Month-partitioned Parquet via parquet_sink. The vectorized engine streams
+    each player batch straight to the writer, so the full sessions/purchases
+    tables are never held in memory. Returns (sessions, purchases) row counts.
+    """
+    from parquet_sink import TelemetryParquetWriter
+
+    with TelemetryParquetWriter(cfg.out_dir) as sink:
+        sink.write_frame("players", players)
+        sink.write_frame("feature_flags", flags)
+        if cfg.engine == "vectorized":
+            for sessions, purchases in iter_sessions_and_purchases(rng, players, flags, cfg.batch_size):
+                sink.write(sessions, purchases)
+        else:
+            sink.write(*generate_sessions_and_purchases(rng, players, flags))
+    return sink.manifest["sessions"]["rows"], sink.manifest["purchases"]["rows"]
+
+
+def parse_config(argv=None) -> Config:
+    """CLI overrides on top of the Config defaults."""
+    ap = argparse.ArgumentParser(description="Generate simulated game telemetry (players, flags, sessions, purchases)")
+    ap.add_argument("--players", type=int, default=CFG.n_players, help="number of players")
+    ap.add_argument("--start-date", type=date.fromisoformat, default=CFG.start_date, help="first signup day (YYYY-MM-DD)")
+    ap.add_argument("--end-date", type=date.fromisoformat, default=CFG.end_date, help="last simulated day (YYYY-MM-DD)")
+    ap.add_argument("--seed", type=int, default=CFG.seed)
+    ap.add_argument("--format", choices=OUT_FORMATS, default=CFG.out_format,
+                    help="csv, or month-partitioned parquet with a _manifest.json (parquet_sink.py)")
+    ap.add_argument("--engine", choices=ENGINES, default=CFG.engine,
+                    help="loop reproduces data/raw exactly; vectorized is the same model in player batches")
+    ap.add_argument("--batch-size", type=int, default=CFG.batch_size, help="players per vectorized batch")
+    ap.add_argument("--shards", type=int, default=CFG.shards, help="split players across this many processes")
+    ap.add_argument("--workers", type=int, default=CFG.workers, help="worker processes for --shards")
+    ap.add_argument("--out-dir", default=CFG.out_dir)
+    args = ap.parse_args(argv)
+
+    if args.end_date < args.start_date:
+        ap.error("--end-date is before --start-date")
+    if args.shards > 1 and (args.engine != "vectorized" or args.format != "csv"):
+        ap.error("--shards needs --engine vectorized and --format csv")
+    return replace(
+        CFG,
+        n_players=args.players,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        seed=args.seed,
+        out_format=args.format,
+        engine=args.engine,
+        batch_size=args.batch_size,
+        shards=args.shards,
+        workers=args.workers,
+        out_dir=args.out_dir,
+    )
 
-                        if whale > 1.0 and rng.random() < 0.25:
-                            revenue *= float(rng.choice([2, 3], p=[0.7, 0.3]))
 
-                        purchases_rows.append(
-                            {
-                                "purchase_id": puid,
-                                "player_id": pid,
-                                "purchase_date": d,
-                                "revenue": round(revenue, 2),
-                                "item_type": item_type,
-                            }
-                        )
+def main(argv=None) -> None:
+    global CFG
+    CFG = parse_config(argv)
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(CFG.seed)
+    ensure_out_dir(CFG.out_dir)
 
-    sessions = pd.DataFrame(sessions_rows)
-    purchases = pd.DataFrame(purchases_rows)
+    players = generate_players(rng)
+    flags = generate_feature_flags(rng, players)
 
-    # ----- Save CSVs -----
-    players.to_csv(os.path.join(out_dir, "players.csv"), index=False)
-    flags.to_csv(os.path.join(out_dir, "feature_flags.csv"), index=False)
-    sessions.to_csv(os.path.join(out_dir, "sessions.csv"), index=False)
-    purchases.to_csv(os.path.join(out_dir, "purchases.csv"), index=False)
+    if CFG.out_format == "parquet":
+        n_sessions, n_purchases = write_parquet(rng, players, flags, CFG)
+    elif CFG.shards > 1:
+        from shard_runner import generate_sharded, merge_parts  # imports this module
+
+        players.to_csv(os.path.join(CFG.out_dir, "players.csv"), index=False)
+        flags.to_csv(os.path.join(CFG.out_dir, "feature_flags.csv"), index=False)
+        summary = generate_sharded(players, flags, CFG.out_dir, CFG.shards, CFG.seed, CFG.end_date,
+                                   workers=CFG.workers, batch_size=CFG.batch_size)
+        for table in ("sessions", "purchases"):
+            merge_parts(CFG.out_dir, table, CFG.shards)
+        n_sessions, n_purchases = int(summary["sessions"].sum()), int(summary["purchases"].sum())
+    else:
+        if CFG.engine == "vectorized":
+            sessions, purchases = generate_sessions_and_purchases_vectorized(rng, players, flags, CFG.batch_size)
+        else:
+            sessions, purchases = generate_sessions_and_purchases(rng, players, flags)
+        for name, df in (("players", players), ("feature_flags", flags), ("sessions", sessions), ("purchases", purchases)):
+            df.to_csv(os.path.join(CFG.out_dir, f"{name}.csv"), index=False)
+        n_sessions, n_purchases = len(sessions), len(purchases)
 
+    # Tiny summary printout (so you know it worked)
     print("✅ Data generated!")
     print(f"players:        {len(players):,}")
     print(f"feature_flags:  {len(flags):,}")
-    print(f"sessions:       {len(sessions):,}")
-    print(f"purchases:      {len(purchases):,}")
-    print(f"Saved to:       {out_dir}/")
+    print(f"sessions:       {n_sessions:,}")
+    print(f"purchases:      {n_purchases:,}")
+    print(f"Saved to:       {CFG.out_dir}/ ({CFG.out_format}, {time.perf_counter() - t0:.1f}s)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,223 @@
+"""
+HyperLogLog sketches for approximate distinct-player counts.
+
+The exact DAU / WAU in sql/02_core_metrics.sql need every distinct
+(player, day) pair in memory at once. A HyperLogLog sketch keeps
+m = 2**p one-byte registers instead (16 KB at the default p = 14) and
+estimates the number of distinct ids added to it with a relative
+standard error of about 1.04 / sqrt(m) (0.81% at p = 14). Sketches merge
+by taking the register-wise maximum, and the union of any set of
+sketches estimates the distinct count of the union. So:
+
+- DailySketches keeps one sketch per (day, segment), e.g. per day and
+  signup-week cohort, or per day and platform
+- WAU / MAU / any date window = merge of the day sketches in it
+- cross-segment unions (all platforms, a group of cohorts) = merge
+  across segments; no rescan of sessions
+
+Sketches from separate batches, shards or days merge the same way
+(DailySketches.merge), so they can be built incrementally.
+
+player_id is hashed with pandas' 64-bit hash_array, once per distinct
+player. The first p bits pick the register, and the rank of the first
+1-bit in the remaining 64 - p bits is the value stored. estimate() uses
+Ertl's improved estimator ("New cardinality estimation algorithms for
+HyperLogLog sketches", 2017) over the histogram of register values: no
+empirical bias tables, no switch to linear counting, and 64-bit hashes
+make a large-range correction unnecessary.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from core_metrics import day_numbers, week_start
+
+P = 14
+# segment of sessions whose player has no players row (or no value in the segment column)
+UNKNOWN_SEGMENT = "unknown"
+
+
+def relative_error(p: int = P) -> float:
+    """Standard error of an estimate, relative to the true count."""
+    return 1.04 / np.sqrt(2 ** p)
+
+
+def hash_ids(ids) -> np.ndarray:
+    """64-bit hash per id; each distinct id is hashed once."""
+    codes, uniques = pd.factorize(np.asarray(ids, dtype=object))
+    return pd.util.hash_array(np.asarray(uniques, dtype=object))[codes]
+
+
+def _floor_log2(x: np.ndarray) -> np.ndarray:
+    """floor(log2(x)) for uint64 x > 0, exact (frexp on the two 32-bit halves)."""
+    hi = (x >> np.uint64(32)).astype(np.float64)
+    lo = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(hi > 0, np.frexp(hi)[1] + 31, np.frexp(lo)[1] - 1)
+
+
+def register_updates(hashes: np.ndarray, p: int = P) -> tuple:
+    """(register index, rank) per hash."""
+    idx = (hashes >> np.uint64(64 - p)).astype(np.int64)
+    rest = hashes & np.uint64((1 << (64 - p)) - 1)
+    # rank = leading zeros in the (64 - p)-bit remainder + 1; all-zero remainder -> 64 - p + 1
+    rank = np.where(rest > 0, (64 - p) - _floor_log2(np.maximum(rest, np.uint64(1))), 64 - p + 1)
+    return idx, rank.astype(np.uint8)
+
+
+def _sigma(x: np.ndarray) -> np.ndarray:
+    """x + sum_k x^(2^k) 2^(k-1), for x in [0, 1) (Ertl 2017, eq. 12)."""
+    x = x.copy()
+    y, z = 1.0, x.copy()
+    for _ in range(64):
+        x = x * x
+        z = z + x * y
+        y += y
+    return z
+
+
+def _tau(x: np.ndarray) -> np.ndarray:
+    """(1 - x - sum_k (1 - x^(2^-k))^2 2^-k) / 3, for x in [0, 1] (Ertl 2017, eq. 13)."""
+    x = x.copy()
+    y, z = 1.0, 1 - x
+    for _ in range(64):
+        x = np.sqrt(x)
+        y *= 0.5
+        z = z - (1 - x) ** 2 * y
+    return z / 3
+
+
+def estimate(registers: np.ndarray) -> np.ndarray:
+    """
+    Cardinality estimate per sketch; registers is (..., m). Uses Ertl's
+    improved estimator (from the histogram of register values), which
+    stays unbiased through the small-to-large transition where the
+    classic raw estimate / linear-counting switch is off by ~1%.
+    """
+    m = registers.shape[-1]
+    q = 64 - int(np.log2(m))
+    flat = registers.reshape(-1, m)
+    rows = np.repeat(np.arange(len(flat)), m)
+    hist = np.bincount(rows * (q + 2) + flat.ravel(), minlength=len(flat) * (q + 2)).reshape(len(flat), q + 2)
+    empty = hist[:, 0] == m
+    z = m * _tau(1 - hist[:, q + 1] / m)
+    for k in range(q, 0, -1):
+        z = 0.5 * (z + hist[:, k])
+    z = z + m * _sigma(np.where(empty, 0.0, hist[:, 0] / m))
+    est = np.where(empty, 0.0, m * m / (2 * np.log(2)) / np.where(empty, 1.0, z))
+    return est.reshape(registers.shape[:-1])
+
+
+def _dates(days: np.ndarray) -> np.ndarray:
+    return days.astype("datetime64[D]").astype("datetime64[s]")
+
+
+@dataclass
+class DailySketches:
+    """
+    registers[i, j] is the sketch of players active on days[i] in
+    segments[j]. days are sorted day numbers (days since 1970-01-01).
+    """
+
+    days: np.ndarray
+    segments: np.ndarray
+    registers: np.ndarray
+    p: int = P
+
+    @classmethod
+    def from_sessions(cls, sessions: pd.DataFrame, segment: Optional[np.ndarray] = None, p: int = P) -> "DailySketches":
+        """
+        One sketch per (session_date, segment). segment is a label per
+        session row (see segment_labels()); None puts every row in 'all'.
+        Missing labels go to UNKNOWN_SEGMENT: factorize codes them -1,
+        which would land the player in another (day, segment) sketch.
+        """
+        day_codes, days = pd.factorize(day_numbers(sessions["session_date"]), sort=True)
+        if segment is None:
+            seg_codes, segments = np.zeros(len(sessions), dtype=np.int64), np.array(["all"], dtype=object)
+        else:
+            labels = pd.Series(np.asarray(segment, dtype=object)).fillna(UNKNOWN_SEGMENT)
+            seg_codes, segments = pd.factorize(labels.to_numpy(dtype=object), sort=True)
+        m = 2 ** p
+        idx, rank = register_updates(hash_ids(sessions["player_id"]), p)
+        registers = np.zeros((len(days), len(segments), m), dtype=np.uint8)
+        flat = (day_codes.astype(np.int64) * len(segments) + seg_codes) * m + idx
+        np.maximum.at(registers.reshape(-1), flat, rank)
+        return cls(np.asarray(days, dtype=np.int64), np.asarray(segments, dtype=object), registers, p)
+
+    def merge(self, other: "DailySketches") -> "DailySketches":
+        """Union with sketches from another batch (any overlap in days / segments)."""
+        if other.p != self.p:
+            raise ValueError(f"cannot merge p={self.p} with p={other.p} sketches")
+        days = np.union1d(self.days, other.days)
+        segments = np.array(sorted(set(self.segments) | set(other.segments)), dtype=object)
+        out = np.zeros((len(days), len(segments), 2 ** self.p), dtype=np.uint8)
+        for sk in (self, other):
+            di = np.searchsorted(days, sk.days)
+            si = pd.Index(segments).get_indexer(sk.segments)
+            block = out[np.ix_(di, si)]
+            out[np.ix_(di, si)] = np.maximum(block, sk.registers)
+        return DailySketches(days, segments, out, self.p)
+
+    def _segment_mask(self, segments) -> np.ndarray:
+        if segments is None:
+            return np.ones(len(self.segments), dtype=bool)
+        return np.isin(self.segments, list(segments))
+
+    def distinct(self, day_mask: Optional[np.ndarray] = None, segments=None) -> float:
+        """Estimated distinct players over the selected days and segments."""
+        regs = self.registers[day_mask if day_mask is not None else slice(None)][:, self._segment_mask(segments)]
+        return float(estimate(regs.max(axis=(0, 1)))) if regs.size else 0.0
+
+    def _by_bucket(self, bucket: np.ndarray, segments=None) -> tuple:
+        """(bucket values, estimates) after merging the day sketches that share a bucket."""
+        merged = self.registers[:, self._segment_mask(segments)].max(axis=1)  # union over segments
+        keys, inverse = np.unique(bucket, return_inverse=True)
+        out = np.zeros((len(keys), merged.shape[1]), dtype=np.uint8)
+        np.maximum.at(out, inverse, merged)
+        return keys, estimate(out)
+
+    def dau(self, segments=None) -> pd.DataFrame:
+        keys, est = self._by_bucket(self.days, segments)
+        return pd.DataFrame({"session_date": _dates(keys), "dau": est})
+
+    def wau(self, segments=None) -> pd.DataFrame:
+        keys, est = self._by_bucket(week_start(self.days), segments)
+        return pd.DataFrame({"week_start": _dates(keys), "wau": est})
+
+    def mau(self, segments=None) -> pd.DataFrame:
+        months = self.days.astype("datetime64[D]").astype("datetime64[M]")
+        keys, est = self._by_bucket(months.astype(np.int64), segments)
+        return pd.DataFrame({"month": keys.astype("datetime64[M]").astype("datetime64[s]"), "mau": est})
+
+    def by_segment(self, bucket: str = "week") -> pd.DataFrame:
+        """Estimated distinct players per (bucket, segment); bucket is 'day', 'week' or 'month'."""
+        frames = []
+        for seg in self.segments:
+            df = {"day": self.dau, "week": self.wau, "month": self.mau}[bucket](segments=[seg])
+            frames.append(df.assign(segment=seg))
+        return pd.concat(frames, ignore_index=True)
+
+    @property
+    def nbytes(self) -> int:
+        return self.registers.nbytes
+
+
+def segment_labels(sessions: pd.DataFrame, players: pd.DataFrame, by: str) -> np.ndarray:
+    """
+    Segment per session row from the players table: a players column
+    (region, platform, acquisition_channel) or 'signup_week' for weekly
+    acquisition cohorts. Sessions of players missing from players (or with
+    no value in that column) get UNKNOWN_SEGMENT.
+    """
+    if by == "signup_week":
+        col = week_start(day_numbers(players["signup_date"])).astype("datetime64[D]").astype(str)
+    else:
+        col = np.asarray(players[by], dtype=object)
+    lookup = pd.Series(col, index=np.asarray(players["player_id"], dtype=object))
+    labels = lookup.reindex(np.asarray(sessions["player_id"], dtype=object))
+    return labels.fillna(UNKNOWN_SEGMENT).to_numpy(dtype=object)
@@ -0,0 +1,93 @@
+"""
+Run the BigQuery scripts in ../sql against local data with DuckDB.
+
+The .sql files are the metric definitions; this module rewrites the few
+BigQuery-only constructs they use into DuckDB SQL and runs them on the
+generated tables, so the definitions themselves can be checked offline:
+
+- `tk-bigquery.game_analytics.<table>`  ->  <table>
+- DATE_TRUNC(d, WEEK)                   ->  Sunday-start week, as BigQuery
+- DATE_DIFF(a, b, DAY)                  ->  date_diff('day', b, a)
+
+COUNTIF, IF and IFNULL exist in DuckDB as-is. feature_flags_clean is a view
+over feature_flags without the header row the BigQuery load imported as
+data (see 01_data_validation.sql).
+
+duckdb is optional; only the parity check and the benchmark need it.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SQL_DIR = os.path.join(HERE, "..", "sql")
+CORE_METRICS_SQL = os.path.join(SQL_DIR, "02_core_metrics.sql")
+
+DATE_COLUMNS = {"players": "signup_date", "sessions": "session_date", "purchases": "purchase_date"}
+
+_TABLE_REF = re.compile(r"`tk-bigquery\.game_analytics\.(\w+)`")
+_WEEK_TRUNC = re.compile(r"DATE_TRUNC\(\s*([\w.]+)\s*,\s*WEEK\s*\)", re.IGNORECASE)
+_DAY_DIFF = re.compile(r"DATE_DIFF\(\s*([\w.]+)\s*,\s*([\w.]+)\s*,\s*DAY\s*\)", re.IGNORECASE)
+_TITLE = re.compile(r"^--\s*(\d+)\)\s*(.+)$", re.MULTILINE)
+
+
+def require_duckdb() -> None:
+    if duckdb is None:
+        raise ImportError("Running the SQL locally needs duckdb: pip install duckdb")
+
+
+def to_duckdb(sql: str) -> str:
+    sql = _TABLE_REF.sub(r"\1", sql)
+    sql = _WEEK_TRUNC.sub(r"(\1 - CAST(dayofweek(\1) AS INTEGER))", sql)
+    return _DAY_DIFF.sub(r"date_diff('day', \2, \1)", sql)
+
+
+def split_queries(path: str = CORE_METRICS_SQL) -> List[Tuple[str, str]]:
+    """(title, sql) per statement, titled by the closest preceding '-- N) ...' comment."""
+    with open(path, encoding="utf-8") as fh:
+        text = fh.read()
+    queries = []
+    title = ""
+    for chunk in text.split(";"):
+        titles = _TITLE.findall(chunk)
+        if titles:
+            title = f"{titles[-1][0]}) {titles[-1][1].strip()}"
+        body = "\n".join(line for line in chunk.splitlines() if not line.strip().startswith("--")).strip()
+        if body:
+            queries.append((title, body))
+    return queries
+
+
+def connect(tables: Dict[str, pd.DataFrame]):
+    """In-memory DuckDB with one view per table (dates cast to DATE, ids to VARCHAR)."""
+    require_duckdb()
+    con = duckdb.connect()
+    for name, df in tables.items():
+        con.register(f"{name}_df", df)
+        casts = [f"CAST({c} AS VARCHAR) AS {c}" for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+        if name in DATE_COLUMNS:
+            casts.append(f"CAST({DATE_COLUMNS[name]} AS DATE) AS {DATE_COLUMNS[name]}")
+        replace = f" REPLACE ({', '.join(casts)})" if casts else ""
+        con.execute(f"CREATE VIEW {name} AS SELECT *{replace} FROM {name}_df")
+    if "feature_flags" in tables:
+        con.execute("CREATE VIEW feature_flags_clean AS SELECT * FROM feature_flags WHERE player_id <> 'player_id'")
+    return con
+
+
+def run_file(tables: Dict[str, pd.DataFrame], path: str = CORE_METRICS_SQL) -> Dict[str, pd.DataFrame]:
+    """Every query in path, translated and run on tables; results keyed by title."""
+    con = connect(tables)
+    try:
+        return {title: con.execute(to_duckdb(sql)).df() for title, sql in split_queries(path)}
+    finally:
+        con.close()
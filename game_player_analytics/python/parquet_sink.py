@@ -0,0 +1,295 @@
+"""
+Streaming Parquet output for the game telemetry, partitioned by month.
+
+sessions and purchases are written under hive-style month directories:
+
+    <out_dir>/sessions/session_month=2025-10/part-00000.parquet
+    <out_dir>/purchases/purchase_month=2025-11/part-00000.parquet
+
+players and feature_flags are small and go to one file each. Rows are
+buffered per month and flushed as fixed-size row groups (batch_rows), so
+memory stays at about one batch per open month whatever the total size.
+Generator batches can be written as they come out of
+iter_sessions_and_purchases() without building the full tables.
+
+player_id and item_type are dictionary<int32, string> columns (player_id
+repeats ~7x per row group, item_type has two values). Dates are date32.
+
+close() writes <out_dir>/_manifest.json with row counts, row groups and
+date ranges per partition. read_table() uses it to open only the months a
+query needs, so the queries in sql/02_core_metrics.sql can be reproduced
+locally on partition-pruned files; DuckDB reads the same layout with
+read_parquet('<out_dir>/sessions/*/*.parquet', hive_partitioning = true).
+
+pyarrow is optional: CSV output works without it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+BATCH_ROWS = 500_000
+MANIFEST = "_manifest.json"
+DICTIONARY_COLUMNS = {"player_id", "item_type", "region", "platform", "acquisition_channel", "test_group",
+                      "feature_name"}
+
+# partitioned table -> the date column its month partitions come from
+PARTITION_COLUMNS = {"sessions": "session_date", "purchases": "purchase_date"}
+
+
+def require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+
+
+def _schema(columns) -> "pa.Schema":
+    """Arrow schema from (name, type) pairs; DICTIONARY_COLUMNS become dictionary<int32, string>."""
+    return pa.schema([
+        pa.field(name, pa.dictionary(pa.int32(), pa.string()) if name in DICTIONARY_COLUMNS else typ)
+        for name, typ in columns
+    ])
+
+
+def table_schemas() -> dict:
+    require_pyarrow()
+    return {
+        "players": _schema([
+            ("player_id", pa.string()),
+            ("signup_date", pa.date32()),
+            ("region", pa.string()),
+            ("platform", pa.string()),
+            ("acquisition_channel", pa.string()),
+        ]),
+        "feature_flags": _schema([
+            ("player_id", pa.string()),
+            ("test_group", pa.string()),
+            ("feature_name", pa.string()),
+        ]),
+        "sessions": _schema([
+            ("session_id", pa.string()),
+            ("player_id", pa.string()),
+            ("session_date", pa.date32()),
+            ("session_length_min", pa.int32()),
+            ("levels_completed", pa.int32()),
+        ]),
+        "purchases": _schema([
+            ("purchase_id", pa.string()),
+            ("player_id", pa.string()),
+            ("purchase_date", pa.date32()),
+            ("revenue", pa.float64()),
+            ("item_type", pa.string()),
+        ]),
+    }
+
+
+def _days(values) -> np.ndarray:
+    """date objects (loop engine) or datetime64 (vectorized engine) -> datetime64[D]."""
+    return pd.to_datetime(pd.Series(values)).to_numpy().astype("datetime64[D]")
+
+
+def to_arrow(df: pd.DataFrame, schema: "pa.Schema") -> "pa.Table":
+    arrays = []
+    for field in schema:
+        col = df[field.name]
+        if pa.types.is_date32(field.type):
+            arrays.append(pa.array(_days(col), type=pa.date32()))
+        elif pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(col.astype(str), type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(col.to_numpy(), type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def partition_dir(table: str, month: str) -> str:
+    return os.path.join(table, f"{PARTITION_COLUMNS[table].split('_')[0]}_month={month}")
+
+
+class PartitionedWriter:
+    """
+    One partitioned table. write() takes DataFrames in any row order; rows
+    keep their order within a month. Each month has one open part file, and
+    its buffer is flushed as a row group every time it reaches batch_rows.
+    """
+
+    def __init__(self, out_dir: str, table: str, schema: "pa.Schema", batch_rows: int = BATCH_ROWS):
+        self.out_dir = out_dir
+        self.table = table
+        self.schema = schema
+        self.date_column = PARTITION_COLUMNS[table]
+        self.batch_rows = batch_rows
+        self._buffers: Dict[str, List["pa.Table"]] = {}
+        self._buffered: Dict[str, int] = {}
+        self._writers: Dict[str, "pq.ParquetWriter"] = {}
+        self._stats: Dict[str, dict] = {}
+
+        # stale months from an earlier run would otherwise be read as part of this one
+        shutil.rmtree(os.path.join(out_dir, table), ignore_errors=True)
+
+    def write(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        tbl = to_arrow(df, self.schema)
+        days = _days(df[self.date_column])
+        months = days.astype("datetime64[M]")
+        order = np.argsort(months, kind="stable")
+        uniq, starts = np.unique(months[order], return_index=True)
+        bounds = np.append(starts, len(order))
+        for i, month in enumerate(uniq):
+            idx = order[bounds[i]:bounds[i + 1]]
+            key = str(month)
+            self._buffers.setdefault(key, []).append(tbl.take(pa.array(idx)))
+            self._buffered[key] = self._buffered.get(key, 0) + len(idx)
+            st = self._stats.setdefault(key, {"rows": 0, "min_date": days[idx].min(), "max_date": days[idx].max()})
+            st["rows"] += len(idx)
+            st["min_date"] = min(st["min_date"], days[idx].min())
+            st["max_date"] = max(st["max_date"], days[idx].max())
+            if self._buffered[key] >= self.batch_rows:
+                self._flush(key, final=False)
+
+    def _flush(self, month: str, final: bool) -> None:
+        if not self._buffered.get(month):
+            return
+        buf = pa.concat_tables(self._buffers[month])
+        n_full = len(buf) if final else len(buf) - len(buf) % self.batch_rows
+        if month not in self._writers:
+            path = os.path.join(self.out_dir, partition_dir(self.table, month), "part-00000.parquet")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._writers[month] = pq.ParquetWriter(path, self.schema, compression="zstd")
+        self._writers[month].write_table(buf.slice(0, n_full), row_group_size=self.batch_rows)
+        rest = buf.slice(n_full)
+        self._buffers[month] = [rest] if len(rest) else []
+        self._buffered[month] = len(rest)
+
+    def abort(self) -> None:
+        """Close the part files without flushing buffers; no manifest entry."""
+        for writer in self._writers.values():
+            writer.close()
+
+    def close(self) -> dict:
+        """Flush and close every month; returns this table's manifest entry."""
+        for month in list(self._buffers):
+            self._flush(month, final=True)
+        for writer in self._writers.values():
+            writer.close()
+        partitions = []
+        for month in sorted(self._stats):
+            st = self._stats[month]
+            path = os.path.join(partition_dir(self.table, month), "part-00000.parquet")
+            partitions.append({
+                "month": month,
+                "path": path,
+                "rows": int(st["rows"]),
+                "row_groups": pq.ParquetFile(os.path.join(self.out_dir, path)).num_row_groups,
+                "min_date": str(st["min_date"]),
+                "max_date": str(st["max_date"]),
+            })
+        return {"partition_column": self.date_column, "rows": sum(p["rows"] for p in partitions),
+                "partitions": partitions}
+
+
+class TelemetryParquetWriter:
+    """
+    All four tables of one generator run:
+
+        with TelemetryParquetWriter(out_dir) as sink:
+            sink.write_frame("players", players)
+            sink.write_frame("feature_flags", flags)
+            for sessions, purchases in iter_sessions_and_purchases(...):
+                sink.write(sessions, purchases)
+
+    The manifest is written when the block exits without an error.
+    """
+
+    def __init__(self, out_dir: str, batch_rows: int = BATCH_ROWS):
+        require_pyarrow()
+        self.out_dir = out_dir
+        self.schemas = table_schemas()
+        self.manifest: dict = {}
+        self._tables = {t: PartitionedWriter(out_dir, t, self.schemas[t], batch_rows) for t in PARTITION_COLUMNS}
+
+    def write_frame(self, table: str, df: pd.DataFrame) -> None:
+        """Unpartitioned table, written in one go."""
+        path = f"{table}.parquet"
+        pq.write_table(to_arrow(df, self.schemas[table]), os.path.join(self.out_dir, path), compression="zstd")
+        self.manifest[table] = {"rows": len(df), "path": path}
+
+    def write(self, sessions: pd.DataFrame, purchases: pd.DataFrame) -> None:
+        self._tables["sessions"].write(sessions)
+        self._tables["purchases"].write(purchases)
+
+    def close(self) -> dict:
+        for table, writer in self._tables.items():
+            self.manifest[table] = writer.close()
+        tmp = os.path.join(self.out_dir, MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.manifest, fh, indent=2)
+        os.replace(tmp, os.path.join(self.out_dir, MANIFEST))
+        return self.manifest
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for writer in self._tables.values():
+                writer.abort()
+
+
+def read_manifest(out_dir: str) -> dict:
+    with open(os.path.join(out_dir, MANIFEST), encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def partition_paths(out_dir: str, table: str, start: Optional[date] = None, end: Optional[date] = None) -> List[str]:
+    """Part files of a partitioned table whose date range overlaps [start, end]."""
+    entry = read_manifest(out_dir)[table]
+    return [
+        os.path.join(out_dir, p["path"])
+        for p in entry["partitions"]
+        if (start is None or p["max_date"] >= start.isoformat()) and (end is None or p["min_date"] <= end.isoformat())
+    ]
+
+
+def read_table(out_dir: str, table: str, start: Optional[date] = None, end: Optional[date] = None,
+               columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load one table as pandas. For sessions / purchases only the months
+    overlapping [start, end] are opened, and rows outside it are dropped.
+    Dates come back as datetime64, dictionary columns as categoricals.
+    """
+    require_pyarrow()
+    if table not in PARTITION_COLUMNS:
+        return pq.read_table(os.path.join(out_dir, f"{table}.parquet"), columns=columns).to_pandas()
+
+    date_col = PARTITION_COLUMNS[table]
+    schema = table_schemas()[table]
+    paths = partition_paths(out_dir, table, start, end)
+    if not paths:
+        return schema.empty_table().to_pandas() if columns is None else schema.empty_table().select(columns).to_pandas()
+    filters = []
+    if start is not None:
+        filters.append((date_col, ">=", start))
+    if end is not None:
+        filters.append((date_col, "<=", end))
+    tbl = pa.concat_tables([pq.read_table(p, columns=columns, filters=filters or None) for p in paths])
+    df = tbl.to_pandas()
+    for col in df.columns:
+        if pa.types.is_date32(schema.field(col).type):
+            df[col] = pd.to_datetime(df[col])
+    return df
@@ -0,0 +1,152 @@
+"""
+Multi-process, sharded session/purchase generation.
+
+The player table is split into n_shards contiguous ranges. Each shard gets
+its own random stream from SeedSequence(seed).spawn(n_shards), so a run is
+reproducible for a given (seed, n_shards, batch_size), however many worker
+processes execute it.
+
+Session and purchase IDs must be globally unique and contiguous in player
+order, so generation runs in two parallel passes:
+1. every shard simulates its players and reports only its row counts
+2. the parent turns the counts into ID offsets, and every shard re-runs the
+   same stream and writes its own part-files with the final IDs
+
+The count pass builds no strings or frames, so it costs far less than the
+write pass. Part-files can then be concatenated into sessions.csv /
+purchases.csv with merge_parts().
+
+Driven from generate_game_data.py:
+    python generate_game_data.py --players 1000000 --engine vectorized --shards 8
+    python generate_game_data.py --players 10000000 --engine vectorized --shards 32 --workers 8 --out-dir /tmp/game_10m
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from generate_game_data import count_sessions_and_purchases, iter_sessions_and_purchases
+
+PART_DIR = "parts"
+
+
+@dataclass(frozen=True)
+class ShardTask:
+    index: int
+    players: pd.DataFrame
+    flags: pd.DataFrame
+    seed: np.random.SeedSequence
+    end_date: date
+    batch_size: int
+    out_dir: Optional[str] = None
+    first_session: int = 1
+    first_purchase: int = 1
+
+
+def shard_bounds(n_players: int, n_shards: int) -> List[Tuple[int, int]]:
+    """Contiguous [lo, hi) player ranges, sizes differing by at most one."""
+    edges = np.linspace(0, n_players, n_shards + 1).round().astype(int)
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def part_path(out_dir: str, table: str, index: int) -> str:
+    return os.path.join(out_dir, PART_DIR, f"{table}-{index:05d}.csv")
+
+
+def _count_shard(task: ShardTask) -> Tuple[int, int]:
+    rng = np.random.default_rng(task.seed)
+    return count_sessions_and_purchases(rng, task.players, task.flags, task.batch_size, task.end_date)
+
+
+def _write_shard(task: ShardTask) -> dict:
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(task.seed)
+    paths = {t: part_path(task.out_dir, t, task.index) for t in ("sessions", "purchases")}
+    rows = {"sessions": 0, "purchases": 0}
+    written = set()
+    batches = iter_sessions_and_purchases(rng, task.players, task.flags, task.batch_size,
+                                          task.first_session, task.first_purchase, task.end_date)
+    for sessions, purchases in batches:
+        for table, df in (("sessions", sessions), ("purchases", purchases)):
+            # the first batch truncates the part-file and writes the header, even if empty
+            first = table not in written
+            df.to_csv(paths[table], mode="w" if first else "a", header=first, index=False)
+            written.add(table)
+            rows[table] += len(df)
+    return {"shard": task.index, "players": len(task.players), **rows,
+            "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def generate_sharded(players: pd.DataFrame, flags: pd.DataFrame, out_dir: str, n_shards: int, seed: int,
+                     end_date: date, workers: Optional[int] = None, batch_size: int = 50_000) -> pd.DataFrame:
+    """
+    Write sessions/purchases part-files for every shard under out_dir/parts.
+    Returns one row per shard with its player/session/purchase counts, first
+    IDs and seconds taken.
+    """
+    os.makedirs(os.path.join(out_dir, PART_DIR), exist_ok=True)
+    seeds = np.random.SeedSequence(seed).spawn(n_shards)
+    tasks = [
+        ShardTask(i, players.iloc[lo:hi], flags.iloc[lo:hi], seeds[i], end_date, batch_size, out_dir)
+        for i, (lo, hi) in enumerate(shard_bounds(len(players), n_shards))
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers or min(n_shards, os.cpu_count() or 1)) as pool:
+        counts = list(pool.map(_count_shard, tasks))
+
+        # global ID offsets: shard i starts right after everything in shards < i
+        n_sessions = np.array([c[0] for c in counts])
+        n_purchases = np.array([c[1] for c in counts])
+        first_s = 1 + np.concatenate([[0], np.cumsum(n_sessions)[:-1]])
+        first_p = 1 + np.concatenate([[0], np.cumsum(n_purchases)[:-1]])
+        tasks = [
+            ShardTask(t.index, t.players, t.flags, t.seed, t.end_date, t.batch_size, out_dir,
+                      int(first_s[t.index]), int(first_p[t.index]))
+            for t in tasks
+        ]
+        results = list(pool.map(_write_shard, tasks))
+
+    summary = pd.DataFrame(results)
+    summary["first_session"] = first_s
+    summary["first_purchase"] = first_p
+    mismatch = (summary["sessions"] != n_sessions) | (summary["purchases"] != n_purchases)
+    if mismatch.any():
+        raise RuntimeError(f"shards {summary.loc[mismatch, 'shard'].tolist()} changed row counts between passes")
+    return summary
+
+
+def merge_parts(out_dir: str, table: str, n_shards: int, remove: bool = True) -> str:
+    """Concatenate a table's part-files (in shard order, one header) into out_dir/<table>.csv."""
+    dest = os.path.join(out_dir, f"{table}.csv")
+    tmp = dest + ".tmp"
+    with open(tmp, "wb") as out:
+        for i in range(n_shards):
+            path = part_path(out_dir, table, i)
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as fh:
+                header = fh.readline()
+                if out.tell() == 0:
+                    out.write(header)
+                shutil.copyfileobj(fh, out, 16 * 1024 * 1024)
+    os.replace(tmp, dest)
+    if remove:
+        for i in range(n_shards):
+            path = part_path(out_dir, table, i)
+            if os.path.exists(path):
+                os.remove(path)
+        try:
+            os.rmdir(os.path.join(out_dir, PART_DIR))
+        except OSError:
+            pass  # other tables' parts still there
+    return dest
+
@@ -57,33 +57,53 @@ SELECT
 FROM revenue_per_player;
 
 -- 5) A/B Test: Control vs Variant (Engagement & Revenue)
+-- Sessions and purchases are rolled up per player separately before the
+-- join: joining both raw tables on player_id multiplies each player's
+-- sessions by their purchase count and revenue by their session count.
+-- Every flagged player counts (zeros if they never played or paid).
 
-WITH player_metrics AS (
+WITH session_totals AS (
+  SELECT
+    player_id,
+    COUNT(*) AS sessions,
+    SUM(session_length_min) AS total_minutes
+  FROM `tk-bigquery.game_analytics.sessions`
+  GROUP BY player_id
+),
+purchase_totals AS (
+  SELECT
+    player_id,
+    SUM(revenue) AS revenue
+  FROM `tk-bigquery.game_analytics.purchases`
+  GROUP BY player_id
+),
+player_metrics AS (
   SELECT
     f.test_group,
-    s.player_id,
-    COUNT(s.session_id) AS sessions,
-    SUM(s.session_length_min) AS total_minutes,
-    SUM(pu.revenue) AS revenue
+    f.player_id,
+    IFNULL(s.sessions, 0) AS sessions,
+    IFNULL(s.total_minutes, 0) AS total_minutes,
+    IFNULL(pu.revenue, 0) AS revenue
   FROM `tk-bigquery.game_analytics.feature_flags_clean` f
-  LEFT JOIN `tk-bigquery.game_analytics.sessions` s
+  LEFT JOIN session_totals s
     ON f.player_id = s.player_id
-  LEFT JOIN `tk-bigquery.game_analytics.purchases` pu
+  LEFT JOIN purchase_totals pu
     ON f.player_id = pu.player_id
-  GROUP BY f.test_group, s.player_id
 )
 SELECT
   test_group,
   COUNT(DISTINCT player_id) AS players,
   ROUND(AVG(sessions), 2) AS avg_sessions_per_player,
   ROUND(AVG(total_minutes), 2) AS avg_minutes_per_player,
-  ROUND(AVG(IFNULL(revenue, 0)), 2) AS avg_revenue_per_player
+  ROUND(AVG(revenue), 2) AS avg_revenue_per_player
 FROM player_metrics
 GROUP BY test_group;
 
 -- Insight:
--- The Variant group outperformed Control across engagement and monetization metrics.
--- Variant players averaged more sessions (+9%), higher total playtime (+15%),
--- and higher revenue per player (+28%), suggesting the new feature
--- positively impacts both player experience and business outcomes.
-
+-- The Variant group outperformed Control on engagement.
+-- Variant players averaged more sessions (+10%) and higher total playtime (+16%).
+-- They were more likely to purchase (22% vs 15% of players) and had higher
+-- revenue per player (+12%), although the revenue difference is within noise
+-- at this sample size (see python/ab_metrics.py for intervals).
+-- The feature positively impacts player experience and shows an early
+-- monetization signal.
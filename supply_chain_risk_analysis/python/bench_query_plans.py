@@ -0,0 +1,149 @@
+"""
+Benchmark: query plans and timings of sql/02-04 across storage layouts.
+
+Copies --db (a database built from sql/00_schema.sql, e.g. by
+generate_data.py) into a scratch folder, once per storage layout, and runs
+the final query of 02_vendor_risk.sql, 03_part_risk.sql and
+04_cost_impact.sql in each layout:
+
+- text: TEXT dates, no secondary indexes (the original layout)
+- text+05: TEXT dates with the covering indexes of sql/05_indexes.sql
+- days/views: after sql/06_day_dates.sql, the unchanged scripts through
+  the TEXT-date compatibility views
+- days/native: the same database, with each script reading
+  shipments_days / production_days and taking transit as
+  arrival_day - ship_day
+
+Reports the best of --repeat runs per script and layout, the speedup over
+text, and whether the result matches text; --plans also prints each
+EXPLAIN QUERY PLAN. The source database is not modified.
+
+Usage:
+    python bench_query_plans.py
+    python bench_query_plans.py --db /tmp/war_5m.db --plans
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import pandas as pd
+
+from scorecards import DB_PATH, REPORTS, SQL_DIR, report_sql
+
+# Rewrites of the 02-04 queries onto the integer-day tables
+DAY_NATIVE = [
+    ("julianday(sh.arrival_date) - julianday(sh.ship_date)", "sh.arrival_day - sh.ship_day"),
+    ("FROM shipments sh", "FROM shipments_days sh"),
+    ("FROM production pr", "FROM production_days pr"),
+]
+
+LAYOUTS = ("text", "text+05", "days/views", "days/native")
+
+
+def native_sql(sql: str) -> str:
+    for old, new in DAY_NATIVE:
+        sql = sql.replace(old, new)
+    return sql
+
+
+def copy_db(src: str, dst: str) -> sqlite3.Connection:
+    with sqlite3.connect(src) as s:
+        conn = sqlite3.connect(dst)
+        s.backup(conn)
+    return conn
+
+
+def drop_indexes(conn: sqlite3.Connection) -> None:
+    names = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+        "AND tbl_name IN ('shipments', 'production', 'parts')")]
+    for name in names:
+        conn.execute(f"DROP INDEX {name}")
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+def run_script(conn: sqlite3.Connection, name: str) -> None:
+    with open(os.path.join(SQL_DIR, name), encoding="utf-8") as fh:
+        conn.executescript(fh.read())
+
+
+def prepare(src: str, work_dir: str) -> dict:
+    """{layout: connection}; days/views and days/native share a database."""
+    conns = {}
+    conns["text"] = copy_db(src, os.path.join(work_dir, "text.db"))
+    drop_indexes(conns["text"])
+    conns["text+05"] = copy_db(src, os.path.join(work_dir, "text05.db"))
+    drop_indexes(conns["text+05"])
+    run_script(conns["text+05"], "05_indexes.sql")
+    conns["text+05"].execute("ANALYZE")
+    conns["days/views"] = copy_db(src, os.path.join(work_dir, "days.db"))
+    drop_indexes(conns["days/views"])
+    run_script(conns["days/views"], "06_day_dates.sql")
+    conns["days/native"] = conns["days/views"]
+    return conns
+
+
+def time_query(conn: sqlite3.Connection, sql: str, repeat: int) -> tuple:
+    best, df = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        df = pd.read_sql_query(sql, conn)
+        best = min(best, time.perf_counter() - t0)
+    return best, df
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--db", default=DB_PATH, help="source database (TEXT-date schema)")
+    ap.add_argument("--work-dir", help="scratch folder for the copies (default: a temp folder, removed after)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--plans", action="store_true", help="print EXPLAIN QUERY PLAN per script and layout")
+    args = ap.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="war_room_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    conns = {}
+    try:
+        t0 = time.perf_counter()
+        conns.update(prepare(args.db, work_dir))
+        rows = conns["text"].execute("SELECT COUNT(*) FROM shipments").fetchone()[0]
+        print(f"prepared layouts in {time.perf_counter() - t0:.1f}s ({rows:,} shipments)\n")
+
+        results = []
+        for script in REPORTS:
+            base_sql = report_sql(script)
+            baseline = None
+            for layout in LAYOUTS:
+                sql = native_sql(base_sql) if layout == "days/native" else base_sql
+                secs, df = time_query(conns[layout], sql, args.repeat)
+                if baseline is None:
+                    baseline = (secs, df)
+                try:
+                    pd.testing.assert_frame_equal(df, baseline[1], check_dtype=False, rtol=1e-9)
+                    match = True
+                except AssertionError:
+                    match = False
+                results.append({"script": script, "layout": layout, "seconds": round(secs, 4),
+                                "speedup": round(baseline[0] / secs, 2), "matches_text": match})
+                if args.plans:
+                    plan = conns[layout].execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+                    print(f"-- {script} [{layout}]")
+                    print("\n".join(f"   {r[-1]}" for r in plan) + "\n")
+
+        print(pd.DataFrame(results).to_string(index=False))
+    finally:
+        for conn in set(conns.values()):
+            conn.close()
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
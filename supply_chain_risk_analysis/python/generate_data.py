@@ -1,8 +1,74 @@
+"""
+Generates the synthetic war-room data into industrial_war_room.db.
+
+Two engines:
+
+- loop (default): the original row-at-a-time generator (random.choice per
+  row, fixed 60 suppliers / 800 parts / 26,000 shipments and production
+  rows). Reproduces the committed database.
+- vectorized: every table is built as whole NumPy arrays from a Scale
+  (counts of suppliers, parts, shipments, production rows, ...). The
+  per-category constants are lookup arrays indexed by category code, so a
+  chunk of a million shipments is a handful of array ops. Shipments and
+  production are generated and inserted in chunks of --chunk-rows, one
+  transaction per chunk, so memory stays flat up to 100M+ rows.
+
+The vectorized engine draws from the same distributions as the loop (same
+lead times, costs, risky-supplier delays, downtime and defect rates) but
+not the same random stream, so its rows differ from the committed ones.
+
+By default the rows are replaced in place in an existing database.
+--rebuild instead builds a fresh file and swaps it in:
+
+- applies sql/00_schema.sql to a temp file next to --db, with journaling
+  and fsync off (nobody else has it open)
+- loads every table with no secondary indexes, then creates the covering
+  indexes from sql/05_indexes.sql (one sort each), runs ANALYZE and builds
+  the risk scorecards (scorecards.py) and the compacted inventory history
+  (inventory_history.py). With --day-dates the shipment and
+  production dates are migrated to integer day numbers first
+  (sql/06_day_dates.sql, which brings its own covering indexes).
+- os.replace()s the temp file over --db. Readers see either the old file
+  or the complete new one, never a half-loaded war room. Before the swap
+  the old database is checkpointed and taken out of WAL mode, which SQLite
+  only allows while no other connection has it open (otherwise --rebuild
+  stops with "database is locked" and leaves it as it was), so no -wal /
+  -shm is left behind to be applied to the new file. The old file is then
+  held under an exclusive lock while it is swapped out. Stop writers
+  before rebuilding: read-only connections opened on the old file keep
+  reading it until they reconnect.
+
+Either way the ids restart at 1, so the scorecards and inventory history
+are rebuilt and the rolling-metrics state, supplier_alerts and
+supplier_rolling_series are dropped (rolling_metrics.reset()); the next
+rolling_metrics.py run rebuilds its store.
+
+--db defaults to industrial_war_room.db next to this folder, whatever the
+working directory.
+
+Usage:
+    python generate_data.py
+    python generate_data.py --engine vectorized --shipments 100000000 --production 100000000
+    python generate_data.py --rebuild --db /tmp/war_room.db --engine vectorized --shipments 10000000
+    python generate_data.py --rebuild --day-dates
+"""
+
+import argparse
+import os
 import sqlite3
 import random
+import tempfile
+import time
+from dataclasses import dataclass
 from datetime import date, timedelta
 
-DB_PATH = r"../industrial_war_room.db"
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(HERE, "..", "industrial_war_room.db")
+SCHEMA_SQL = os.path.join(HERE, "..", "sql", "00_schema.sql")
+INDEX_SQL = os.path.join(HERE, "..", "sql", "05_indexes.sql")
+DAY_DATES_SQL = os.path.join(HERE, "..", "sql", "06_day_dates.sql")
 
 random.seed(42)
 
@@ -10,6 +76,37 @@ REGIONS = ["Midwest", "South", "West", "Northeast", "International"]
 WAREHOUSES = ["WH-A", "WH-B", "WH-C"]
 PLANTS = ["Decatur", "Peoria", "Aurora"]
 CATEGORIES = ["Hydraulics", "Powertrain", "Electrical", "Chassis", "Cab", "Fasteners", "Cooling", "Fuel"]
+ENGINES = ("loop", "vectorized")
+# Scale fields settable from the CLI; load_loop ignores them, so they need --engine vectorized
+SCALE_FLAGS = ("suppliers", "parts", "shipments", "production", "risky_suppliers", "tracked_parts",
+               "parts_per_snapshot", "seed", "chunk_rows")
+
+# Per-category constants as lookup arrays, indexed by position in CATEGORIES
+# (same values as the dicts in load_loop)
+BASE_COST = np.array([180, 450, 95, 300, 220, 8, 120, 75], dtype=np.float64)
+BASE_LEAD = np.array([7, 10, 4, 9, 8, 2, 6, 5], dtype=np.int64)
+BASE_UNITS = np.array([35, 14, 60, 18, 22, 120, 45, 55], dtype=np.float64)
+DEFECT_BASE = np.array([0.012, 0.018, 0.010, 0.011, 0.015, 0.002, 0.009, 0.008])
+RISKY_DELAYS = np.array([0, 1, 2, 3, 5, 7], dtype=np.int64)
+MAX_TRANSIT = int(BASE_LEAD.max()) + 5 + int(RISKY_DELAYS.max())
+
+
+@dataclass(frozen=True)
+class Scale:
+    """Row counts for the vectorized engine; the defaults match the loop engine."""
+
+    suppliers: int = 60
+    parts: int = 800
+    shipments: int = 26_000
+    production: int = 26_000
+    risky_suppliers: int = 10
+    tracked_parts: int = 600
+    parts_per_snapshot: int = 200
+    start: date = date(2024, 1, 1)
+    end: date = date(2024, 12, 31)
+    seed: int = 42
+    chunk_rows: int = 1_000_000
+
 
 def daterange(start: date, end: date):
     d = start
@@ -17,17 +114,9 @@ def daterange(start: date, end: date):
         yield d
         d += timedelta(days=1)
 
-def main():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    # Speed + integrity
-    cur.execute("PRAGMA foreign_keys = ON;")
-    cur.execute("PRAGMA journal_mode = WAL;")
-    cur.execute("PRAGMA synchronous = NORMAL;")
-
-    # Wipe existing data (keep schema)
-    cur.executescript("""
+def wipe(conn):
+    """Delete all rows, keeping the schema."""
+    conn.executescript("""
     DELETE FROM production;
     DELETE FROM shipments;
     DELETE FROM inventory;
@@ -36,6 +125,9 @@ def main():
     """)
     conn.commit()
 
+def load_loop(conn):
+    cur = conn.cursor()
+
     # -----------------------
     # 1) Suppliers (60)
     # -----------------------
@@ -153,13 +245,13 @@ def main():
         for part_id in random.sample(tracked_parts, 200):  # 200 parts per snapshot week
             stock = random.randint(0, 800)
             reorder_point = random.randint(50, 200)
-            inv_rows.append((inventory_id, part_id, stock, reorder_point, wh))
+            inv_rows.append((inventory_id, part_id, stock, reorder_point, wh, day.isoformat()))
             inventory_id += 1
 
     cur.executemany("""
         INSERT INTO inventory
-        (inventory_id, part_id, stock_level, reorder_point, warehouse)
-        VALUES (?, ?, ?, ?, ?);
+        (inventory_id, part_id, stock_level, reorder_point, warehouse, snapshot_date)
+        VALUES (?, ?, ?, ?, ?, ?);
     """, inv_rows)
     conn.commit()
 
@@ -233,6 +325,316 @@ def main():
     """, prod_rows)
     conn.commit()
 
+
+
+# -----------------------
+# Vectorized engine
+# -----------------------
+
+def _iso_days(start: date, n: int) -> np.ndarray:
+    """ISO date strings for start + 0..n-1, as an object array to index by day offset."""
+    return np.arange(np.datetime64(start), np.datetime64(start) + n).astype(str).astype(object)
+
+
+def _insert(conn, sql, chunks):
+    """
+    Insert column-array chunks with executemany, one transaction per chunk.
+    Returns the number of rows written.
+    """
+    rows = 0
+    for cols in chunks:
+        conn.executemany(sql, zip(*(c.tolist() for c in cols)))
+        conn.commit()
+        rows += len(cols[0])
+    return rows
+
+
+def _chunk_sizes(total: int, chunk: int):
+    for lo in range(0, total, chunk):
+        yield lo, min(chunk, total - lo)
+
+
+def gen_suppliers(rng, scale: Scale):
+    sid = np.arange(1, scale.suppliers + 1)
+    names = np.array([f"Supplier {s:03d}" for s in sid], dtype=object)
+    region = np.array(REGIONS, dtype=object)[rng.integers(len(REGIONS), size=scale.suppliers)]
+    risk = rng.random(scale.suppliers)
+    risky = np.zeros(scale.suppliers + 1, dtype=bool)  # indexed by supplier_id
+    risky[sid[np.argsort(-risk)[:scale.risky_suppliers]]] = True
+    return (sid, names, region), risky
+
+
+def gen_parts(rng, scale: Scale):
+    pid = np.arange(1, scale.parts + 1)
+    cat = rng.integers(len(CATEGORIES), size=scale.parts)
+    supplier = rng.integers(1, scale.suppliers + 1, size=scale.parts)
+    unit_cost = np.round(BASE_COST[cat] * rng.uniform(0.6, 1.6, size=scale.parts), 2)
+    cat_names = np.array(CATEGORIES, dtype=object)
+    names = np.array([f"{c} Part {p:04d}" for c, p in zip(cat_names[cat], pid)], dtype=object)
+    return pid, names, cat_names[cat], supplier, unit_cost, cat
+
+
+def gen_shipments(rng, scale: Scale, parts, risky, n_days, iso):
+    """Yields shipments column chunks; parts is the gen_parts() tuple."""
+    _, _, _, part_supplier, unit_cost, part_cat = parts
+    for lo, n in _chunk_sizes(scale.shipments, scale.chunk_rows):
+        p = rng.integers(len(part_cat), size=n)
+        supplier = part_supplier[p]
+        day = rng.integers(n_days, size=n)
+        delay = np.where(risky[supplier], RISKY_DELAYS[rng.integers(len(RISKY_DELAYS), size=n)], 0)
+        transit = BASE_LEAD[part_cat[p]] + rng.integers(0, 6, size=n) + delay
+        cost = np.round(np.maximum(15, rng.uniform(0.03, 0.12, size=n) * unit_cost[p] * (1 + transit / 10)), 2)
+        yield (np.arange(lo + 1, lo + n + 1), supplier, p + 1, iso[day], iso[day + transit], cost,
+               np.full(n, "Delivered", dtype=object))
+
+
+def gen_inventory(rng, scale: Scale, tracked, n_days, iso):
+    """One warehouse per weekly snapshot, parts_per_snapshot tracked parts sampled without replacement."""
+    weeks = np.arange(0, n_days, 7)
+    k = min(scale.parts_per_snapshot, len(tracked))
+    part = np.concatenate([rng.choice(tracked, k, replace=False) for _ in weeks])
+    n = len(part)
+    wh = np.repeat(np.array(WAREHOUSES, dtype=object)[rng.integers(len(WAREHOUSES), size=len(weeks))], k)
+    return (np.arange(1, n + 1), part, rng.integers(0, 801, size=n), rng.integers(50, 201, size=n), wh,
+            np.repeat(iso[weeks], k))
+
+
+def gen_production(rng, scale: Scale, parts, risky, tracked, n_days, iso):
+    """Yields production column chunks; only tracked parts are produced."""
+    _, _, _, part_supplier, _, part_cat = parts
+    plants = np.array(PLANTS, dtype=object)
+    for lo, n in _chunk_sizes(scale.production, scale.chunk_rows):
+        part = tracked[rng.integers(len(tracked), size=n)]
+        cat = part_cat[part - 1]
+        is_risky = risky[part_supplier[part - 1]]
+        base = BASE_UNITS[cat]
+        units = np.maximum(0, np.trunc(rng.normal(base, base * 0.15))).astype(np.int64)
+        downtime = np.maximum(0, rng.normal(35, 20, size=n)).astype(np.int64)
+        downtime += np.where(is_risky, rng.integers(20, 161, size=n), 0)
+        rate = DEFECT_BASE[cat] + np.where(is_risky, 0.010, 0.0)
+        defects = np.round(units * np.minimum(0.08, rate + rng.uniform(-0.003, 0.006, size=n))).astype(np.int64)
+        yield (np.arange(lo + 1, lo + n + 1), part, iso[rng.integers(n_days, size=n)], units, downtime, defects,
+               plants[rng.integers(len(PLANTS), size=n)])
+
+
+def load_vectorized(conn, scale: Scale):
+    """Generate and insert every table from scale; returns {table: (rows, seconds)}."""
+    rng = np.random.default_rng(scale.seed)
+    n_days = (scale.end - scale.start).days + 1
+    iso = _iso_days(scale.start, n_days + MAX_TRANSIT)
+    timings = {}
+
+    def timed(table, sql, chunks):
+        t0 = time.perf_counter()
+        rows = _insert(conn, sql, chunks)
+        timings[table] = (rows, time.perf_counter() - t0)
+
+    suppliers, risky = gen_suppliers(rng, scale)
+    timed("suppliers", "INSERT INTO suppliers (supplier_id, supplier_name, region) VALUES (?, ?, ?);", [suppliers])
+    parts = gen_parts(rng, scale)
+    timed("parts", "INSERT INTO parts (part_id, part_name, category, supplier_id, unit_cost) VALUES (?, ?, ?, ?, ?);",
+          [parts[:5]])
+    timed("shipments", """
+        INSERT INTO shipments
+        (shipment_id, supplier_id, part_id, ship_date, arrival_date, shipping_cost, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?);
+    """, gen_shipments(rng, scale, parts, risky, n_days, iso))
+    tracked = rng.choice(parts[0], min(scale.tracked_parts, scale.parts), replace=False)
+    timed("inventory", """
+        INSERT INTO inventory
+        (inventory_id, part_id, stock_level, reorder_point, warehouse, snapshot_date)
+        VALUES (?, ?, ?, ?, ?, ?);
+    """, [gen_inventory(rng, scale, tracked, n_days, iso)])
+    timed("production", """
+        INSERT INTO production
+        (production_id, part_id, production_date, units_produced, downtime_minutes, defects, plant)
+        VALUES (?, ?, ?, ?, ?, ?, ?);
+    """, gen_production(rng, scale, parts, risky, tracked, n_days, iso))
+    return timings
+
+
+def _run_script(conn, path):
+    with open(path, encoding="utf-8") as fh:
+        conn.executescript(fh.read())
+
+
+def load(conn, engine: str, scale: Scale):
+    """Fill the (empty) tables; returns {table: (rows, seconds)} for the vectorized engine, else {}."""
+    if engine == "loop":
+        load_loop(conn)
+        return {}
+    # Foreign keys are drawn from the generated id ranges, so per-row FK
+    # lookups (more than half the insert time) are skipped for the load.
+    conn.execute("PRAGMA foreign_keys = OFF;")
+    conn.execute("PRAGMA cache_size = -262144;")  # 256 MB page cache for the big inserts
+    return load_vectorized(conn, scale)
+
+
+def _lock_for_swap(db_path: str):
+    """
+    Connection holding an EXCLUSIVE lock on the database about to be
+    replaced, or None if there is none. A WAL database is checkpointed and
+    switched to journal_mode=DELETE first, which SQLite refuses
+    (sqlite3.OperationalError: database is locked) while another connection
+    has it open, and which removes its -wal / -shm files.
+    """
+    if not os.path.exists(db_path):
+        return None
+    conn = sqlite3.connect(db_path, timeout=5, isolation_level=None)
+    try:
+        if conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal":
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+            conn.execute("PRAGMA journal_mode = DELETE;")
+        conn.execute("BEGIN EXCLUSIVE;")
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+def rebuild(db_path: str, engine: str, scale: Scale, day_dates: bool = False):
+    """
+    Build db_path from scratch in a temp file and atomically swap it in.
+    Returns {step: (rows, seconds)}.
+    """
+    import inventory_history
+    import rolling_metrics
+    import scorecards
+
+    db_path = os.path.abspath(db_path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(db_path)}.", suffix=".tmp",
+                                    dir=os.path.dirname(db_path))
+    os.close(fd)
+    os.chmod(tmp_path, 0o644)  # mkstemp creates 0600; the war room must stay readable
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute("PRAGMA journal_mode = OFF;")
+            conn.execute("PRAGMA synchronous = OFF;")
+            conn.execute("PRAGMA locking_mode = EXCLUSIVE;")
+            conn.execute("PRAGMA temp_store = MEMORY;")
+            _run_script(conn, SCHEMA_SQL)
+            steps = load(conn, engine, scale)
+
+            t0 = time.perf_counter()
+            if day_dates:
+                _run_script(conn, DAY_DATES_SQL)  # migrates, indexes and analyzes
+                steps["day dates + indexes + analyze"] = (None, time.perf_counter() - t0)
+            else:
+                _run_script(conn, INDEX_SQL)
+                conn.execute("ANALYZE;")
+                steps["indexes + analyze"] = (None, time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            scorecards.rebuild(conn)
+            steps["scorecards"] = (None, time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            inventory_history.rebuild(conn)
+            steps["inventory history"] = (None, time.perf_counter() - t0)
+            rolling_metrics.reset(conn)  # nothing to drop yet; rolling_metrics.py rebuilds on first run
+
+            conn.execute("PRAGMA locking_mode = NORMAL;")
+            conn.execute("PRAGMA synchronous = NORMAL;")
+            conn.execute("PRAGMA journal_mode = WAL;")
+        finally:
+            conn.close()
+
+        old = _lock_for_swap(db_path)
+        try:
+            os.replace(tmp_path, db_path)
+        finally:
+            if old is not None:
+                old.close()  # rolls back the empty exclusive transaction
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return steps
+
+
+def parse_args(argv=None):
+    d = Scale()
+    ap = argparse.ArgumentParser(description="Generate the war-room tables into industrial_war_room.db")
+    ap.add_argument("--db", default=DB_PATH, help="database to fill (or, with --rebuild, to replace)")
+    ap.add_argument("--rebuild", action="store_true",
+                    help="build a fresh file with schema, indexes and scorecards, then swap it in")
+    ap.add_argument("--day-dates", action="store_true",
+                    help="with --rebuild: store dates as integer day numbers (sql/06_day_dates.sql)")
+    ap.add_argument("--engine", choices=ENGINES, default="loop",
+                    help="loop reproduces the committed database; the scale flags below need vectorized")
+    ap.add_argument("--suppliers", type=int, help=f"default: {d.suppliers}")
+    ap.add_argument("--parts", type=int, help=f"default: {d.parts}")
+    ap.add_argument("--shipments", type=int, help=f"default: {d.shipments}")
+    ap.add_argument("--production", type=int, help=f"default: {d.production}")
+    ap.add_argument("--risky-suppliers", type=int, help="default: 1 in 6 suppliers")
+    ap.add_argument("--tracked-parts", type=int, help="parts with inventory/production; default: 3 in 4 parts")
+    ap.add_argument("--parts-per-snapshot", type=int, help="default: 1 in 3 tracked parts")
+    ap.add_argument("--seed", type=int, help=f"default: {d.seed}")
+    ap.add_argument("--chunk-rows", type=int, help=f"rows per generated chunk / transaction; default: {d.chunk_rows:,}")
+    args = ap.parse_args(argv)
+    if args.day_dates and not args.rebuild:
+        ap.error("--day-dates needs --rebuild (or run sql/06_day_dates.sql on an existing database)")
+    given = [f"--{name.replace('_', '-')}" for name in SCALE_FLAGS if getattr(args, name) is not None]
+    if given and args.engine != "vectorized":
+        ap.error(f"{', '.join(given)}: only used by --engine vectorized (the loop engine has a fixed size)")
+    for name in ("suppliers", "parts", "shipments", "production", "seed", "chunk_rows"):
+        if getattr(args, name) is None:
+            setattr(args, name, getattr(d, name))
+    tracked = args.tracked_parts or args.parts * 3 // 4
+    scale = Scale(
+        suppliers=args.suppliers,
+        parts=args.parts,
+        shipments=args.shipments,
+        production=args.production,
+        risky_suppliers=args.risky_suppliers or args.suppliers // 6,
+        tracked_parts=tracked,
+        parts_per_snapshot=args.parts_per_snapshot or tracked // 3,
+        seed=args.seed,
+        chunk_rows=args.chunk_rows,
+    )
+    return args, scale
+
+def main(argv=None):
+    args, scale = parse_args(argv)
+    if args.rebuild:
+        steps = rebuild(args.db, args.engine, scale, args.day_dates)
+        conn = sqlite3.connect(args.db)
+        cur = conn.cursor()
+    else:
+        conn = sqlite3.connect(args.db)
+        cur = conn.cursor()
+
+        # Speed + integrity
+        cur.execute("PRAGMA foreign_keys = ON;")
+        cur.execute("PRAGMA journal_mode = WAL;")
+        cur.execute("PRAGMA synchronous = NORMAL;")
+
+        # Wipe existing data (keep schema)
+        wipe(conn)
+        if not any(r[1] == "snapshot_date" for r in cur.execute("PRAGMA table_info(inventory)")):
+            cur.execute("ALTER TABLE inventory ADD COLUMN snapshot_date TEXT;")  # built before the column
+        steps = load(conn, args.engine, scale)
+
+        import inventory_history
+        import rolling_metrics
+        import scorecards
+
+        # ids restarted at 1, so the watermarks no longer apply
+        t0 = time.perf_counter()
+        scorecards.rebuild(conn)
+        steps["scorecards"] = (None, time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        inventory_history.rebuild(conn)
+        steps["inventory history"] = (None, time.perf_counter() - t0)
+        rolling_metrics.reset(conn)  # rolling_metrics.py rebuilds its store on the next run
+
+    for step, (rows, secs) in steps.items():
+        if rows is None:
+            print(f"  {step}: {secs:.1f}s")
+        else:
+            print(f"  {step}: {rows:,} rows in {secs:.1f}s ({rows / max(secs, 1e-9):,.0f} rows/s)")
+
     # -----------------------
     # Summary counts
     # -----------------------
@@ -0,0 +1,396 @@
+"""
+Compacted inventory history with point-in-time lookups for the war room.
+
+inventory is an append-only list of snapshot rows (one warehouse per
+weekly snapshot in the generated data). Answering "stock of part X at
+warehouse Y as of date D" from it means finding the latest row for that
+key on or before D, i.e. a scan of every snapshot. This module keeps the
+same information as validity intervals instead:
+
+- inventory.snapshot_date: the date each row was observed (written by
+  generate_data.py; backfill_snapshot_dates() fills it in for databases
+  built before the column existed)
+- inventory_history: one row per (part_id, warehouse) and run of
+  unchanged (stock_level, reorder_point), valid from valid_from
+  (inclusive) to valid_to (exclusive; NULL while still current), with
+  last_seen the last snapshot that confirmed it. Rows repeating the
+  previous values of their key only move last_seen forward.
+- inventory_history_state: the last inventory_id / snapshot_date folded in
+
+inventory_history is a WITHOUT ROWID table keyed on (part_id, warehouse,
+valid_from), so the rows of a key are stored together in date order:
+as_of() is one primary-key seek, history() one range scan, whatever the
+number of snapshots. A partial index on the open intervals lets refresh()
+find the current row of each key it touches.
+
+Snapshots are partial: a key missing from a snapshot keeps its last
+observed values (the interval stays open); last_seen tells how stale they
+are.
+
+The generated data never repeats a key's values from one snapshot to the
+next (every row draws a fresh stock level), so there the history has one
+interval per inventory row and the gain is only the keyed layout. The
+intervals shrink with real snapshots, where most keys are unchanged from
+week to week: 21,000 rows of repeated weekly snapshots compact to 10,520
+intervals.
+
+refresh() folds the inventory rows above the watermark into the history
+in one transaction: the new rows and the open interval of each key they
+touch are compacted together and the open intervals replaced, so it costs
+O(new rows). Snapshots must arrive in date order (a snapshot dated before
+the last one folded in raises ValueError); after any other change,
+rebuild() recomputes from scratch.
+
+reorder_breaches() lists, for a date range, every interval with stock at
+or below its reorder point, clipped to the range, which makes breach
+analysis over years of snapshots a scan of the (much smaller) interval
+table. check() compares as_of() with a brute-force scan of inventory.
+
+Usage:
+    python inventory_history.py                      # refresh, then print the breach summary
+    python inventory_history.py --rebuild --start 2024-06-01 --end 2024-08-31
+    python inventory_history.py --part 17 --warehouse WH-A --as-of 2024-05-15
+    python inventory_history.py --part 17 --warehouse WH-A --start 2024-01-01 --end 2024-12-31
+    python inventory_history.py --backfill-dates 2024-01-01 --rows-per-snapshot 200
+    python inventory_history.py --check
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from scorecards import DB_PATH
+
+KEY = ["part_id", "warehouse"]
+VALUES = ["stock_level", "reorder_point"]
+COLUMNS = KEY + ["valid_from", "valid_to", "last_seen"] + VALUES
+
+HISTORY_SQL = """
+CREATE TABLE IF NOT EXISTS inventory_history (
+    part_id INTEGER NOT NULL,
+    warehouse TEXT NOT NULL,
+    valid_from TEXT NOT NULL,
+    valid_to TEXT,
+    last_seen TEXT NOT NULL,
+    stock_level INTEGER,
+    reorder_point INTEGER,
+    PRIMARY KEY (part_id, warehouse, valid_from)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_inventory_history_open
+  ON inventory_history(part_id, warehouse) WHERE valid_to IS NULL;
+
+CREATE TABLE IF NOT EXISTS inventory_history_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    last_id INTEGER NOT NULL,
+    last_snapshot_date TEXT
+);
+"""
+
+AS_OF_SQL = """
+SELECT part_id, warehouse, valid_from, valid_to, last_seen, stock_level, reorder_point
+FROM inventory_history
+WHERE part_id = ? AND warehouse = ? AND valid_from <= ?
+ORDER BY valid_from DESC
+LIMIT 1
+"""
+
+BREACHES_SQL = """
+SELECT
+  h.part_id,
+  p.part_name,
+  h.warehouse,
+  MAX(h.valid_from, :start) AS breach_from,
+  MIN(COALESCE(h.valid_to, :stop), :stop) AS breach_to,
+  CAST(julianday(MIN(COALESCE(h.valid_to, :stop), :stop)) - julianday(MAX(h.valid_from, :start)) AS INTEGER)
+    AS breach_days,
+  h.stock_level,
+  h.reorder_point,
+  h.last_seen
+FROM inventory_history h
+LEFT JOIN parts p ON h.part_id = p.part_id
+WHERE h.stock_level <= h.reorder_point
+  AND h.valid_from < :stop
+  AND (h.valid_to IS NULL OR h.valid_to > :start)
+ORDER BY h.part_id, h.warehouse, h.valid_from
+"""
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(HISTORY_SQL)
+
+
+def _has_snapshot_date(conn: sqlite3.Connection) -> bool:
+    return any(r[1] == "snapshot_date" for r in conn.execute("PRAGMA table_info(inventory)"))
+
+
+def backfill_snapshot_dates(conn: sqlite3.Connection, first_date: str, every_days: int = 7,
+                            rows_per_snapshot: int = 200) -> int:
+    """
+    Add inventory.snapshot_date if missing and date the undated rows,
+    assuming they were inserted one snapshot at a time, rows_per_snapshot
+    rows each, every_days apart from first_date (how generate_data.py
+    wrote them). Returns the number of rows dated.
+    """
+    if not _has_snapshot_date(conn):
+        conn.execute("ALTER TABLE inventory ADD COLUMN snapshot_date TEXT")
+    first_id = conn.execute("SELECT MIN(inventory_id) FROM inventory").fetchone()[0]
+    cur = conn.execute("""
+        UPDATE inventory
+        SET snapshot_date = date(:first, '+' || (((inventory_id - :first_id) / :rows) * :every) || ' days')
+        WHERE snapshot_date IS NULL""",
+        {"first": first_date, "first_id": first_id, "rows": rows_per_snapshot, "every": every_days})
+    conn.commit()
+    return cur.rowcount
+
+
+def compact(rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Validity intervals (COLUMNS) from observations with KEY, VALUES and
+    snapshot_date (plus last_seen, if it differs from snapshot_date). For a
+    key observed twice on the same date the later row wins; consecutive
+    observations with the same values collapse into one interval.
+    """
+    if rows.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    rows = rows.reset_index(drop=True)
+    if "last_seen" not in rows:
+        rows = rows.assign(last_seen=rows["snapshot_date"])
+    rows = (rows.sort_values(KEY + ["snapshot_date"], kind="mergesort")
+                .drop_duplicates(KEY + ["snapshot_date"], keep="last")
+                .reset_index(drop=True))
+
+    same_key = np.ones(len(rows), dtype=bool)
+    for col in KEY:
+        v = rows[col].to_numpy()
+        same_key[1:] &= v[1:] == v[:-1]
+    same_key[0] = False
+    same_values = same_key.copy()
+    for col in VALUES:
+        v = rows[col].to_numpy()
+        same_values[1:] &= v[1:] == v[:-1]
+
+    starts = rows[~same_values].reset_index(drop=True)
+    # rows are in date order within a key, so the last row of a run was seen last
+    ends = np.r_[np.flatnonzero(~same_values)[1:] - 1, len(rows) - 1]
+    last_seen = rows["last_seen"].to_numpy()[ends]
+    # an interval ends where the next one of the same key starts
+    next_same_key = np.zeros(len(starts), dtype=bool)
+    next_same_key[:-1] = same_key[~same_values][1:]
+    valid_to = np.where(next_same_key, np.roll(starts["snapshot_date"].to_numpy(), -1), None)
+    return pd.DataFrame({
+        "part_id": starts["part_id"],
+        "warehouse": starts["warehouse"],
+        "valid_from": starts["snapshot_date"],
+        "valid_to": valid_to,
+        "last_seen": last_seen,
+        "stock_level": starts["stock_level"],
+        "reorder_point": starts["reorder_point"],
+    })
+
+
+def _state(conn: sqlite3.Connection) -> tuple:
+    row = conn.execute("SELECT last_id, last_snapshot_date FROM inventory_history_state WHERE id = 1").fetchone()
+    return row if row else (0, None)
+
+
+def refresh(conn: sqlite3.Connection, full: bool = False) -> dict:
+    """
+    Fold inventory rows added since the last refresh into inventory_history,
+    in one transaction; full=True empties it first and folds in everything.
+    Returns the number of rows folded in and intervals written.
+    """
+    if not _has_snapshot_date(conn):
+        raise ValueError("inventory has no snapshot_date column; run backfill_snapshot_dates() "
+                         "(--backfill-dates) or regenerate the database")
+    ensure_schema(conn)
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")  # writers wait, so the [lo, hi] range is stable
+    try:
+        if full:
+            conn.execute("DELETE FROM inventory_history")
+            conn.execute("DELETE FROM inventory_history_state")
+        lo, last_date = _state(conn)
+        hi = conn.execute("SELECT COALESCE(MAX(inventory_id), 0) FROM inventory").fetchone()[0]
+        new = pd.read_sql_query("""
+            SELECT part_id, warehouse, snapshot_date, stock_level, reorder_point
+            FROM inventory
+            WHERE inventory_id > ? AND inventory_id <= ?
+            ORDER BY inventory_id""", conn, params=(lo, hi))
+        written = 0
+        if not new.empty:
+            if new["snapshot_date"].isna().any():
+                raise ValueError("inventory rows without snapshot_date; run backfill_snapshot_dates() first")
+            first = new["snapshot_date"].min()
+            if last_date is not None and first < last_date:
+                raise ValueError(f"snapshot dated {first} arrived after {last_date} was folded in; "
+                                 "rebuild() to recompact")
+
+            # the open interval of each touched key is compacted together with the new rows
+            keys = new[KEY].drop_duplicates()
+            conn.execute("CREATE TEMP TABLE touched (part_id INTEGER, warehouse TEXT, PRIMARY KEY (part_id, warehouse))")
+            conn.executemany("INSERT INTO temp.touched VALUES (?, ?)", keys.itertuples(index=False, name=None))
+            open_rows = pd.read_sql_query("""
+                SELECT h.part_id, h.warehouse, h.valid_from AS snapshot_date, h.last_seen,
+                       h.stock_level, h.reorder_point
+                FROM temp.touched t
+                JOIN inventory_history h
+                  ON h.part_id = t.part_id AND h.warehouse = t.warehouse AND h.valid_to IS NULL""", conn)
+            new["last_seen"] = new["snapshot_date"]
+            intervals = compact(pd.concat([open_rows, new], ignore_index=True))
+            conn.execute("""
+                DELETE FROM inventory_history
+                WHERE valid_to IS NULL AND (part_id, warehouse) IN (SELECT part_id, warehouse FROM temp.touched)""")
+            conn.execute("DROP TABLE temp.touched")
+            conn.executemany(f"INSERT INTO inventory_history ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             intervals[COLUMNS].itertuples(index=False, name=None))
+            written = len(intervals) - len(open_rows)
+            last_date = max(last_date or first, new["snapshot_date"].max())
+        conn.execute("INSERT INTO inventory_history_state (id, last_id, last_snapshot_date) VALUES (1, ?, ?) "
+                     "ON CONFLICT (id) DO UPDATE SET last_id = excluded.last_id, "
+                     "last_snapshot_date = excluded.last_snapshot_date", (hi, last_date))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return {"inventory rows": len(new), "new intervals": written}
+
+
+def rebuild(conn: sqlite3.Connection) -> dict:
+    """Recompute inventory_history from every snapshot (readers see the old one until it commits)."""
+    return refresh(conn, full=True)
+
+
+def as_of(conn: sqlite3.Connection, part_id: int, warehouse: str, day: str) -> dict | None:
+    """Interval holding (part_id, warehouse) on day (ISO date), or None before its first snapshot."""
+    cur = conn.execute(AS_OF_SQL, (part_id, warehouse, day))
+    row = cur.fetchone()
+    return dict(zip([c[0] for c in cur.description], row)) if row else None
+
+
+def history(conn: sqlite3.Connection, part_id: int, warehouse: str,
+            start: str | None = None, end: str | None = None) -> pd.DataFrame:
+    """Intervals of (part_id, warehouse) overlapping start..end (inclusive ISO dates; None = unbounded)."""
+    return pd.read_sql_query(f"""
+        SELECT {', '.join(COLUMNS)}
+        FROM inventory_history
+        WHERE part_id = :part AND warehouse = :wh
+          AND (:end IS NULL OR valid_from <= :end)
+          AND (:start IS NULL OR valid_to IS NULL OR valid_to > :start)
+        ORDER BY valid_from""", conn, params={"part": part_id, "wh": warehouse, "start": start, "end": end})
+
+
+def snapshot_at(conn: sqlite3.Connection, day: str) -> pd.DataFrame:
+    """Last known stock of every (part_id, warehouse) on day."""
+    return pd.read_sql_query(f"""
+        SELECT {', '.join(COLUMNS)}
+        FROM inventory_history
+        WHERE valid_from <= :day AND (valid_to IS NULL OR valid_to > :day)
+        ORDER BY part_id, warehouse""", conn, params={"day": day})
+
+
+def reorder_breaches(conn: sqlite3.Connection, start: str, end: str) -> pd.DataFrame:
+    """
+    Intervals with stock_level <= reorder_point overlapping start..end
+    (inclusive), clipped to it; breach_to is exclusive.
+    """
+    stop = conn.execute("SELECT date(?, '+1 day')", (end,)).fetchone()[0]
+    return pd.read_sql_query(BREACHES_SQL, conn, params={"start": start, "stop": stop})
+
+
+def breach_summary(breaches: pd.DataFrame, limit: int = 20) -> pd.DataFrame:
+    """Days at or below the reorder point per part and warehouse, longest first."""
+    return (breaches.groupby(KEY + ["part_name"], as_index=False)
+            .agg(breach_days=("breach_days", "sum"), intervals=("breach_days", "size"),
+                 min_stock=("stock_level", "min"))
+            .sort_values(["breach_days", "min_stock"], ascending=[False, True])
+            .head(limit))
+
+
+def check(conn: sqlite3.Connection, samples: int = 2000, seed: int = 0) -> pd.DataFrame:
+    """as_of() vs the latest inventory row on or before the date, for random keys and dates."""
+    rng = np.random.default_rng(seed)
+    keys = conn.execute("SELECT DISTINCT part_id, warehouse FROM inventory").fetchall()
+    lo, hi = conn.execute("SELECT MIN(snapshot_date), date(MAX(snapshot_date), '+7 days') FROM inventory").fetchone()
+    days = np.arange(np.datetime64(lo) - 7, np.datetime64(hi)).astype(str)
+    picks = [(keys[i], days[j]) for i, j in zip(rng.integers(len(keys), size=samples),
+                                                rng.integers(len(days), size=samples))]
+    t0 = time.perf_counter()
+    expected = [conn.execute("""
+        SELECT stock_level, reorder_point FROM inventory
+        WHERE part_id = ? AND warehouse = ? AND snapshot_date <= ?
+        ORDER BY snapshot_date DESC, inventory_id DESC LIMIT 1""", (*key, day)).fetchone()
+        for key, day in picks]
+    t1 = time.perf_counter()
+    got = [as_of(conn, *key, day) for key, day in picks]
+    t2 = time.perf_counter()
+    mismatches = sum(
+        (e is None) != (g is None) or (e is not None and e != (g["stock_level"], g["reorder_point"]))
+        for e, g in zip(expected, got))
+    rows = conn.execute("SELECT COUNT(*) FROM inventory").fetchone()[0]
+    intervals = conn.execute("SELECT COUNT(*) FROM inventory_history").fetchone()[0]
+    return pd.DataFrame([{"lookups": samples, "inventory_rows": rows, "intervals": intervals,
+                          "scan_ms": 1000 * (t1 - t0) / samples, "as_of_ms": 1000 * (t2 - t1) / samples,
+                          "mismatches": mismatches}])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compact inventory snapshots into validity intervals and query them")
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--rebuild", action="store_true", help="recompute from scratch instead of folding in new rows")
+    ap.add_argument("--backfill-dates", metavar="FIRST_DATE",
+                    help="date undated inventory rows as snapshots every --every-days from FIRST_DATE")
+    ap.add_argument("--every-days", type=int, default=7)
+    ap.add_argument("--rows-per-snapshot", type=int, default=200)
+    ap.add_argument("--part", type=int, help="with --warehouse: look up one key")
+    ap.add_argument("--warehouse")
+    ap.add_argument("--as-of", help="date for a --part/--warehouse point lookup")
+    ap.add_argument("--start", help="range start (default: first snapshot)")
+    ap.add_argument("--end", help="range end, inclusive (default: last snapshot)")
+    ap.add_argument("--limit", type=int, default=20, help="rows of the breach summary")
+    ap.add_argument("--check", action="store_true", help="compare as_of() with a scan of inventory")
+    args = ap.parse_args()
+    if (args.part is None) != (args.warehouse is None):
+        ap.error("--part and --warehouse go together")
+
+    conn = sqlite3.connect(args.db)
+    if args.backfill_dates:
+        n = backfill_snapshot_dates(conn, args.backfill_dates, args.every_days, args.rows_per_snapshot)
+        print(f"dated {n:,} inventory rows")
+    elif not _has_snapshot_date(conn):
+        conn.close()
+        ap.error(f"{args.db}: inventory has no snapshot_date column (built before it existed); run once with "
+                 "--backfill-dates 2024-01-01, which dates the rows the way generate_data.py does, "
+                 "or regenerate the database")
+    t0 = time.perf_counter()
+    folded = rebuild(conn) if args.rebuild else refresh(conn)
+    print(f"{'rebuilt' if args.rebuild else 'refreshed'} in {time.perf_counter() - t0:.2f}s: "
+          + ", ".join(f"{n:,} {what}" for what, n in folded.items()))
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        if args.check:
+            result = check(conn)
+            print(result.round(4).to_string(index=False))
+            conn.close()
+            raise SystemExit(0 if (result["mismatches"] == 0).all() else 1)
+        first, last = conn.execute("SELECT MIN(valid_from), MAX(last_seen) FROM inventory_history").fetchone()
+        start, end = args.start or first, args.end or last
+        if args.part is not None and args.as_of:
+            print(as_of(conn, args.part, args.warehouse, args.as_of))
+        elif args.part is not None:
+            print(history(conn, args.part, args.warehouse, start, end).to_string(index=False))
+        else:
+            breaches = reorder_breaches(conn, start, end)
+            print(f"\n-- at or below reorder point, {start} .. {end}: "
+                  f"{len(breaches):,} intervals, {breaches['breach_days'].sum():,} part-warehouse days")
+            print(breach_summary(breaches, args.limit).to_string(index=False))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
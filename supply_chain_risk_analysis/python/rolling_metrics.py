@@ -0,0 +1,491 @@
+"""
+Rolling-window supplier reliability: 7 / 30 / 90-day transit time,
+downtime and defect rate per supplier, with threshold-breach alerts.
+
+The war-room SQL only gives whole-year averages per supplier. Here every
+metric is kept as per-(day, supplier) sums of a few additive fields:
+
+- shipments, transit_days: shipments shipped that day, by
+  shipments.supplier_id
+- production_rows, units, downtime, defects: production that day, by the
+  part's supplier
+
+so a window's average is a ratio of window sums (transit_days /
+shipments, downtime / production_rows, defects / units), and window sums
+slide with additions and subtractions only.
+
+Two paths over the same buckets:
+
+- rolling_series(): the full history, from cumulative sums over a dense
+  (days x suppliers x fields) array: sum over (t - W, t] = C[t] - C[t - W]
+- RollingStore: the current windows only, kept in a .npz file. A ring
+  buffer holds the last 90 daily bucket rows plus one running sum per
+  window. Moving to the next day subtracts the day leaving each window
+  and clears its ring slot, so appending a day costs O(suppliers)
+  whatever the history length. ingest() reads only fact rows above its
+  shipment_id / production_id watermarks. Late rows for a day still in
+  the ring are added to the ring and to the windows that contain it.
+  Rows older than 90 days cannot affect any current window and are
+  skipped.
+
+The .npz lives outside the database, so the database keeps the other
+half: rolling_state holds the store's generation (a random token made
+when a store starts fresh) and the watermarks it was saved at. A store
+is only reused when both match; otherwise (database regenerated, ids
+restarted, store file from another database or lost) it is rebuilt from
+every fact row. generate_data.py calls reset(), which drops rolling_state
+with supplier_alerts and supplier_rolling_series.
+
+After each ingest the current windows are checked against Thresholds
+(absolute limits, and 7 / 30-day values against the supplier's 90-day
+value) and the breaches for the as-of day replace that day's rows in the
+supplier_alerts table, which dashboards poll.
+
+Usage:
+    python rolling_metrics.py                       # ingest new rows, refresh alerts
+    python rolling_metrics.py --rebuild --series    # also (re)write supplier_rolling_series
+    python rolling_metrics.py --db /tmp/war_5m.db --store /tmp/war_5m_rolling.npz --check
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scorecards import DB_PATH
+
+WINDOWS = (7, 30, 90)
+FIELDS = ("shipments", "transit_days", "production_rows", "units", "downtime", "defects")
+SHIPMENTS, TRANSIT, ROWS, UNITS, DOWNTIME, DEFECTS = range(len(FIELDS))
+
+ALERTS_SQL = """
+CREATE TABLE IF NOT EXISTS supplier_alerts (
+    alert_date TEXT NOT NULL,
+    supplier_id INTEGER NOT NULL,
+    window_days INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    rule TEXT NOT NULL,
+    value REAL NOT NULL,
+    threshold REAL NOT NULL,
+    PRIMARY KEY (alert_date, supplier_id, window_days, metric, rule)
+);
+"""
+
+STATE_SQL = """
+CREATE TABLE IF NOT EXISTS rolling_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    generation TEXT NOT NULL,
+    last_shipment_id INTEGER NOT NULL,
+    last_production_id INTEGER NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    """
+    A window breaches when it has at least min_observations shipments
+    (transit) or production rows (downtime, defect rate) and either
+    exceeds the limit ('limit') or exceeds vs_baseline times the
+    supplier's 90-day value ('vs_90d').
+    """
+
+    avg_transit_days: float = 12.0
+    avg_downtime: float = 120.0
+    defect_rate: float = 0.02
+    vs_baseline: float = 1.5
+    min_observations: int = 10
+    windows: Tuple[int, ...] = (7, 30)
+
+
+def default_store_path(db_path: str) -> str:
+    return os.path.splitext(os.path.abspath(db_path))[0] + "_rolling.npz"
+
+
+def reset(conn: sqlite3.Connection) -> None:
+    """Drop the rolling state and everything derived from it (the fact rows were replaced)."""
+    with conn:
+        for table in ("rolling_state", "supplier_alerts", "supplier_rolling_series"):
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def _dates(days: np.ndarray) -> np.ndarray:
+    return np.asarray(days, dtype=np.int64).astype("datetime64[D]")
+
+
+def _sources(conn: sqlite3.Connection) -> Dict[str, str]:
+    """Table names and day-number expressions, reading the integer-day tables after sql/06_day_dates.sql."""
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'shipments_days'").fetchone():
+        return {"shipments": "shipments_days", "production": "production_days", "ship_day": "ship_day",
+                "transit": "arrival_day - ship_day", "production_day": "production_day"}
+    return {"shipments": "shipments", "production": "production",
+            "ship_day": "CAST(julianday(ship_date) - 2440587.5 AS INTEGER)",
+            "transit": "julianday(arrival_date) - julianday(ship_date)",
+            "production_day": "CAST(julianday(production_date) - 2440587.5 AS INTEGER)"}
+
+
+def read_buckets(conn: sqlite3.Connection, after: Optional[Dict[str, int]] = None) -> tuple:
+    """
+    Per-(supplier, day) field sums of the fact rows with ids above `after`
+    (default: all rows). Returns (supplier_id, day, values[n, len(FIELDS)],
+    {fact table: max id read}).
+    """
+    after = after or {"shipments": 0, "production": 0}
+    src = _sources(conn)
+    hi = {
+        "shipments": conn.execute(f"SELECT COALESCE(MAX(shipment_id), 0) FROM {src['shipments']}").fetchone()[0],
+        "production": conn.execute(f"SELECT COALESCE(MAX(production_id), 0) FROM {src['production']}").fetchone()[0],
+    }
+    for table in hi:
+        if hi[table] < after[table]:
+            raise RuntimeError(f"{table} ids went backwards (database rebuilt?); rebuild the rolling store")
+    ship = np.array(conn.execute(f"""
+        SELECT supplier_id, {src['ship_day']} AS day, COUNT(*), SUM({src['transit']})
+        FROM {src['shipments']}
+        WHERE shipment_id > ? AND shipment_id <= ?
+        GROUP BY supplier_id, day""", (after["shipments"], hi["shipments"])).fetchall(), dtype=np.float64)
+    prod = np.array(conn.execute(f"""
+        SELECT p.supplier_id, {src['production_day']} AS day, COUNT(*),
+               SUM(pr.units_produced), SUM(pr.downtime_minutes), SUM(pr.defects)
+        FROM {src['production']} pr
+        JOIN parts p ON pr.part_id = p.part_id
+        WHERE pr.production_id > ? AND pr.production_id <= ?
+        GROUP BY p.supplier_id, day""", (after["production"], hi["production"])).fetchall(), dtype=np.float64)
+    ship = ship.reshape(-1, 4)
+    prod = prod.reshape(-1, 6)
+
+    values = np.zeros((len(ship) + len(prod), len(FIELDS)))
+    values[:len(ship), [SHIPMENTS, TRANSIT]] = ship[:, 2:]
+    values[len(ship):, [ROWS, UNITS, DOWNTIME, DEFECTS]] = prod[:, 2:]
+    supplier = np.concatenate([ship[:, 0], prod[:, 0]]).astype(np.int64)
+    day = np.concatenate([ship[:, 1], prod[:, 1]]).astype(np.int64)
+    return supplier, day, values, hi
+
+
+def _ratios(sums: np.ndarray) -> Dict[str, np.ndarray]:
+    """Window averages from field sums (last axis = FIELDS); NaN where there is nothing to average."""
+    def ratio(num, den):
+        return np.divide(sums[..., num], sums[..., den], out=np.full(sums.shape[:-1], np.nan),
+                         where=sums[..., den] > 0)
+
+    return {
+        "shipments": sums[..., SHIPMENTS].astype(np.int64),
+        "avg_transit_days": ratio(TRANSIT, SHIPMENTS),
+        "production_rows": sums[..., ROWS].astype(np.int64),
+        "avg_downtime": ratio(DOWNTIME, ROWS),
+        "defect_rate": ratio(DEFECTS, UNITS),
+    }
+
+
+def rolling_series(conn: sqlite3.Connection, windows=WINDOWS) -> pd.DataFrame:
+    """
+    Every day's 7 / 30 / 90-day values per supplier, from cumulative sums
+    over the dense daily buckets. Long format: one row per (day, supplier,
+    window) from the first to the last day with data.
+    """
+    supplier, day, values, _ = read_buckets(conn)
+    if len(day) == 0:
+        return pd.DataFrame(columns=["day", "supplier_id", "window_days"] + list(_ratios(np.zeros((0, 6)))))
+    ids = np.unique(supplier)
+    day0 = day.min()
+    daily = np.zeros((day.max() - day0 + 1, len(ids), len(FIELDS)))
+    np.add.at(daily, (day - day0, np.searchsorted(ids, supplier)), values)
+    cum = np.concatenate([np.zeros((1,) + daily.shape[1:]), np.cumsum(daily, axis=0)])
+    n_days = len(daily)
+    frames = []
+    for w in windows:
+        t = np.arange(n_days)
+        sums = cum[t + 1] - cum[np.maximum(t + 1 - w, 0)]  # days (t - w, t]
+        cols = {k: v.ravel() for k, v in _ratios(sums).items()}
+        frames.append(pd.DataFrame({
+            "day": np.repeat(_dates(day0 + t), len(ids)),
+            "supplier_id": np.tile(ids, n_days),
+            "window_days": w,
+            **cols,
+        }))
+    return pd.concat(frames, ignore_index=True).sort_values(["day", "supplier_id", "window_days"], ignore_index=True)
+
+
+class RollingStore:
+    def __init__(self, windows=WINDOWS):
+        self.windows = tuple(sorted(windows))
+        self.supplier_ids = np.empty(0, dtype=np.int64)
+        self.last_day: Optional[int] = None
+        self.ring = np.zeros((self.span, 0, len(FIELDS)))  # slot: day % span
+        self.sums = np.zeros((len(self.windows), 0, len(FIELDS)))
+        self.last_ids = {"shipments": 0, "production": 0}
+        self.generation = os.urandom(8).hex()
+
+    @property
+    def span(self) -> int:
+        return max(self.windows)
+
+    # --- persistence -----------------------------------------------------------
+
+    @classmethod
+    def load(cls, path: str) -> "RollingStore":
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as z:
+            st = cls(tuple(z["windows"].tolist()))
+            st.supplier_ids = z["supplier_ids"]
+            st.last_day = int(z["last_day"][0]) if z["last_day"].size else None
+            st.ring = z["ring"]
+            st.sums = z["sums"]
+            st.last_ids = dict(zip(("shipments", "production"), z["last_ids"].tolist()))
+            st.generation = str(z["generation"]) if "generation" in z.files else None
+        return st
+
+    @classmethod
+    def open(cls, conn: sqlite3.Connection, path: str) -> Tuple["RollingStore", Optional[str]]:
+        """
+        The store at path if conn's rolling_state records its generation and
+        watermarks, else a fresh store. Returns (store, why it starts fresh
+        or None).
+        """
+        conn.executescript(STATE_SQL)
+        row = conn.execute("SELECT generation, last_shipment_id, last_production_id FROM rolling_state "
+                           "WHERE id = 1").fetchone()
+        if not os.path.exists(path):
+            return cls(), None if row is None else f"{path} is missing"
+        if row is None:
+            return cls(), "the database has no rolling_state (regenerated?)"
+        st = cls.load(path)
+        if st.generation != row[0]:
+            return cls(), f"{path} was not saved against this database"
+        if (st.last_ids["shipments"], st.last_ids["production"]) != tuple(row[1:]):
+            return cls(), "the store's watermarks differ from the database's"
+        return st, None
+
+    def save(self, path: str, conn: Optional[sqlite3.Connection] = None) -> None:
+        """
+        Write to a temp file next to path, then os.replace() it in; with conn,
+        then record the generation and watermarks in its rolling_state.
+        """
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(
+                fh,
+                windows=np.array(self.windows, dtype=np.int64),
+                supplier_ids=self.supplier_ids,
+                last_day=np.array([] if self.last_day is None else [self.last_day], dtype=np.int64),
+                ring=self.ring,
+                sums=self.sums,
+                last_ids=np.array([self.last_ids["shipments"], self.last_ids["production"]], dtype=np.int64),
+                generation=np.array(self.generation),
+            )
+        os.replace(tmp, path)
+        if conn is not None:
+            conn.executescript(STATE_SQL)
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO rolling_state (id, generation, last_shipment_id, last_production_id) "
+                             "VALUES (1, ?, ?, ?)",
+                             (self.generation, self.last_ids["shipments"], self.last_ids["production"]))
+
+    # --- ingest ----------------------------------------------------------------
+
+    def _codes(self, supplier_id: np.ndarray) -> np.ndarray:
+        """Column per supplier_id, adding columns for suppliers not seen before."""
+        new = np.setdiff1d(supplier_id, self.supplier_ids)
+        if len(new):
+            ids = np.union1d(self.supplier_ids, new)
+            keep = np.searchsorted(ids, self.supplier_ids)
+            for name in ("ring", "sums"):
+                old = getattr(self, name)
+                grown = np.zeros(old.shape[:1] + (len(ids),) + old.shape[2:])
+                grown[:, keep] = old
+                setattr(self, name, grown)
+            self.supplier_ids = ids
+        return np.searchsorted(self.supplier_ids, supplier_id)
+
+    def advance(self, day: int) -> None:
+        """Slide every window forward to end on `day`: O(windows x suppliers) per day moved."""
+        if self.last_day is None:
+            self.last_day = day - 1
+        if day - self.last_day >= self.span:
+            self.ring[:] = 0
+            self.sums[:] = 0
+            self.last_day = day
+            return
+        for d in range(self.last_day + 1, day + 1):
+            for k, w in enumerate(self.windows):
+                self.sums[k] -= self.ring[(d - w) % self.span]  # day d - w leaves the window (d - w, d]
+            self.ring[d % self.span] = 0
+            self.last_day = d
+
+    def add(self, day: np.ndarray, col: np.ndarray, values: np.ndarray) -> int:
+        """
+        Add bucket rows for days already covered (last_day - span < day <=
+        last_day). Returns how many rows were older than the ring and skipped.
+        """
+        age = self.last_day - day
+        ok = (age >= 0) & (age < self.span)
+        np.add.at(self.ring, (day[ok] % self.span, col[ok]), values[ok])
+        for k, w in enumerate(self.windows):
+            m = ok & (age < w)
+            np.add.at(self.sums[k], col[m], values[m])
+        return int((~ok & (age >= 0)).sum())
+
+    def ingest(self, conn: sqlite3.Connection, through_day: Optional[int] = None) -> dict:
+        """
+        Fold fact rows above the watermarks into the windows, one day at a
+        time, then slide on to through_day if given (days with no rows).
+        """
+        supplier, day, values, hi = read_buckets(conn, self.last_ids)
+        col = self._codes(supplier)
+        late = skipped = 0
+        if len(day):
+            if self.last_day is not None:
+                old = day <= self.last_day
+                late = int(old.sum())
+                skipped += self.add(day[old], col[old], values[old])
+                day, col, values = day[~old], col[~old], values[~old]
+            order = np.argsort(day, kind="stable")
+            day, col, values = day[order], col[order], values[order]
+            starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]]) if len(day) else np.empty(0, int)
+            for lo, hi_ in zip(starts, np.r_[starts[1:], len(day)].astype(int)):
+                self.advance(int(day[lo]))
+                self.add(day[lo:hi_], col[lo:hi_], values[lo:hi_])
+        if through_day is not None and (self.last_day is None or through_day > self.last_day):
+            self.advance(through_day)
+        self.last_ids = hi
+        return {"buckets": len(supplier), "late_buckets": late, "skipped_buckets": skipped,
+                "as_of": None if self.last_day is None else str(_dates(self.last_day))}
+
+    # --- readers ---------------------------------------------------------------
+
+    def current(self) -> pd.DataFrame:
+        """One row per (supplier, window) for the windows ending on last_day."""
+        cols = {k: v.ravel() for k, v in _ratios(self.sums).items()}
+        n = len(self.supplier_ids)
+        return pd.DataFrame({
+            "supplier_id": np.tile(self.supplier_ids, len(self.windows)),
+            "window_days": np.repeat(self.windows, n),
+            **cols,
+        }).sort_values(["supplier_id", "window_days"], ignore_index=True)
+
+    def alerts(self, thresholds: Thresholds = Thresholds()) -> pd.DataFrame:
+        """Breaches of the current windows, one row per (supplier, window, metric, rule)."""
+        cur = self.current()
+        base = cur[cur["window_days"] == self.span].set_index("supplier_id")
+        checks = (
+            ("avg_transit_days", "shipments", thresholds.avg_transit_days),
+            ("avg_downtime", "production_rows", thresholds.avg_downtime),
+            ("defect_rate", "production_rows", thresholds.defect_rate),
+        )
+        frames = []
+        for w in thresholds.windows:
+            win = cur[cur["window_days"] == w].set_index("supplier_id")
+            for metric, count, limit in checks:
+                enough = win[count] >= thresholds.min_observations
+                value = win[metric]
+                baseline = base[metric].reindex(win.index) * thresholds.vs_baseline
+                for rule, bound in (("limit", pd.Series(limit, index=win.index)), ("vs_90d", baseline)):
+                    hit = enough & (value > bound)
+                    frames.append(pd.DataFrame({
+                        "supplier_id": win.index[hit], "window_days": w, "metric": metric, "rule": rule,
+                        "value": value[hit].to_numpy(), "threshold": bound[hit].to_numpy(),
+                    }))
+        out = pd.concat(frames, ignore_index=True)
+        out.insert(0, "alert_date", str(_dates(self.last_day)) if self.last_day is not None else None)
+        return out.sort_values(["supplier_id", "window_days", "metric", "rule"], ignore_index=True)
+
+
+def write_alerts(conn: sqlite3.Connection, alerts: pd.DataFrame, as_of: str) -> None:
+    """Replace the as-of day's rows in supplier_alerts."""
+    conn.executescript(ALERTS_SQL)
+    with conn:
+        conn.execute("DELETE FROM supplier_alerts WHERE alert_date = ?", (as_of,))
+        conn.executemany(
+            "INSERT INTO supplier_alerts (alert_date, supplier_id, window_days, metric, rule, value, threshold) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            alerts[["alert_date", "supplier_id", "window_days", "metric", "rule", "value", "threshold"]]
+            .astype(object).itertuples(index=False, name=None))
+
+
+def write_series(conn: sqlite3.Connection, series: pd.DataFrame) -> None:
+    """Replace the supplier_rolling_series table."""
+    out = series.assign(day=series["day"].astype(str))
+    with conn:
+        conn.execute("DROP TABLE IF EXISTS supplier_rolling_series")
+        out.to_sql("supplier_rolling_series", conn, index=False)
+        conn.execute("CREATE INDEX idx_supplier_rolling_series ON supplier_rolling_series(supplier_id, window_days, day)")
+
+
+def check(store: RollingStore, series: pd.DataFrame) -> bool:
+    """Whether the store's current windows equal the cumulative-sum series on the store's last day."""
+    last = series[series["day"] == _dates(store.last_day)].drop(columns="day")
+    cur = store.current()
+    cur = cur[cur["supplier_id"].isin(last["supplier_id"])].reset_index(drop=True)
+    last = last.sort_values(["supplier_id", "window_days"], ignore_index=True)
+    try:
+        pd.testing.assert_frame_equal(cur, last, check_dtype=False, rtol=1e-9)
+        return True
+    except AssertionError:
+        return False
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Rolling 7/30/90-day supplier metrics and threshold alerts")
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--store", help="rolling state file (default: <db>_rolling.npz)")
+    ap.add_argument("--rebuild", action="store_true", help="start a fresh store from every fact row")
+    ap.add_argument("--through", help="slide the windows on to this date (YYYY-MM-DD) after ingesting")
+    ap.add_argument("--series", action="store_true", help="also (re)write supplier_rolling_series from cumsums")
+    ap.add_argument("--check", action="store_true", help="compare the store with the cumulative-sum series")
+    t = Thresholds()
+    ap.add_argument("--max-transit", type=float, default=t.avg_transit_days)
+    ap.add_argument("--max-downtime", type=float, default=t.avg_downtime)
+    ap.add_argument("--max-defect-rate", type=float, default=t.defect_rate)
+    ap.add_argument("--vs-baseline", type=float, default=t.vs_baseline)
+    ap.add_argument("--min-observations", type=int, default=t.min_observations)
+    args = ap.parse_args()
+
+    store_path = args.store or default_store_path(args.db)
+    conn = sqlite3.connect(args.db)
+    store, why = (RollingStore(), None) if args.rebuild else RollingStore.open(conn, store_path)
+    if why:
+        print(f"rebuilding the rolling store: {why}")
+    through = int(np.datetime64(args.through, "D").astype(np.int64)) if args.through else None
+
+    t0 = time.perf_counter()
+    info = store.ingest(conn, through)
+    t1 = time.perf_counter()
+    store.save(store_path, conn)
+    print(f"ingested {info['buckets']:,} (supplier, day) buckets in {t1 - t0:.2f}s "
+          f"({info['late_buckets']:,} late, {info['skipped_buckets']:,} older than {store.span} days); "
+          f"as of {info['as_of']}")
+
+    if store.last_day is not None:
+        thresholds = Thresholds(args.max_transit, args.max_downtime, args.max_defect_rate, args.vs_baseline,
+                                args.min_observations)
+        alerts = store.alerts(thresholds)
+        write_alerts(conn, alerts, info["as_of"])
+        with pd.option_context("display.width", 200, "display.max_columns", None):
+            print(f"\n-- supplier_alerts for {info['as_of']}: {len(alerts)} breaches")
+            if len(alerts):
+                print(alerts.round(4).to_string(index=False, max_rows=40))
+
+    if args.series or args.check:
+        t0 = time.perf_counter()
+        series = rolling_series(conn, store.windows)
+        print(f"\nseries: {len(series):,} rows from cumulative sums in {time.perf_counter() - t0:.2f}s")
+        if args.series:
+            write_series(conn, series)
+        if args.check:
+            ok = check(store, series)
+            print("store matches the cumulative-sum series" if ok else "store DIFFERS from the cumulative-sum series")
+            conn.close()
+            raise SystemExit(0 if ok else 1)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+Materialized vendor / part risk scorecards for the war room.
+
+sql/02_vendor_risk.sql, 03_part_risk.sql and 04_cost_impact.sql each
+re-aggregate all of shipments and production on every run, computing
+julianday(arrival_date) - julianday(ship_date) per row each time. This
+module keeps those aggregates in the database instead:
+
+- supplier_scorecard: per shipments.supplier_id, shipment count, stored
+  total transit days and total shipping cost
+- part_scorecard: per part_id, the same shipment totals plus production
+  rows, units, downtime minutes and defects
+- scorecard_watermark: the last shipment_id / production_id folded in
+
+refresh() folds only the fact rows above the watermarks into the
+scorecards (one GROUP BY over the new rowid range, then an upsert that
+adds to the running totals), all in one transaction, so it costs
+O(new rows). Transit days are computed once per shipment, when it is
+folded in.
+
+Supplier-level production totals are not stored: production has no
+supplier_id, so the views sum part_scorecard over parts.supplier_id at
+read time (one row per part, not per production row). Re-pointing a part
+to another supplier therefore needs no refresh.
+
+The views vendor_risk_scorecard, part_risk_scorecard and
+part_cost_impact give the columns of the three scripts from the
+precomputed rows; vendor_risk(), part_risk() and cost_impact() add each
+script's filter, ordering and limit, and check() compares them with the
+SQL files.
+
+Fact tables are treated as append-only (ids only grow, rows are never
+updated or deleted). After any other change, rebuild() recomputes from
+scratch.
+
+Usage:
+    python scorecards.py                   # refresh, then print the three reports
+    python scorecards.py --db /tmp/war_100m.db --rebuild
+    python scorecards.py --check           # compare with sql/02-04
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SQL_DIR = os.path.join(HERE, "..", "sql")
+DB_PATH = os.path.join(HERE, "..", "industrial_war_room.db")
+
+# Cost model of sql/04_cost_impact.sql
+DOWNTIME_COST_PER_MIN = 75
+DEFECT_COST_PER_UNIT = 420
+
+SCORECARD_SQL = f"""
+CREATE TABLE IF NOT EXISTS supplier_scorecard (
+    supplier_id INTEGER PRIMARY KEY,
+    shipments INTEGER NOT NULL,
+    transit_days REAL NOT NULL,
+    shipping_cost REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS part_scorecard (
+    part_id INTEGER PRIMARY KEY,
+    shipments INTEGER NOT NULL DEFAULT 0,
+    transit_days REAL NOT NULL DEFAULT 0,
+    shipping_cost REAL NOT NULL DEFAULT 0,
+    production_rows INTEGER NOT NULL DEFAULT 0,
+    units_produced INTEGER NOT NULL DEFAULT 0,
+    downtime_minutes INTEGER NOT NULL DEFAULT 0,
+    defects INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS scorecard_watermark (
+    fact_table TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+
+CREATE VIEW IF NOT EXISTS vendor_risk_scorecard AS
+WITH prod AS (
+  SELECT
+    p.supplier_id,
+    SUM(ps.production_rows) AS production_rows,
+    SUM(ps.units_produced) AS units_produced,
+    SUM(ps.downtime_minutes) AS downtime_minutes,
+    SUM(ps.defects) AS defects
+  FROM part_scorecard ps
+  JOIN parts p ON ps.part_id = p.part_id
+  WHERE ps.production_rows > 0
+  GROUP BY p.supplier_id
+)
+SELECT
+  sc.supplier_id,
+  s.supplier_name,
+  s.region,
+  sc.shipments,
+  ROUND(sc.transit_days / sc.shipments, 2) AS avg_transit_days,
+  ROUND(sc.shipping_cost, 2) AS total_shipping_cost,
+  pr.downtime_minutes AS total_downtime,
+  ROUND(1.0 * pr.downtime_minutes / pr.production_rows, 2) AS avg_downtime,
+  pr.defects AS total_defects,
+  ROUND(1.0 * pr.defects / pr.units_produced, 4) AS defect_rate
+FROM supplier_scorecard sc
+JOIN suppliers s ON sc.supplier_id = s.supplier_id
+LEFT JOIN prod pr ON sc.supplier_id = pr.supplier_id;
+
+CREATE VIEW IF NOT EXISTS part_risk_scorecard AS
+SELECT
+  p.part_id,
+  p.part_name,
+  p.category,
+  p.unit_cost,
+  s.supplier_name,
+  s.region,
+  NULLIF(ps.shipments, 0) AS shipments,
+  ROUND(ps.transit_days / NULLIF(ps.shipments, 0), 2) AS avg_transit_days,
+  CASE WHEN ps.shipments > 0 THEN ROUND(ps.shipping_cost, 2) END AS total_shipping_cost,
+  NULLIF(ps.production_rows, 0) AS production_rows,
+  CASE WHEN ps.production_rows > 0 THEN ps.units_produced END AS total_units,
+  CASE WHEN ps.production_rows > 0 THEN ps.downtime_minutes END AS total_downtime,
+  ROUND(1.0 * ps.downtime_minutes / NULLIF(ps.production_rows, 0), 2) AS avg_downtime,
+  CASE WHEN ps.production_rows > 0 THEN ps.defects END AS total_defects,
+  ROUND(1.0 * ps.defects / NULLIF(ps.units_produced, 0), 4) AS defect_rate
+FROM part_scorecard ps
+JOIN parts p ON ps.part_id = p.part_id
+JOIN suppliers s ON p.supplier_id = s.supplier_id;
+
+CREATE VIEW IF NOT EXISTS part_cost_impact AS
+SELECT
+  p.part_id,
+  p.part_name,
+  s.supplier_name,
+  p.category,
+  s.region,
+  ps.downtime_minutes AS total_downtime,
+  ps.defects AS total_defects,
+  ROUND(ps.downtime_minutes * {DOWNTIME_COST_PER_MIN}, 2) AS downtime_cost,
+  ROUND(ps.defects * {DEFECT_COST_PER_UNIT}, 2) AS defect_cost,
+  ROUND(ps.downtime_minutes * {DOWNTIME_COST_PER_MIN}, 2) + ROUND(ps.defects * {DEFECT_COST_PER_UNIT}, 2) AS total_loss
+FROM part_scorecard ps
+JOIN parts p ON ps.part_id = p.part_id
+JOIN suppliers s ON p.supplier_id = s.supplier_id
+WHERE ps.production_rows > 0;
+"""
+
+# :lo / :hi bound the rowid range being folded in; transit days are computed here, once per row.
+# {source} / {transit} read the integer-day table directly after sql/06_day_dates.sql.
+NEW_SHIPMENTS_SQL = """
+CREATE TEMP TABLE new_shipments AS
+SELECT
+  supplier_id,
+  part_id,
+  COUNT(*) AS n,
+  SUM({transit}) AS transit_days,
+  SUM(shipping_cost) AS shipping_cost
+FROM {source}
+WHERE shipment_id > :lo AND shipment_id <= :hi
+GROUP BY supplier_id, part_id
+"""
+
+FOLD_SHIPMENTS_SQL = """
+INSERT INTO supplier_scorecard (supplier_id, shipments, transit_days, shipping_cost)
+SELECT supplier_id, SUM(n), SUM(transit_days), SUM(shipping_cost) FROM temp.new_shipments WHERE true GROUP BY supplier_id
+ON CONFLICT (supplier_id) DO UPDATE SET
+  shipments = shipments + excluded.shipments,
+  transit_days = transit_days + excluded.transit_days,
+  shipping_cost = shipping_cost + excluded.shipping_cost;
+
+INSERT INTO part_scorecard (part_id, shipments, transit_days, shipping_cost)
+SELECT part_id, SUM(n), SUM(transit_days), SUM(shipping_cost) FROM temp.new_shipments WHERE true GROUP BY part_id
+ON CONFLICT (part_id) DO UPDATE SET
+  shipments = shipments + excluded.shipments,
+  transit_days = transit_days + excluded.transit_days,
+  shipping_cost = shipping_cost + excluded.shipping_cost;
+"""
+
+FOLD_PRODUCTION_SQL = """
+INSERT INTO part_scorecard (part_id, production_rows, units_produced, downtime_minutes, defects)
+SELECT part_id, COUNT(*), SUM(units_produced), SUM(downtime_minutes), SUM(defects)
+FROM production
+WHERE production_id > :lo AND production_id <= :hi
+GROUP BY part_id
+ON CONFLICT (part_id) DO UPDATE SET
+  production_rows = production_rows + excluded.production_rows,
+  units_produced = units_produced + excluded.units_produced,
+  downtime_minutes = downtime_minutes + excluded.downtime_minutes,
+  defects = defects + excluded.defects
+"""
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(SCORECARD_SQL)
+
+
+def _shipments_source(conn: sqlite3.Connection) -> dict:
+    """Table and transit-days expression: integer days if the database has been migrated to them."""
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'shipments_days'").fetchone():
+        return {"source": "shipments_days", "transit": "arrival_day - ship_day"}
+    return {"source": "shipments", "transit": "julianday(arrival_date) - julianday(ship_date)"}
+
+
+def _watermark(conn: sqlite3.Connection, fact_table: str) -> int:
+    row = conn.execute("SELECT last_id FROM scorecard_watermark WHERE fact_table = ?", (fact_table,)).fetchone()
+    return row[0] if row else 0
+
+
+def _set_watermark(conn: sqlite3.Connection, fact_table: str, last_id: int) -> None:
+    conn.execute("INSERT INTO scorecard_watermark (fact_table, last_id) VALUES (?, ?) "
+                 "ON CONFLICT (fact_table) DO UPDATE SET last_id = excluded.last_id", (fact_table, last_id))
+
+
+def refresh(conn: sqlite3.Connection, full: bool = False) -> dict:
+    """
+    Fold shipments / production rows added since the last refresh into the
+    scorecards, in one transaction; full=True empties them first and folds
+    in everything. Returns the number of rows folded in per fact table.
+    """
+    ensure_schema(conn)
+    folded = {}
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")  # writers wait, so the [lo, hi] ranges are stable
+    try:
+        if full:
+            for table in ("supplier_scorecard", "part_scorecard", "scorecard_watermark"):
+                conn.execute(f"DELETE FROM {table}")
+        for fact_table, key in (("shipments", "shipment_id"), ("production", "production_id")):
+            lo = _watermark(conn, fact_table)
+            hi = conn.execute(f"SELECT COALESCE(MAX({key}), 0) FROM {fact_table}").fetchone()[0]
+            if hi > lo:
+                params = {"lo": lo, "hi": hi}
+                if fact_table == "shipments":
+                    conn.execute(NEW_SHIPMENTS_SQL.format(**_shipments_source(conn)), params)
+                    for stmt in FOLD_SHIPMENTS_SQL.split(";\n\n"):
+                        conn.execute(stmt)
+                    conn.execute("DROP TABLE temp.new_shipments")
+                else:
+                    conn.execute(FOLD_PRODUCTION_SQL, params)
+                _set_watermark(conn, fact_table, hi)
+            folded[fact_table] = conn.execute(
+                f"SELECT COUNT(*) FROM {fact_table} WHERE {key} > ? AND {key} <= ?", (lo, hi)).fetchone()[0]
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return folded
+
+
+def rebuild(conn: sqlite3.Connection) -> dict:
+    """Recompute the scorecards from every fact row (readers see the old ones until it commits)."""
+    return refresh(conn, full=True)
+
+
+def vendor_risk(conn: sqlite3.Connection, limit: int = 15) -> pd.DataFrame:
+    """sql/02_vendor_risk.sql from the scorecards."""
+    return pd.read_sql_query("""
+        SELECT * FROM vendor_risk_scorecard
+        ORDER BY avg_transit_days DESC, avg_downtime DESC, defect_rate DESC
+        LIMIT ?""", conn, params=(limit,))
+
+
+def part_risk(conn: sqlite3.Connection, limit: int = 20, min_production_rows: int = 10) -> pd.DataFrame:
+    """sql/03_part_risk.sql from the scorecards."""
+    return pd.read_sql_query("""
+        SELECT * FROM part_risk_scorecard
+        WHERE production_rows >= ?
+        ORDER BY total_downtime DESC, defect_rate DESC, avg_transit_days DESC
+        LIMIT ?""", conn, params=(min_production_rows, limit))
+
+
+def cost_impact(conn: sqlite3.Connection, limit: int = 15) -> pd.DataFrame:
+    """sql/04_cost_impact.sql from the scorecards."""
+    return pd.read_sql_query("""
+        SELECT part_name, supplier_name, category, region, total_downtime, total_defects,
+               downtime_cost, defect_cost, total_loss
+        FROM part_cost_impact
+        ORDER BY total_loss DESC
+        LIMIT ?""", conn, params=(limit,))
+
+
+REPORTS = {
+    "02_vendor_risk.sql": vendor_risk,
+    "03_part_risk.sql": part_risk,
+    "04_cost_impact.sql": cost_impact,
+}
+
+
+def report_sql(script: str) -> str:
+    """The last statement of a sqlite3-shell script in sql/ (dot-commands dropped)."""
+    with open(os.path.join(SQL_DIR, script), encoding="utf-8") as fh:
+        lines = [ln for ln in fh if not ln.lstrip().startswith(".")]
+    statements, buf = [], ""
+    for ln in lines:
+        buf += ln
+        if sqlite3.complete_statement(buf):
+            statements.append(buf)
+            buf = ""
+    return statements[-1]
+
+
+def run_sql_report(conn: sqlite3.Connection, script: str) -> pd.DataFrame:
+    return pd.read_sql_query(report_sql(script), conn)
+
+
+def check(conn: sqlite3.Connection) -> pd.DataFrame:
+    """Scorecard reports vs the SQL scripts: one row per script with timings and whether they match."""
+    rows = []
+    for script, report in REPORTS.items():
+        t0 = time.perf_counter()
+        expected = run_sql_report(conn, script)
+        t1 = time.perf_counter()
+        got = report(conn)
+        t2 = time.perf_counter()
+        try:
+            pd.testing.assert_frame_equal(got, expected, check_dtype=False, rtol=1e-9)
+            ok = True
+        except AssertionError:
+            ok = False
+        rows.append({"script": script, "sql_s": t1 - t0, "scorecard_s": t2 - t1, "match": ok})
+    return pd.DataFrame(rows)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Refresh and read the materialized war-room risk scorecards")
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--rebuild", action="store_true", help="recompute from scratch instead of folding in new rows")
+    ap.add_argument("--check", action="store_true", help="compare with sql/02-04 instead of printing the reports")
+    args = ap.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    t0 = time.perf_counter()
+    folded = rebuild(conn) if args.rebuild else refresh(conn)
+    print(f"{'rebuilt' if args.rebuild else 'refreshed'} in {time.perf_counter() - t0:.2f}s: "
+          + ", ".join(f"{n:,} new {t} rows" for t, n in folded.items()))
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        if args.check:
+            result = check(conn)
+            print(result.round(4).to_string(index=False))
+            conn.close()
+            raise SystemExit(0 if result["match"].all() else 1)
+        for script, report in REPORTS.items():
+            print(f"\n-- {script}")
+            print(report(conn).to_string(index=False))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
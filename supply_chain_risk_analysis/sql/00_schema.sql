@@ -42,6 +42,7 @@ CREATE TABLE inventory (
     stock_level INTEGER,
     reorder_point INTEGER,
     warehouse TEXT,
+    snapshot_date TEXT,
     FOREIGN KEY (part_id) REFERENCES parts(part_id)
 );
 
@@ -0,0 +1,24 @@
+-- =========================================================
+-- 05_indexes.sql
+-- Covering indexes for the 02-04 analyses. generate_data.py --rebuild
+-- creates them after the bulk load (one sort per index instead of
+-- per-row index maintenance), followed by ANALYZE.
+--
+-- Each analysis aggregates whole tables grouped by supplier or part, so
+-- the indexes carry every column the aggregates read: the GROUP BY then
+-- walks one index in key order with no table lookups. Plain
+-- single-column indexes are slower than a full scan here (a rowid
+-- lookup per row), so none are created.
+-- =========================================================
+
+-- 02: shipment performance per supplier
+CREATE INDEX IF NOT EXISTS idx_shipments_supplier_cover
+  ON shipments(supplier_id, ship_date, arrival_date, shipping_cost);
+
+-- 03: shipment performance per part
+CREATE INDEX IF NOT EXISTS idx_shipments_part_cover
+  ON shipments(part_id, ship_date, arrival_date, shipping_cost);
+
+-- 02-04: production joined to parts and grouped by part
+CREATE INDEX IF NOT EXISTS idx_production_part_cover
+  ON production(part_id, units_produced, downtime_minutes, defects);
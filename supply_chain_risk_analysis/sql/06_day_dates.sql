@@ -0,0 +1,130 @@
+-- =========================================================
+-- 06_day_dates.sql
+-- Migration: store shipment / production dates as integer day numbers
+-- (days since 1970-01-01) instead of ISO TEXT.
+--
+--   sqlite3 industrial_war_room.db < sql/06_day_dates.sql
+--   (or generate_data.py --rebuild --day-dates)
+--
+-- The rows move to shipments_days / production_days. shipments and
+-- production become views with the old TEXT columns, and INSTEAD OF
+-- triggers accept inserts and deletes, so 01-04, the scorecards and the
+-- generator run unchanged. Queries that read the *_days tables directly
+-- get transit time as arrival_day - ship_day and date windows as integer
+-- range scans, with no julianday() per row.
+--
+-- Run once, on a database built from 00_schema.sql. Dropping the old
+-- tables drops their indexes; the covering indexes below replace them.
+-- =========================================================
+
+PRAGMA foreign_keys = OFF;
+BEGIN;
+
+CREATE TABLE shipments_days (
+    shipment_id INTEGER PRIMARY KEY,
+    supplier_id INTEGER,
+    part_id INTEGER,
+    ship_day INTEGER,
+    arrival_day INTEGER,
+    shipping_cost REAL,
+    status TEXT,
+    FOREIGN KEY (supplier_id) REFERENCES suppliers(supplier_id),
+    FOREIGN KEY (part_id) REFERENCES parts(part_id)
+);
+
+INSERT INTO shipments_days
+SELECT
+  shipment_id, supplier_id, part_id,
+  CAST(julianday(ship_date) - 2440587.5 AS INTEGER),
+  CAST(julianday(arrival_date) - 2440587.5 AS INTEGER),
+  shipping_cost, status
+FROM shipments
+ORDER BY shipment_id;
+
+CREATE TABLE production_days (
+    production_id INTEGER PRIMARY KEY,
+    part_id INTEGER,
+    production_day INTEGER,
+    units_produced INTEGER,
+    downtime_minutes INTEGER,
+    defects INTEGER,
+    plant TEXT,
+    FOREIGN KEY (part_id) REFERENCES parts(part_id)
+);
+
+INSERT INTO production_days
+SELECT
+  production_id, part_id,
+  CAST(julianday(production_date) - 2440587.5 AS INTEGER),
+  units_produced, downtime_minutes, defects, plant
+FROM production
+ORDER BY production_id;
+
+DROP TABLE shipments;
+DROP TABLE production;
+
+-- -------------------------
+-- TEXT-date compatibility views
+-- -------------------------
+CREATE VIEW shipments AS
+SELECT
+  shipment_id, supplier_id, part_id,
+  date(ship_day + 2440587.5) AS ship_date,
+  date(arrival_day + 2440587.5) AS arrival_date,
+  shipping_cost, status
+FROM shipments_days;
+
+CREATE VIEW production AS
+SELECT
+  production_id, part_id,
+  date(production_day + 2440587.5) AS production_date,
+  units_produced, downtime_minutes, defects, plant
+FROM production_days;
+
+CREATE TRIGGER shipments_insert INSTEAD OF INSERT ON shipments
+BEGIN
+  INSERT INTO shipments_days
+  VALUES (NEW.shipment_id, NEW.supplier_id, NEW.part_id,
+          CAST(julianday(NEW.ship_date) - 2440587.5 AS INTEGER),
+          CAST(julianday(NEW.arrival_date) - 2440587.5 AS INTEGER),
+          NEW.shipping_cost, NEW.status);
+END;
+
+CREATE TRIGGER shipments_delete INSTEAD OF DELETE ON shipments
+BEGIN
+  DELETE FROM shipments_days WHERE shipment_id = OLD.shipment_id;
+END;
+
+CREATE TRIGGER production_insert INSTEAD OF INSERT ON production
+BEGIN
+  INSERT INTO production_days
+  VALUES (NEW.production_id, NEW.part_id,
+          CAST(julianday(NEW.production_date) - 2440587.5 AS INTEGER),
+          NEW.units_produced, NEW.downtime_minutes, NEW.defects, NEW.plant);
+END;
+
+CREATE TRIGGER production_delete INSTEAD OF DELETE ON production
+BEGIN
+  DELETE FROM production_days WHERE production_id = OLD.production_id;
+END;
+
+-- -------------------------
+-- Covering indexes
+-- -------------------------
+-- Joins and date windows on (supplier, part, day); the trailing columns
+-- make it covering for the 02 per-supplier rollup.
+CREATE INDEX idx_shipments_days_supplier_part_day
+  ON shipments_days(supplier_id, part_id, ship_day, arrival_day, shipping_cost);
+
+-- 03 per-part shipment rollup
+CREATE INDEX idx_shipments_days_part_day
+  ON shipments_days(part_id, ship_day, arrival_day, shipping_cost);
+
+-- Part joins and date windows on production; covering for 02-04
+CREATE INDEX idx_production_days_part_day
+  ON production_days(part_id, production_day, units_produced, downtime_minutes, defects);
+
+COMMIT;
+PRAGMA foreign_keys = ON;
+
+ANALYZE;